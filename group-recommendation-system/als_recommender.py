@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+ALS Recommender
+
+Recomendador por fatoração de matriz com feedback implícito (ALS, Hu, Koren
+e Volinsky 2008) sobre a matriz esparsa usuário × jogo de playtime_forever:
+
+- preferência p_ui = 1 para cada jogo possuído
+- confiança c_ui = 1 + alpha · log(1 + minutos / epsilon)
+
+Os fatores de usuários e jogos são resolvidos alternadamente em NumPy, em
+blocos de linhas: cada bloco monta os sistemas f × f dos seus usuários (ou
+jogos) e os resolve de uma vez com np.linalg.solve; os blocos rodam em
+threads (o LAPACK libera o GIL).
+
+Depois do treino, recomendar para um usuário ou grupo é um produto escalar
+com a média dos vetores do grupo e um top-k. O modelo é salvo em .npz e
+usuários recoletados são incorporados sem retreinar (fold_in).
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Linhas resolvidas por bloco (cada bloco aloca block × f × f floats)
+BLOCK_SIZE = 512
+
+_INTEGER_PARAMS = ('factors', 'iterations', 'seed')
+
+
+def interaction_matrix(users_data: List[Dict]) -> Tuple[List[str], List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Matriz usuário × jogo em CSR a partir do dataset.
+
+    Returns:
+        Tupla (steam_ids, appids, indptr, indices, playtime), com os jogos na
+        ordem em que aparecem no dataset (a mesma do game_database)
+    """
+    steam_ids = [user['steam_id'] for user in users_data]
+    game_index: Dict[str, int] = {}
+    indptr = np.zeros(len(users_data) + 1, dtype=np.int64)
+    indices = []
+    playtime = []
+
+    for row, user in enumerate(users_data):
+        seen = set()
+        for game in user.get('owned_games', {}).get('games', []):
+            app_id = str(game.get('appid', ''))
+            if not app_id or app_id in seen:
+                continue
+            seen.add(app_id)
+            indices.append(game_index.setdefault(app_id, len(game_index)))
+            playtime.append(game.get('playtime_forever', 0))
+        indptr[row + 1] = len(indices)
+
+    return (steam_ids, list(game_index), indptr,
+            np.array(indices, dtype=np.int64), np.array(playtime, dtype=np.float64))
+
+
+def dataset_fingerprint(users_data: List[Dict]) -> str:
+    """
+    SHA-256 da matriz usuário × jogo do dataset (usuários, jogos e tempos de
+    jogo): muda com qualquer posse ou tempo de jogo, não só com os usuários.
+    """
+    steam_ids, appids, indptr, indices, playtime = interaction_matrix(users_data)
+    digest = hashlib.sha256()
+    for names in (steam_ids, appids):
+        digest.update('\n'.join(names).encode('utf-8'))
+        digest.update(b'\0')
+    for array in (indptr, indices, playtime):
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def confidence(playtime: np.ndarray, alpha: float, epsilon: float) -> np.ndarray:
+    """Confiança de cada posse a partir do tempo de jogo (minutos)."""
+    return 1.0 + alpha * np.log1p(playtime / epsilon)
+
+
+def transpose_csr(indptr: np.ndarray, indices: np.ndarray, values: np.ndarray,
+                  num_columns: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Transposta de uma matriz CSR (jogo × usuário a partir de usuário × jogo)."""
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    order = np.argsort(indices, kind='stable')
+    t_indptr = np.zeros(num_columns + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=num_columns), out=t_indptr[1:])
+    return t_indptr, rows[order], values[order]
+
+
+def csr_gather(indptr: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Posições (em indices) das linhas `rows` de uma matriz CSR, concatenadas."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total)
+
+
+def _solve_rows(indptr: np.ndarray, indices: np.ndarray, conf: np.ndarray, fixed: np.ndarray,
+                gram: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """
+    Resolve x_r = (YᵀY + λI + Y_rᵀ (C_r - I) Y_r)⁻¹ Y_rᵀ C_r p_r para as linhas
+    [start, stop) de uma vez.
+    """
+    size = stop - start
+    A = np.repeat(gram[None, :, :], size, axis=0)
+    b = np.zeros((size, fixed.shape[1]))
+
+    for offset, row in enumerate(range(start, stop)):
+        lo, hi = indptr[row], indptr[row + 1]
+        if lo == hi:
+            continue
+        Y = fixed[indices[lo:hi]]
+        c = conf[lo:hi]
+        A[offset] += (Y.T * (c - 1.0)) @ Y
+        b[offset] = Y.T @ c
+
+    return np.linalg.solve(A, b[:, :, None])[:, :, 0]
+
+
+def solve_side(indptr: np.ndarray, indices: np.ndarray, conf: np.ndarray, fixed: np.ndarray,
+               regularization: float, executor: Optional[ThreadPoolExecutor] = None) -> np.ndarray:
+    """Recalcula todos os fatores de um lado com o outro lado fixo."""
+    factors = fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(factors)
+    num_rows = len(indptr) - 1
+    blocks = [(start, min(start + BLOCK_SIZE, num_rows)) for start in range(0, num_rows, BLOCK_SIZE)]
+
+    if executor is None:
+        solved = [_solve_rows(indptr, indices, conf, fixed, gram, start, stop) for start, stop in blocks]
+    else:
+        solved = list(executor.map(lambda block: _solve_rows(indptr, indices, conf, fixed, gram, *block),
+                                   blocks))
+    return np.concatenate(solved) if solved else np.zeros((0, factors))
+
+
+class ALSModel:
+    """Fatores de usuários e jogos treinados com ALS implícito."""
+
+    def __init__(self, steam_ids: List[str], appids: List[str], user_factors: np.ndarray,
+                 item_factors: np.ndarray, indptr: np.ndarray, indices: np.ndarray,
+                 params: Dict, fingerprint: str = ''):
+        """
+        Args:
+            steam_ids: SteamID de cada linha de user_factors
+            appids: AppID de cada linha de item_factors
+            user_factors: Fatores dos usuários (n × f)
+            item_factors: Fatores dos jogos (m × f)
+            indptr, indices: Jogos de cada usuário (CSR), excluídos das recomendações
+            params: Hiperparâmetros do treino
+            fingerprint: dataset_fingerprint do dataset do treino (para matches)
+        """
+        self.steam_ids = list(steam_ids)
+        self.appids = list(appids)
+        self.user_position = {steam_id: i for i, steam_id in enumerate(self.steam_ids)}
+        self.item_position = {appid: i for i, appid in enumerate(self.appids)}
+        self.user_factors = user_factors.astype(np.float32)
+        self.item_factors = item_factors.astype(np.float32)
+        self.indptr = indptr
+        self.indices = indices
+        self.params = params
+        self.fingerprint = fingerprint
+        self._owned: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def train(cls, users_data: List[Dict], factors: int = 32, regularization: float = 1.0,
+              alpha: float = 2.0, epsilon: float = 60.0, iterations: int = 10,
+              workers: Optional[int] = None, seed: int = 42) -> 'ALSModel':
+        """
+        Treina o modelo sobre o dataset.
+
+        Args:
+            users_data: Lista de usuários do steam_user_miner
+            factors: Dimensão dos vetores
+            regularization: Regularização L2 (λ)
+            alpha: Peso do tempo de jogo na confiança
+            epsilon: Escala (minutos) do tempo de jogo na confiança
+            iterations: Iterações de ALS (cada uma resolve os dois lados)
+            workers: Threads para resolver os blocos (padrão: os.cpu_count())
+            seed: Semente da inicialização
+        """
+        start = time.perf_counter()
+        steam_ids, appids, indptr, indices, playtime = interaction_matrix(users_data)
+        conf = confidence(playtime, alpha, epsilon)
+        t_indptr, t_indices, t_conf = transpose_csr(indptr, indices, conf, len(appids))
+
+        rng = np.random.default_rng(seed)
+        user_factors = rng.normal(0, 0.01, (len(steam_ids), factors))
+        item_factors = rng.normal(0, 0.01, (len(appids), factors))
+
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in range(iterations):
+                user_factors = solve_side(indptr, indices, conf, item_factors, regularization, executor)
+                item_factors = solve_side(t_indptr, t_indices, t_conf, user_factors, regularization, executor)
+
+        logger.info(f"ALS treinado: {len(steam_ids)} usuários × {len(appids)} jogos, {len(indices)} posses, "
+                    f"{factors} fatores, {iterations} iterações em {time.perf_counter() - start:.2f}s")
+
+        params = {'factors': factors, 'regularization': regularization, 'alpha': alpha,
+                  'epsilon': epsilon, 'iterations': iterations, 'seed': seed}
+        return cls(steam_ids, appids, user_factors, item_factors, indptr, indices, params,
+                   dataset_fingerprint(users_data))
+
+    def save(self, path: str):
+        """Salva o modelo em .npz (incluindo os usuários incorporados com fold_in)."""
+        owned = [self.owned(position) for position in range(len(self.steam_ids))]
+        indptr = np.zeros(len(owned) + 1, dtype=np.int64)
+        np.cumsum([len(games) for games in owned], out=indptr[1:])
+        indices = np.concatenate(owned) if owned else np.zeros(0, dtype=np.int64)
+
+        np.savez(path,
+                 steam_ids=np.array(self.steam_ids), appids=np.array(self.appids),
+                 user_factors=self.user_factors, item_factors=self.item_factors,
+                 indptr=indptr, indices=indices, fingerprint=np.array(self.fingerprint),
+                 param_names=np.array(list(self.params)),
+                 param_values=np.array(list(self.params.values()), dtype=np.float64))
+
+    @classmethod
+    def load(cls, path: str) -> 'ALSModel':
+        """Carrega um modelo salvo por save."""
+        with np.load(path, allow_pickle=False) as data:
+            params = {name: int(value) if name in _INTEGER_PARAMS else float(value)
+                      for name, value in zip(data['param_names'].tolist(), data['param_values'].tolist())}
+            # Modelos salvos sem a impressão digital nunca são reaproveitados
+            fingerprint = str(data['fingerprint']) if 'fingerprint' in data.files else ''
+            return cls(data['steam_ids'].tolist(), data['appids'].tolist(), data['user_factors'],
+                       data['item_factors'], data['indptr'], data['indices'], params, fingerprint)
+
+    def matches(self, users_data: List[Dict]) -> bool:
+        """Se o modelo foi treinado sobre exatamente este dataset (usuários, jogos e tempos de jogo)."""
+        return bool(self.fingerprint) and self.fingerprint == dataset_fingerprint(users_data)
+
+    def fold_in(self, user: Dict):
+        """
+        Incorpora (ou atualiza) um usuário com os fatores dos jogos fixos, sem
+        retreinar. Jogos fora do modelo são ignorados.
+        """
+        games = {}
+        for game in user.get('owned_games', {}).get('games', []):
+            position = self.item_position.get(str(game.get('appid', '')))
+            if position is not None:
+                games[position] = game.get('playtime_forever', 0)
+
+        indices = np.array(list(games), dtype=np.int64)
+        conf = confidence(np.array(list(games.values()), dtype=np.float64),
+                          self.params['alpha'], self.params['epsilon'])
+        Y = self.item_factors.astype(np.float64)
+        gram = Y.T @ Y + self.params['regularization'] * np.eye(Y.shape[1])
+        vector = _solve_rows(np.array([0, len(indices)]), indices, conf, Y, gram, 0, 1)[0]
+
+        position = self.user_position.get(user['steam_id'])
+        if position is None:
+            position = len(self.steam_ids)
+            self.steam_ids.append(user['steam_id'])
+            self.user_position[user['steam_id']] = position
+            self.user_factors = np.vstack([self.user_factors, vector.astype(np.float32)])
+        else:
+            self.user_factors[position] = vector
+        self._owned[position] = indices
+
+    def owned(self, position: int) -> np.ndarray:
+        """Jogos (posições) de um usuário."""
+        if position in self._owned:
+            return self._owned[position]
+        if position + 1 < len(self.indptr):
+            return self.indices[self.indptr[position]:self.indptr[position + 1]]
+        return np.zeros(0, dtype=np.int64)
+
+    def recommend(self, steam_ids: Iterable[str], top_n: int = 10,
+                  exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """
+        Jogos com maior score para um usuário ou grupo (média dos vetores),
+        excluindo os que algum membro já possui.
+
+        Args:
+            steam_ids: Usuários do grupo
+            top_n: Jogos retornados
+            exclude: AppIDs também excluídos (ex.: posses atuais, mais novas
+                que as do treino)
+
+        Returns:
+            Lista [(appid, score)] ordenada por score
+        """
+        positions = [self.user_position[steam_id] for steam_id in dict.fromkeys(steam_ids)
+                     if steam_id in self.user_position]
+        if not positions or not self.appids or top_n <= 0:
+            return []
+
+        scores = self.item_factors @ self.user_factors[positions].mean(axis=0)
+        scores[np.concatenate([self.owned(position) for position in positions])] = -np.inf
+        scores[[self.item_position[appid] for appid in exclude if appid in self.item_position]] = -np.inf
+
+        top_n = min(top_n, len(scores))
+        candidates = np.argpartition(-scores, top_n - 1)[:top_n]
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(self.appids[i], float(scores[i])) for i in ranked.tolist() if np.isfinite(scores[i])]
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+ANN Index
+
+Índice aproximado de vizinhos mais próximos sobre vetores de usuários: os
+usuários com a biblioteca de jogos mais parecida (cosseno dos vetores), sem
+percorrer todos os usuários.
+
+A métrica não é a similaridade do analisador (calculate_user_similarity),
+que também soma país, amizade e a média da semelhança do tempo de jogo nos
+jogos em comum. Essa média não é um produto escalar entre vetores dos dois
+usuários, e é ela que decide a cauda dos top-k; por isso o índice não
+substitui nearest_users do analisador (benchmark_ann.py mede as duas
+referências).
+
+Vetor de um usuário: projeção aleatória (Johnson-Lindenstrauss) do vetor
+esparso de jogos, com peso 1 + log(1 + minutos / 60) por jogo possuído,
+normalizada para norma 1. Cada jogo tem uma direção gaussiana fixa derivada
+do próprio appid, então usuários novos (e jogos novos) são projetados sem
+refazer nada.
+
+Índice: arquivo invertido (IVF). Um k-means esférico divide os vetores em
+células; cada célula guarda os vetores dos seus usuários em um bloco
+contíguo. Uma consulta compara o vetor com os centróides, visita as `nprobe`
+células mais próximas e ordena só os candidatos delas (produto escalar =
+cosseno): poucas operações NumPy por consulta, sem laços em Python. Usuários
+novos ou recoletados entram na célula do centróide mais próximo.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import logging
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Escala (minutos) do tempo de jogo no peso de cada jogo
+PLAYTIME_SCALE = 60.0
+
+
+class UserANNIndex:
+    """Arquivo invertido (k-means esférico) sobre os vetores dos usuários."""
+
+    def __init__(self, dims: int = 64, num_lists: Optional[int] = None, nprobe: int = 16,
+                 iterations: int = 10, seed: int = 42):
+        """
+        Args:
+            dims: Dimensão dos vetores
+            num_lists: Células do k-means (padrão: 4 × √usuários)
+            nprobe: Células visitadas por consulta (mais células: mais recall,
+                consultas mais lentas)
+            iterations: Iterações do k-means
+            seed: Semente das projeções e do k-means
+        """
+        self.dims = dims
+        self.num_lists = num_lists
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+        self.steam_ids: List[str] = []
+        self.position: Dict[str, int] = {}
+        self.vectors = np.zeros((0, dims), dtype=np.float32)
+        self.centroids = np.zeros((0, dims), dtype=np.float32)
+        self.cell_of = np.zeros(0, dtype=np.int64)
+        self.cell_points: List[np.ndarray] = []
+        self.cell_vectors: List[np.ndarray] = []
+        self._directions: Dict[str, np.ndarray] = {}
+
+    # ------------------------------------------------------------------
+    # Vetores
+    # ------------------------------------------------------------------
+
+    def _direction(self, appid: str) -> np.ndarray:
+        """Direção gaussiana fixa de um jogo (derivada do appid e da semente)."""
+        direction = self._directions.get(appid)
+        if direction is None:
+            rng = np.random.default_rng([self.seed, zlib.crc32(appid.encode('utf-8'))])
+            direction = rng.standard_normal(self.dims).astype(np.float32)
+            self._directions[appid] = direction
+        return direction
+
+    def embed(self, user: Dict) -> np.ndarray:
+        """Vetor (norma 1) de um usuário a partir dos jogos e do tempo de jogo."""
+        games = user.get('owned_games', {}).get('games', [])
+        vector = np.zeros(self.dims, dtype=np.float32)
+        if games:
+            directions = np.array([self._direction(str(game.get('appid', ''))) for game in games])
+            weights = 1.0 + np.log1p(np.array([game.get('playtime_forever', 0) for game in games],
+                                              dtype=np.float32) / PLAYTIME_SCALE)
+            vector = weights @ directions
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    # ------------------------------------------------------------------
+    # Construção e inserção
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, users_data: List[Dict], **params) -> 'UserANNIndex':
+        """
+        Constrói o índice sobre o dataset.
+
+        Args:
+            users_data: Lista de usuários do steam_user_miner
+            **params: Parâmetros do construtor (dims, num_lists, nprobe, iterations, seed)
+        """
+        start = time.perf_counter()
+        index = cls(**params)
+        index.steam_ids = [user['steam_id'] for user in users_data]
+        index.position = {steam_id: i for i, steam_id in enumerate(index.steam_ids)}
+        index.vectors = (np.array([index.embed(user) for user in users_data], dtype=np.float32)
+                         .reshape(len(users_data), index.dims))
+
+        num_lists = index.num_lists or max(1, int(4 * np.sqrt(len(users_data))))
+        index.centroids = index._kmeans(min(num_lists, max(len(users_data), 1)))
+        index.cell_of = index._assign(index.vectors)
+        index._rebuild_cells()
+
+        logger.info(f"Índice ANN: {len(users_data)} usuários, {len(index.centroids)} células, "
+                    f"{index.dims} dimensões em {time.perf_counter() - start:.2f}s")
+        return index
+
+    def _kmeans(self, num_lists: int) -> np.ndarray:
+        """Centróides (norma 1) do k-means esférico sobre os vetores."""
+        rng = np.random.default_rng(self.seed)
+        if not len(self.vectors):
+            return rng.standard_normal((num_lists, self.dims)).astype(np.float32)
+
+        centroids = self.vectors[rng.choice(len(self.vectors), num_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = self._assign(self.vectors, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, self.vectors)
+            norms = np.linalg.norm(sums, axis=1)
+            # Células vazias recebem um ponto sorteado
+            empty = norms == 0
+            sums[empty] = self.vectors[rng.choice(len(self.vectors), int(empty.sum()))]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            centroids = sums / np.maximum(norms, 1e-12)[:, None]
+        return centroids.astype(np.float32)
+
+    def _assign(self, vectors: np.ndarray, centroids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Célula (centróide de maior cosseno) de cada vetor."""
+        centroids = self.centroids if centroids is None else centroids
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), 4096):
+            labels[start:start + 4096] = np.argmax(vectors[start:start + 4096] @ centroids.T, axis=1)
+        return labels
+
+    def _rebuild_cells(self):
+        """Blocos contíguos de posições e vetores de cada célula."""
+        order = np.argsort(self.cell_of, kind='stable')
+        bounds = np.searchsorted(self.cell_of[order], np.arange(len(self.centroids) + 1))
+        self.cell_points = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+        self.cell_vectors = [self.vectors[points] for points in self.cell_points]
+
+    def add(self, user: Dict):
+        """Insere (ou atualiza) um usuário recoletado, sem reconstruir o índice."""
+        steam_id = user['steam_id']
+        vector = self.embed(user)
+        point = self.position.get(steam_id)
+
+        if point is None:
+            point = len(self.steam_ids)
+            self.steam_ids.append(steam_id)
+            self.position[steam_id] = point
+            if point == len(self.vectors):
+                grown = np.zeros((max(2 * len(self.vectors), 16), self.dims), dtype=np.float32)
+                grown[:len(self.vectors)] = self.vectors
+                self.vectors = grown
+                self.cell_of = np.resize(self.cell_of, len(grown))
+        else:
+            old = self.cell_of[point]
+            keep = self.cell_points[old] != point
+            self.cell_points[old] = self.cell_points[old][keep]
+            self.cell_vectors[old] = self.cell_vectors[old][keep]
+
+        if not len(self.centroids):
+            self.centroids = vector[None, :].copy()
+            self.cell_points, self.cell_vectors = [np.zeros(0, dtype=np.int64)], [np.zeros((0, self.dims), np.float32)]
+
+        cell = int(np.argmax(self.centroids @ vector))
+        self.vectors[point] = vector
+        self.cell_of[point] = cell
+        self.cell_points[cell] = np.append(self.cell_points[cell], point)
+        self.cell_vectors[cell] = np.vstack([self.cell_vectors[cell], vector[None, :]])
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _top(candidates: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Os k maiores scores, ordenados."""
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[best], scores[best]
+        order = np.argsort(-scores, kind='stable')
+        return candidates[order], scores[order]
+
+    def query(self, vector: np.ndarray, k: int = 10, exclude: Optional[int] = None,
+              nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Vizinhos aproximados de um vetor: [(steam_id, cosseno)], ordenados.
+
+        Args:
+            vector: Vetor de consulta (norma 1)
+            k: Número de vizinhos
+            exclude: Posição que não pode ser retornada (o próprio usuário)
+            nprobe: Células visitadas (padrão: self.nprobe)
+        """
+        if k <= 0 or not len(self.centroids):
+            return []
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        cells = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe]
+
+        candidates = np.concatenate([self.cell_points[c] for c in cells])
+        scores = np.concatenate([self.cell_vectors[c] for c in cells]) @ vector
+        if exclude is not None:
+            keep = candidates != exclude
+            candidates, scores = candidates[keep], scores[keep]
+
+        candidates, scores = self._top(candidates, scores, k)
+        return [(self.steam_ids[i], float(score)) for i, score in zip(candidates.tolist(), scores.tolist())]
+
+    def nearest_users(self, steam_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Os k usuários (aproximadamente) mais parecidos com `steam_id`."""
+        point = self.position.get(steam_id)
+        if point is None:
+            return []
+        return self.query(self.vectors[point], k, exclude=point)
+
+    def exact_nearest(self, steam_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Os k usuários de maior cosseno por busca exaustiva (referência do arquivo invertido)."""
+        point = self.position.get(steam_id)
+        if point is None or k <= 0:
+            return []
+        candidates = np.arange(len(self.steam_ids))
+        scores = self.vectors[:len(self.steam_ids)] @ self.vectors[point]
+        keep = candidates != point
+        candidates, scores = self._top(candidates[keep], scores[keep], k)
+        return [(self.steam_ids[i], float(score)) for i, score in zip(candidates.tolist(), scores.tolist())]
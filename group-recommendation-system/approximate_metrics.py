@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Approximate Graph Metrics
+
+Métricas aproximadas por amostragem para grafos de amizade grandes, onde as
+versões exatas do NetworkX (betweenness, closeness, diâmetro e caminho médio)
+custam O(n·m) ou mais.
+
+Todas as métricas saem do mesmo conjunto de BFS a partir de k fontes
+("pivôs") sorteadas:
+- Betweenness: algoritmo de Brandes restrito aos pivôs, escalado por n/k
+- Closeness: distância média estimada a partir dos pivôs (Eppstein-Wang)
+- Diâmetro: limites inferior (maior excentricidade + double sweep) e
+  superior (2 x menor excentricidade, válido para grafos conexos)
+- Caminho médio: média das distâncias a partir dos pivôs
+
+As BFS são distribuídas entre processos com multiprocessing. Os limites de
+erro usam a desigualdade de Hoeffding com união sobre os n nós e valem com
+probabilidade 1 - delta.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import math
+import os
+import random
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from friendship_graph import FriendshipGraph
+
+# Número de nós a partir do qual o modo aproximado é usado automaticamente
+APPROXIMATE_THRESHOLD = 2000
+
+# Orçamento padrão de fontes amostradas
+DEFAULT_SAMPLES = 256
+
+# Adjacência compartilhada com os processos de trabalho (definida no initializer)
+_ADJACENCY: List[List[int]] = []
+
+
+def _init_worker(adjacency: List[List[int]]):
+    """Inicializa o processo de trabalho com a lista de adjacência."""
+    global _ADJACENCY
+    _ADJACENCY = adjacency
+
+
+def _bfs_from_source(adjacency: List[List[int]], source: int):
+    """
+    BFS de Brandes a partir de uma fonte.
+
+    Returns:
+        Tupla (dependências δ_s(v), distâncias (-1 se inalcançável))
+    """
+    n = len(adjacency)
+    dist = [-1] * n
+    sigma = [0] * n
+    dist[source] = 0
+    sigma[source] = 1
+    order = [source]
+
+    head = 0
+    while head < len(order):
+        v = order[head]
+        head += 1
+        next_dist = dist[v] + 1
+        for w in adjacency[v]:
+            if dist[w] < 0:
+                dist[w] = next_dist
+                order.append(w)
+            if dist[w] == next_dist:
+                sigma[w] += sigma[v]
+
+    # Acumulação das dependências em ordem reversa de distância
+    delta = [0.0] * n
+    for w in reversed(order):
+        coefficient = (1.0 + delta[w]) / sigma[w]
+        prev_dist = dist[w] - 1
+        for v in adjacency[w]:
+            if dist[v] == prev_dist:
+                delta[v] += sigma[v] * coefficient
+    delta[source] = 0.0
+
+    return delta, dist
+
+
+def _process_sources(sources: Sequence[int]) -> Dict:
+    """Executa as BFS de um lote de fontes e agrega os resultados parciais."""
+    n = len(_ADJACENCY)
+    dependency = np.zeros(n)
+    distance_sum = np.zeros(n)
+    reach_count = np.zeros(n, dtype=np.int64)
+    per_source = []
+
+    for source in sources:
+        delta, dist = _bfs_from_source(_ADJACENCY, source)
+        dist_array = np.array(dist)
+        reached = dist_array > 0
+
+        dependency += delta
+        distance_sum[reached] += dist_array[reached]
+        reach_count[reached] += 1
+
+        eccentricity = int(dist_array.max())
+        per_source.append({
+            'source': source,
+            'eccentricity': eccentricity,
+            'farthest': int(dist_array.argmax()),
+            'distance_total': float(dist_array[reached].sum()),
+            'reached': int(reached.sum())
+        })
+
+    return {
+        'dependency': dependency,
+        'distance_sum': distance_sum,
+        'reach_count': reach_count,
+        'per_source': per_source
+    }
+
+
+def _run_sources(adjacency: List[List[int]], sources: List[int], workers: int) -> Dict:
+    """Distribui as fontes entre processos e soma os resultados parciais."""
+    if workers <= 1 or len(sources) < 2 * workers:
+        _init_worker(adjacency)
+        return _process_sources(sources)
+
+    chunks = [sources[i::workers] for i in range(workers)]
+    with Pool(workers, initializer=_init_worker, initargs=(adjacency,)) as pool:
+        partials = pool.map(_process_sources, chunks)
+
+    total = partials[0]
+    for partial in partials[1:]:
+        total['dependency'] += partial['dependency']
+        total['distance_sum'] += partial['distance_sum']
+        total['reach_count'] += partial['reach_count']
+        total['per_source'].extend(partial['per_source'])
+    return total
+
+
+def _to_adjacency(G) -> Tuple[List, List[List[int]]]:
+    """Converte o grafo (NetworkX ou FriendshipGraph) para listas de adjacência."""
+    if isinstance(G, FriendshipGraph):
+        return G.steam_ids, G.adjacency_lists()
+
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    adjacency = [[index[neighbor] for neighbor in G.adj[node] if neighbor != node]
+                 for node in nodes]
+    return nodes, adjacency
+
+
+def hoeffding_bound(samples: int, value_range: float, num_estimates: int = 1,
+                    delta: float = 0.05) -> float:
+    """
+    Erro aditivo máximo de uma média de `samples` amostras em [0, value_range],
+    válido simultaneamente para `num_estimates` estimativas com prob. 1 - delta.
+    """
+    if samples <= 0:
+        return float('inf')
+    return value_range * math.sqrt(math.log(2 * max(num_estimates, 1) / delta) / (2 * samples))
+
+
+def sample_graph_metrics(G,
+                         samples: int = DEFAULT_SAMPLES,
+                         workers: Optional[int] = None,
+                         delta: float = 0.05,
+                         seed: int = 42) -> Dict:
+    """
+    Estima betweenness, closeness, diâmetro e caminho médio por amostragem.
+
+    Args:
+        G: Grafo de amizades não direcionado (NetworkX ou FriendshipGraph)
+        samples: Orçamento de fontes amostradas (pivôs)
+        workers: Processos usados nas BFS (padrão: número de CPUs)
+        delta: Probabilidade de falha dos limites de erro
+        seed: Semente da amostragem
+
+    Returns:
+        Dicionário com 'betweenness', 'closeness', 'diameter',
+        'avg_path_length' e os respectivos limites de erro
+    """
+    nodes, adjacency = _to_adjacency(G)
+    n = len(nodes)
+    if n == 0:
+        return {'samples': 0, 'betweenness': {}, 'closeness': {},
+                'diameter': 0, 'avg_path_length': 0.0, 'error_bounds': {}}
+
+    k = min(samples, n)
+    sources = sorted(random.Random(seed).sample(range(n), k))
+    workers = workers or os.cpu_count() or 1
+    result = _run_sources(adjacency, sources, workers)
+    per_source = result['per_source']
+
+    # Double sweep: BFS extra a partir do nó mais distante encontrado
+    farthest = max(per_source, key=lambda s: s['eccentricity'])['farthest']
+    _, sweep_dist = _bfs_from_source(adjacency, farthest)
+    diameter_lower = max(max(sweep_dist), max(s['eccentricity'] for s in per_source))
+    diameter_upper = 2 * min(s['eccentricity'] for s in per_source)
+    diameter_upper = max(diameter_upper, diameter_lower)
+
+    # Betweenness (normalização do NetworkX para grafos não direcionados)
+    scale = n / k
+    if n > 2:
+        normalization = 1.0 / ((n - 1) * (n - 2))
+    else:
+        normalization = 0.0
+    betweenness_values = result['dependency'] * scale * normalization
+
+    # Closeness com a correção de Wasserman-Faust (como o NetworkX)
+    component_size = _component_sizes(adjacency)
+    closeness_values = np.zeros(n)
+    reach = result['reach_count']
+    has_reach = reach > 0
+    avg_distance = np.zeros(n)
+    avg_distance[has_reach] = result['distance_sum'][has_reach] / reach[has_reach]
+    positive = has_reach & (avg_distance > 0)
+    if n > 1:
+        closeness_values[positive] = (
+            (component_size[positive] - 1) / (n - 1) / avg_distance[positive]
+        )
+
+    total_reached = sum(s['reached'] for s in per_source)
+    avg_path_length = (sum(s['distance_total'] for s in per_source) / total_reached
+                       if total_reached else 0.0)
+
+    return {
+        'samples': k,
+        'betweenness': dict(zip(nodes, betweenness_values.tolist())),
+        'closeness': dict(zip(nodes, closeness_values.tolist())),
+        'diameter': diameter_lower,
+        'diameter_upper_bound': diameter_upper,
+        'avg_path_length': avg_path_length,
+        'error_bounds': {
+            'delta': delta,
+            # Cada pivô contribui n·δ_s(v)·normalização, com δ_s(v) <= n - 2
+            'betweenness': hoeffding_bound(k, n * (n - 2) * normalization, n, delta),
+            'avg_distance': hoeffding_bound(k, diameter_upper, n, delta),
+            'avg_path_length': hoeffding_bound(k, diameter_upper, 1, delta)
+        }
+    }
+
+
+def _component_sizes(adjacency: List[List[int]]) -> np.ndarray:
+    """Tamanho do componente conexo de cada nó."""
+    n = len(adjacency)
+    sizes = np.zeros(n, dtype=np.int64)
+    seen = [False] * n
+    for start in range(n):
+        if seen[start]:
+            continue
+        seen[start] = True
+        component = [start]
+        head = 0
+        while head < len(component):
+            v = component[head]
+            head += 1
+            for w in adjacency[v]:
+                if not seen[w]:
+                    seen[w] = True
+                    component.append(w)
+        sizes[component] = len(component)
+    return sizes
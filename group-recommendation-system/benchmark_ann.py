@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark do índice ANN
+
+Constrói o índice aproximado (ann_index.py) sobre um dataset sintético,
+insere os últimos usuários um a um (como numa recoleta) e, para uma amostra
+de usuários com jogos, compara os vizinhos do índice com duas referências:
+
+- cosseno: a busca exaustiva nos mesmos vetores (perda do arquivo invertido)
+- similaridade: os vizinhos exatos pela similaridade do analisador (linhas
+  de user_similarity_matrix, aqui calculadas sob demanda), que o índice não
+  aproxima (veja o docstring de ann_index.py)
+
+Reporta recall@k contra cada referência e a latência por consulta para cada
+nprobe, além da latência da linha exata da similaridade.
+
+Uso:
+    python benchmark_ann.py --users 100000 --k 10 --nprobe 8 16 32
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import json_codec
+from ann_index import UserANNIndex
+from steam_graph_analyzer import SteamGraphAnalyzer
+from synthetic_data import generate_users
+
+
+def _recall(found, expected) -> float:
+    return len({other for other, _ in found} & {other for other, _ in expected}) / max(len(expected), 1)
+
+
+def main():
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description="Recall e latência do índice ANN de usuários")
+    parser.add_argument('--users', type=int, default=20000, help="Usuários do dataset sintético")
+    parser.add_argument('--inserted', type=int, default=1000, help="Usuários inseridos depois da construção")
+    parser.add_argument('--queries', type=int, default=500, help="Consultas amostradas")
+    parser.add_argument('--k', type=int, default=10, help="Vizinhos por consulta")
+    parser.add_argument('--dims', type=int, default=64, help="Dimensão dos vetores")
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16, 32], help="Células visitadas")
+    args = parser.parse_args()
+
+    # O analisador registra cada etapa em INFO
+    logging.getLogger().setLevel(logging.ERROR)
+
+    users = generate_users(args.users)
+    with tempfile.TemporaryDirectory() as workdir:
+        data_file = os.path.join(workdir, 'users.json')
+        json_codec.dump(users, data_file)
+        analyzer = SteamGraphAnalyzer(data_file)
+        analyzer.load_data()
+    analyzer.create_similarity_matrix_lazy()
+    users = analyzer.users_data
+    split = max(len(users) - args.inserted, 1)
+
+    start = time.perf_counter()
+    index = UserANNIndex.build(users[:split], dims=args.dims)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for user in users[split:]:
+        index.add(user)
+    insert_time = (time.perf_counter() - start) / max(len(users) - split, 1)
+
+    print(f"Dataset: {args.users} usuários | {len(index.centroids)} células | {args.dims} dimensões")
+    print(f"Construção: {build_time:.2f}s ({split} usuários) | inserção: {insert_time * 1e3:.3f} ms/usuário")
+
+    # Usuários sem jogos têm vetor nulo (todos os vizinhos empatam): fora da amostra
+    rng = np.random.default_rng(0)
+    public = [user['steam_id'] for user in users if user.get('owned_games', {}).get('games')]
+    sample = rng.choice(public, min(args.queries, len(public)), replace=False).tolist()
+
+    cosine = {steam_id: index.exact_nearest(steam_id, args.k) for steam_id in sample}
+    exact, exact_times = {}, []
+    for steam_id in sample:
+        start = time.perf_counter()
+        exact[steam_id] = analyzer.nearest_users(steam_id, args.k)
+        exact_times.append(time.perf_counter() - start)
+
+    print(f"{'nprobe':>6} {'recall (cosseno)':>17} {'recall (similaridade)':>22} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        cosine_recalls, recalls, times = [], [], []
+        for steam_id in sample:
+            start = time.perf_counter()
+            found = index.nearest_users(steam_id, args.k)
+            times.append(time.perf_counter() - start)
+            cosine_recalls.append(_recall(found, cosine[steam_id]))
+            recalls.append(_recall(found, exact[steam_id]))
+
+        print(f"{nprobe:>6} {np.mean(cosine_recalls):>17.3f} {np.mean(recalls):>22.3f} "
+              f"{np.percentile(times, 50) * 1e3:>9.3f} {np.percentile(times, 99) * 1e3:>9.3f}")
+
+    print(f"{'exata':>6} {'':>17} {1.0:>22.3f} {np.percentile(exact_times, 50) * 1e3:>9.3f} "
+          f"{np.percentile(exact_times, 99) * 1e3:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Coleta
+
+Executa o minerador contra o mock local da Steam Web API (mock_steam_api.py)
+em cada modo de coleta e reporta usuários/s, requisições (contadas no
+servidor), respostas 429/500, tempo de parede e rendimento (usuários úteis
+por requisição):
+
+- bfs, mutual, public: SteamUserMiner em um processo, com cada política de
+  fronteira (frontier_policy.py)
+- parallel: parallel_crawl com N processos (uma API key cada) sobre a
+  fronteira SQLite compartilhada
+- compact: BFS em um processo com registros compactos gravados direto em
+  JSONL (compact_records.py)
+
+Uso:
+    python benchmark_crawl.py --users 5000 --target 500 --latency 0.02 \\
+        --error-rate 0.01 --rate-limit 50 --workers 4
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import json_codec
+from compact_records import iter_users
+from frontier_policy import make_policy
+from mock_steam_api import MockSteamAPI
+from parallel_crawl import merge_shards, run_crawl, shard_paths
+from steam_user_miner import SteamUserMiner
+from synthetic_data import generate_users
+
+PUBLIC_VISIBILITY = 3
+
+
+def _useful_users(users: List[Dict]) -> int:
+    """Usuários com perfil público e jogos (contribuem para a similaridade)."""
+    return sum(1 for user in users
+               if user['profile_info'].get('communityvisibilitystate') == PUBLIC_VISIBILITY
+               and user['owned_games'].get('games'))
+
+
+def run_single(policy: str, seeds: List[str], args: argparse.Namespace, workdir: str) -> List[Dict]:
+    """Coleta com um único SteamUserMiner."""
+    miner = SteamUserMiner('benchmark-key', seeds, policy=make_policy(policy, args.degree_cap))
+    miner.target_users = args.target
+    miner.request_delay = args.request_delay
+    miner.retry_delay = args.retry_delay
+    miner.show_progress = False
+    miner.mine_users(os.path.join(workdir, f'{policy}.json'))
+    return miner.users_data
+
+
+def run_compact(seeds: List[str], args: argparse.Namespace, workdir: str) -> List[Dict]:
+    """Coleta BFS em um processo com registros compactos gravados em JSONL."""
+    output = os.path.join(workdir, 'compact.jsonl')
+    miner = SteamUserMiner('benchmark-key', seeds, compact=True)
+    miner.target_users = args.target
+    miner.request_delay = args.request_delay
+    miner.retry_delay = args.retry_delay
+    miner.show_progress = False
+    miner.mine_users(output)
+    return list(iter_users(output))
+
+
+def run_parallel(seeds: List[str], args: argparse.Namespace, workdir: str) -> List[Dict]:
+    """Coleta com parallel_crawl (um processo por API key)."""
+    shard_dir = os.path.join(workdir, 'shards')
+    output = os.path.join(workdir, 'parallel.json')
+    api_keys = [f'benchmark-key-{index}' for index in range(args.workers)]
+    run_crawl(api_keys, seeds, args.workers, args.target,
+              'sqlite:' + os.path.join(workdir, 'frontier.db'), shard_dir,
+              args.request_delay, args.policy, args.degree_cap, args.retry_delay)
+    merge_shards(shard_paths(shard_dir), output)
+    return json_codec.load(output)
+
+
+def main():
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark de coleta contra o mock da Steam Web API")
+    parser.add_argument('--users', type=int, default=5000, help="Usuários do grafo sintético")
+    parser.add_argument('--private-fraction', type=float, default=0.2, help="Fração de perfis privados")
+    parser.add_argument('--target', type=int, default=300, help="Usuários a coletar em cada modo")
+    parser.add_argument('--seeds', type=int, default=2, help="Número de SteamIDs iniciais")
+    parser.add_argument('--modes', nargs='+', default=['bfs', 'mutual', 'public', 'parallel'],
+                        choices=['bfs', 'mutual', 'public', 'parallel', 'compact'], help="Modos de coleta")
+    parser.add_argument('--workers', type=int, default=4, help="Processos do modo parallel")
+    parser.add_argument('--policy', default='bfs', help="Política do modo parallel")
+    parser.add_argument('--degree-cap', type=int, help="Limite de grau das políticas")
+    parser.add_argument('--latency', type=float, default=0.02, help="Latência do mock (s)")
+    parser.add_argument('--jitter', type=float, default=0.01, help="Latência aleatória adicional (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de respostas 500")
+    parser.add_argument('--rate-limit', type=float, help="Requisições/s por API key no mock")
+    parser.add_argument('--request-delay', type=float, default=0.0, help="Delay do minerador entre requisições (s)")
+    parser.add_argument('--retry-delay', type=float, default=0.05,
+                        help="Espera do minerador antes de uma retentativa (s; 1.0 em produção)")
+    args = parser.parse_args()
+
+    # O minerador registra cada usuário em INFO (e configura o logging ao ser importado)
+    logging.getLogger().setLevel(logging.ERROR)
+
+    users = generate_users(args.users, private_fraction=args.private_fraction)
+    step = max(1, args.users // args.seeds)
+    seeds = [users[index]['steam_id'] for index in range(0, args.users, step)][:args.seeds]
+
+    print(f"Grafo: {args.users} usuários | meta: {args.target} por modo | latência: "
+          f"{args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms | erros: {args.error_rate:.1%} | "
+          f"limite: {args.rate_limit or '-'} req/s por key")
+    print(f"{'modo':<12} {'usuários':>9} {'tempo (s)':>10} {'usuários/s':>11} {'requisições':>12} "
+          f"{'429':>6} {'500':>6} {'úteis/req':>10}")
+
+    with MockSteamAPI(users, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      rate_limit=args.rate_limit) as api:
+        os.environ['STEAM_API_BASE_URL'] = api.url
+
+        for mode in args.modes:
+            api.reset_stats()
+            with tempfile.TemporaryDirectory() as workdir:
+                start = time.perf_counter()
+                if mode == 'parallel':
+                    collected = run_parallel(seeds, args, workdir)
+                elif mode == 'compact':
+                    collected = run_compact(seeds, args, workdir)
+                else:
+                    collected = run_single(mode, seeds, args, workdir)
+                elapsed = time.perf_counter() - start
+
+            stats = api.stats()
+            requests = stats.get('requests', 0)
+            label = f"{mode}-{args.workers}" if mode == 'parallel' else mode
+            print(f"{label:<12} {len(collected):>9} {elapsed:>10.2f} {len(collected) / elapsed:>11.1f} "
+                  f"{requests:>12} {stats.get('429', 0):>6} {stats.get('500', 0):>6} "
+                  f"{_useful_users(collected) / max(requests, 1):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
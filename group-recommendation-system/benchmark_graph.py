@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Métricas de Grafo
+
+Compara o caminho NetworkX de analyze_graph_metrics (is_connected,
+number_connected_components, connected_components, average_clustering) com a
+varredura única sobre o grafo CSR (FriendshipGraph.summary) em datasets
+sintéticos, conferindo que os resultados coincidem.
+
+Também mede o Louvain nativo (louvain.py) em um grafo com ~100k arestas,
+comparando tempo e modularidade com o louvain_communities do NetworkX.
+
+Uso:
+    python benchmark_graph.py --users 1000 10000 50000 --louvain-edges 100000
+"""
+
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+
+from friendship_graph import FriendshipGraph
+from louvain import louvain_levels, modularity
+from synthetic_data import generate_users
+
+
+def _timed(function, *args, repeat: int = 1):
+    """Executa a função `repeat` vezes e retorna (resultado, melhor tempo)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def networkx_metrics(G: nx.Graph) -> dict:
+    """Componentes e clustering pelo caminho NetworkX atual."""
+    largest = max(nx.connected_components(G), key=len)
+    return {
+        'is_connected': nx.is_connected(G),
+        'connected_components': nx.number_connected_components(G),
+        'largest_component_size': len(largest),
+        'avg_clustering': nx.average_clustering(G)
+    }
+
+
+def csr_metrics(graph: FriendshipGraph) -> dict:
+    """Componentes e clustering pela varredura única no CSR."""
+    summary = graph.summary()
+    return {
+        'is_connected': summary['is_connected'],
+        'connected_components': summary['connected_components'],
+        'largest_component_size': summary['component_sizes'][0],
+        'avg_clustering': summary['avg_clustering']
+    }
+
+
+def benchmark_metrics(num_users: int, repeat: int):
+    """Executa o benchmark para um tamanho de dataset."""
+    users = generate_users(num_users, num_games=50, avg_games=5)
+
+    graph, build_time = _timed(FriendshipGraph.from_users, users)
+    G, nx_build_time = _timed(graph.to_networkx)
+
+    expected, nx_time = _timed(networkx_metrics, G, repeat=repeat)
+    actual, csr_time = _timed(csr_metrics, graph, repeat=repeat)
+
+    matches = (expected['connected_components'] == actual['connected_components'] and
+               expected['largest_component_size'] == actual['largest_component_size'] and
+               abs(expected['avg_clustering'] - actual['avg_clustering']) < 1e-9)
+
+    print(f"{num_users:>8} usuários | {graph.num_edges:>8} arestas | "
+          f"CSR build {build_time * 1000:8.1f} ms | nx build {nx_build_time * 1000:8.1f} ms | "
+          f"NetworkX {nx_time * 1000:9.1f} ms | CSR {csr_time * 1000:8.1f} ms | "
+          f"{nx_time / csr_time:6.1f}x | {'OK' if matches else 'DIVERGENTE'}")
+
+
+def benchmark_louvain(target_edges: int, seed: int):
+    """Mede o Louvain nativo em um grafo sintético com ~target_edges arestas."""
+    # O gerador produz ~3.7 arestas não direcionadas por usuário
+    users = generate_users(max(10, int(target_edges / 3.7)), num_games=50, avg_games=5)
+    graph = FriendshipGraph.from_users(users)
+    weights = np.ones(len(graph.indices))
+
+    levels, native_time = _timed(louvain_levels, graph.indptr, graph.indices, weights, 1.0, seed)
+    labels = levels[-1]
+    native_q = modularity(graph.indptr, graph.indices, weights, labels)
+
+    print(f"Grafo: {graph.num_nodes} nós, {graph.num_edges} arestas")
+    print(f"  Louvain nativo  : {native_time:7.2f} s | {len(set(labels.tolist())):5d} comunidades | "
+          f"{len(levels)} níveis | Q = {native_q:.4f}")
+
+    # Determinismo: mesma seed, mesma partição
+    again = louvain_levels(graph.indptr, graph.indices, weights, 1.0, seed)[-1]
+    print(f"  Determinístico  : {'sim' if np.array_equal(labels, again) else 'NÃO'}")
+
+    G = graph.to_networkx()
+    communities, nx_time = _timed(nx.community.louvain_communities, G, 'weight', 1.0, 1e-07, None, seed)
+    print(f"  NetworkX        : {nx_time:7.2f} s | {len(communities):5d} comunidades | "
+          f"Q = {nx.community.modularity(G, communities):.4f}")
+
+
+def main():
+    """Executa os benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark de métricas de grafo")
+    parser.add_argument('--users', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help="Tamanhos de dataset")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições (melhor tempo)")
+    parser.add_argument('--louvain-edges', type=int, default=100000,
+                        help="Arestas do grafo do benchmark de Louvain (0 = pular)")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do Louvain")
+    args = parser.parse_args()
+
+    print("=== Componentes + clustering: NetworkX vs varredura CSR ===")
+    for num_users in args.users:
+        benchmark_metrics(num_users, args.repeat)
+
+    if args.louvain_edges:
+        print()
+        print("=== Louvain: nativo vs NetworkX ===")
+        benchmark_louvain(args.louvain_edges, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark de JSON
+
+Mede a vazão de leitura e escrita de um dataset sintético (formato do
+steam_user_data.json) em cada backend instalado de json_codec.py, com e sem
+indentação, e a decodificação direta em structs tipados (msgspec).
+
+Uso:
+    python benchmark_json.py --users 20000 --repeat 3
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import json_codec
+from synthetic_data import generate_users
+
+
+def _timed(function, *args, repeat: int = 1):
+    """Executa a função `repeat` vezes e retorna (resultado, melhor tempo)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark dos backends JSON")
+    parser.add_argument('--users', type=int, default=20000, help="Usuários do dataset sintético")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições (melhor tempo)")
+    args = parser.parse_args()
+
+    users = generate_users(args.users)
+    print(f"Dataset: {args.users} usuários | backends: {', '.join(json_codec.available_backends())}")
+    print(f"{'backend':<10} {'MB':>7} {'dump (MB/s)':>12} {'dump indent':>12} {'load (MB/s)':>12}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'users.json')
+
+        for backend in json_codec.available_backends():
+            data, dump_time = _timed(json_codec.dumps, users, False, backend, repeat=args.repeat)
+            indented, indent_time = _timed(json_codec.dumps, users, True, backend, repeat=args.repeat)
+            decoded, load_time = _timed(json_codec.loads, data, backend, repeat=args.repeat)
+            assert decoded == users
+
+            size = len(data) / 1e6
+            print(f"{backend:<10} {size:>7.1f} {size / dump_time:>12.1f} "
+                  f"{len(indented) / 1e6 / indent_time:>12.1f} {size / load_time:>12.1f}")
+
+        if json_codec.msgspec is not None:
+            json_codec.dump(users, path)
+            size = os.path.getsize(path) / 1e6
+            records, typed_time = _timed(json_codec.load_user_records, path, repeat=args.repeat)
+            assert len(records) == len(users)
+            print(f"{'structs':<10} {size:>7.1f} {'-':>12} {'-':>12} {size / typed_time:>12.1f}"
+                  f"  (msgspec → UserRecord)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos kernels de similaridade
+
+Compara, sobre um dataset sintético, o caminho em dicionários do analisador
+com os kernels de similarity_kernels.py (compilados com Numba e
+interpretados):
+
+- tempo da matriz de similaridade e do clustering por limiar em cada caminho
+- tempo por par de calculate_user_similarity e dos kernels
+- se as similaridades e os clusters são idênticos bit a bit
+
+As duas execuções de clustering rodam no mesmo processo: a ordem dos sets
+de usuários (e portanto os clusters) depende da semente de hash do Python.
+
+Uso:
+    python benchmark_kernels.py --users 1000 --clusters 6
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import json_codec
+import similarity_kernels
+from steam_graph_analyzer import SteamGraphAnalyzer
+from synthetic_data import generate_users
+
+
+def _matrix(analyzer: SteamGraphAnalyzer) -> np.ndarray:
+    """Matriz de similaridade densa, na ordem do dataset."""
+    steam_ids = [user['steam_id'] for user in analyzer.users_data]
+    return np.array([[analyzer.user_similarity_matrix[u][v] for v in steam_ids] for u in steam_ids])
+
+
+def _identical(a: np.ndarray, b: np.ndarray) -> bool:
+    """Igualdade bit a bit de dois arrays float64."""
+    return a.shape == b.shape and np.array_equal(a.view(np.int64), b.view(np.int64))
+
+
+def _run(analyzer: SteamGraphAnalyzer, enabled: bool, num_clusters: int) -> Dict:
+    """Similaridade e clusters com os kernels ativados ou não."""
+    similarity_kernels.ENABLED = enabled
+    start = time.perf_counter()
+    analyzer.create_similarity_matrix()
+    similarity_seconds = time.perf_counter() - start
+    matrix = _matrix(analyzer)
+
+    start = time.perf_counter()
+    analyzer.cluster_users(num_clusters)
+    return {
+        'similarity_seconds': similarity_seconds,
+        'clustering_seconds': time.perf_counter() - start,
+        'matrix': matrix,
+        'clusters': [cluster['users'] for cluster in analyzer.clusters]
+    }
+
+
+def _pair_seconds(pairs: List, function) -> float:
+    """Tempo médio por par."""
+    start = time.perf_counter()
+    for i, j in pairs:
+        function(i, j)
+    return (time.perf_counter() - start) / len(pairs)
+
+
+def main():
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description="Velocidade e exatidão dos kernels de similaridade")
+    parser.add_argument('--users', type=int, default=1000, help="Usuários do dataset sintético")
+    parser.add_argument('--clusters', type=int, default=6, help="Número de clusters")
+    parser.add_argument('--pairs', type=int, default=20000, help="Pares amostrados na comparação por par")
+    args = parser.parse_args()
+
+    compiled = similarity_kernels.numba is not None
+    print(f"Dataset: {args.users} usuários | Numba: "
+          f"{similarity_kernels.numba.__version__ if compiled else 'não instalado (kernels interpretados)'}")
+
+    users = generate_users(args.users)
+    with tempfile.TemporaryDirectory() as workdir:
+        data_file = os.path.join(workdir, 'users.json')
+        json_codec.dump(users, data_file)
+        analyzer = SteamGraphAnalyzer(data_file)
+        analyzer.load_data()
+
+    arrays = similarity_kernels.UserArrays(analyzer.users_data).arrays()
+    kernel = similarity_kernels.pair_similarity
+    interpreted = getattr(kernel, 'py_func', kernel)
+
+    # Compilação (ou leitura do cache em disco) na primeira chamada
+    start = time.perf_counter()
+    similarity_kernels.similarity_block(*arrays, 0, 1)
+    similarity_kernels.count_above(np.zeros((1, 1)), np.zeros(1, dtype=np.int64), 0.3)
+    similarity_kernels.grow_cluster(np.zeros((1, 1)), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), 0.3)
+    print(f"Compilação/carga dos kernels: {time.perf_counter() - start:.2f}s")
+
+    # Por par: dicionários, kernel interpretado e kernel compilado
+    rng = np.random.default_rng(0)
+    pairs = rng.integers(0, len(analyzer.users_data), size=(args.pairs, 2)).tolist()
+    users_data = analyzer.users_data
+    dict_values = np.array([analyzer.calculate_user_similarity(users_data[i], users_data[j]) if i != j else 1.0
+                            for i, j in pairs])
+    kernel_values = np.array([kernel(*arrays, i, j) if i != j else 1.0 for i, j in pairs])
+    interpreted_values = np.array([interpreted(*arrays, i, j) if i != j else 1.0 for i, j in pairs])
+
+    print(f"{'por par':<26} {'µs/par':>9} {'idêntico':>9}")
+    timings = [
+        ('calculate_user_similarity', _pair_seconds(pairs, lambda i, j: analyzer.calculate_user_similarity(
+            users_data[i], users_data[j])), True),
+        ('kernel interpretado', _pair_seconds(pairs, lambda i, j: interpreted(*arrays, i, j)),
+         _identical(interpreted_values, dict_values)),
+    ]
+    if compiled:
+        timings.append(('kernel compilado', _pair_seconds(pairs, lambda i, j: kernel(*arrays, i, j)),
+                        _identical(kernel_values, dict_values)))
+    for name, seconds, identical in timings:
+        print(f"{name:<26} {seconds * 1e6:>9.2f} {'sim' if identical else 'NÃO':>9}")
+
+    if not compiled:
+        return
+
+    reference = _run(analyzer, False, args.clusters)
+    result = _run(analyzer, True, args.clusters)
+    similarity_kernels.ENABLED = True
+
+    print(f"{'etapa':<26} {'dict (s)':>9} {'kernels (s)':>12} {'speedup':>8} {'idêntico':>9}")
+    for name, key, identical in (
+            ('matriz de similaridade', 'similarity_seconds', _identical(reference['matrix'], result['matrix'])),
+            ('clustering (limiar)', 'clustering_seconds', reference['clusters'] == result['clusters'])):
+        print(f"{name:<26} {reference[key]:>9.2f} {result[key]:>12.2f} "
+              f"{reference[key] / max(result[key], 1e-9):>7.1f}x {'sim' if identical else 'NÃO':>9}")
+
+
+if __name__ == "__main__":
+    main()
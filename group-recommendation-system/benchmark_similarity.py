@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark das codificações da similaridade
+
+Compara a matriz de similaridade em cada codificação de similarity_store.py
+com a referência em float64 (idêntica ao dicionário de dicionários) sobre um
+dataset sintético:
+
+- memória por par e total (e a estimativa do dicionário de dicionários)
+- erro absoluto máximo e médio dos valores
+- pares cuja decisão de limiar (> 0.3, usado no clustering) muda
+- concordância dos clusters (limiar e Louvain) com a referência, pelo
+  Adjusted Rand Index (1 = mesmos grupos)
+- sobreposição do top-10 das recomendações de cada cluster da referência
+
+Uso:
+    python benchmark_similarity.py --users 2000 --clusters 6
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+import json_codec
+from steam_graph_analyzer import SteamGraphAnalyzer
+from synthetic_data import generate_users
+
+# Limiar de similaridade do clustering (cluster_users e cluster_users_louvain)
+THRESHOLD = 0.3
+
+
+def adjusted_rand_index(labels_a: np.ndarray, labels_b: np.ndarray) -> float:
+    """Adjusted Rand Index entre duas partições (rótulos por usuário)."""
+    _, a = np.unique(labels_a, return_inverse=True)
+    _, b = np.unique(labels_b, return_inverse=True)
+    table = np.zeros((a.max() + 1, b.max() + 1))
+    np.add.at(table, (a, b), 1)
+
+    def pairs(counts):
+        return float((counts * (counts - 1) / 2).sum())
+
+    total = pairs(np.array([len(a)]))
+    index, rows, columns = pairs(table), pairs(table.sum(axis=1)), pairs(table.sum(axis=0))
+    expected = rows * columns / total if total else 0.0
+    maximum = (rows + columns) / 2
+    return 1.0 if maximum == expected else (index - expected) / (maximum - expected)
+
+
+def _labels(analyzer: SteamGraphAnalyzer) -> np.ndarray:
+    """Cluster de cada usuário, na ordem do dataset."""
+    cluster_of = {user_id: cluster['id'] for cluster in analyzer.clusters for user_id in cluster['users']}
+    return np.array([cluster_of[user['steam_id']] for user in analyzer.users_data])
+
+
+def _run(data_file: str, encoding: str, num_clusters: int) -> Dict:
+    """Similaridade, clusters e recomendações de uma codificação."""
+    analyzer = SteamGraphAnalyzer(data_file)
+    analyzer.load_data()
+    start = time.perf_counter()
+    analyzer.create_similarity_matrix(encoding)
+    elapsed = time.perf_counter() - start
+
+    analyzer.cluster_users(num_clusters, THRESHOLD)
+    threshold_labels = _labels(analyzer)
+    analyzer.cluster_users_louvain(num_clusters, THRESHOLD)
+    louvain_labels = _labels(analyzer)
+
+    return {
+        'analyzer': analyzer,
+        'seconds': elapsed,
+        'threshold_labels': threshold_labels,
+        'louvain_labels': louvain_labels
+    }
+
+
+def _dict_bytes_per_pair(users: List[Dict]) -> float:
+    """Memória por par do dicionário de dicionários (medida em uma amostra)."""
+    sample = users[:300]
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'sample.json')
+        json_codec.dump(sample, path)
+        analyzer = SteamGraphAnalyzer(path)
+        analyzer.load_data()
+        tracemalloc.start()
+        analyzer.create_similarity_matrix()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return size / len(sample) ** 2
+
+
+def main():
+    """Executa o benchmark."""
+    parser = argparse.ArgumentParser(description="Memória e precisão das codificações da similaridade")
+    parser.add_argument('--users', type=int, default=2000, help="Usuários do dataset sintético")
+    parser.add_argument('--clusters', type=int, default=6, help="Número de clusters")
+    args = parser.parse_args()
+
+    users = generate_users(args.users)
+    with tempfile.TemporaryDirectory() as workdir:
+        data_file = os.path.join(workdir, 'users.json')
+        json_codec.dump(users, data_file)
+
+        reference = _run(data_file, 'float64', args.clusters)
+        exact = reference['analyzer'].user_similarity_matrix.data
+        reference_analyzer = reference['analyzer']
+
+        dict_bytes = _dict_bytes_per_pair(users)
+        print(f"Dataset: {args.users} usuários | {args.clusters} clusters | limiar {THRESHOLD}")
+        print(f"dict de dicts: ~{dict_bytes:.0f} bytes/par ({dict_bytes * args.users ** 2 / 1e6:.0f} MB estimados)")
+        print(f"{'codificação':<12} {'B/par':>6} {'MB':>8} {'tempo (s)':>10} {'erro máx':>9} {'erro médio':>11} "
+              f"{'pares ≠ limiar':>15} {'ARI limiar':>11} {'ARI Louvain':>12} {'top-10':>7}")
+
+        for encoding in ('float64', 'float32', 'uint8'):
+            result = reference if encoding == 'float64' else _run(data_file, encoding, args.clusters)
+            store = result['analyzer'].user_similarity_matrix
+            values = store.data / 255.0 if store.quantized else store.data.astype(np.float64)
+            error = np.abs(values - exact)
+            flipped = np.count_nonzero((values > THRESHOLD) != (exact > THRESHOLD))
+
+            # Recomendações de cada cluster da referência nas duas matrizes
+            overlaps = []
+            for cluster in reference_analyzer.clusters:
+                expected = {game['appid'] for game in reference_analyzer.recommend_for_group(cluster['users'], 10)}
+                found = {game['appid'] for game in result['analyzer'].recommend_for_group(cluster['users'], 10)}
+                overlaps.append(len(expected & found) / max(len(expected), 1))
+
+            print(f"{encoding:<12} {store.data.itemsize:>6} {store.nbytes / 1e6:>8.1f} {result['seconds']:>10.2f} "
+                  f"{error.max():>9.5f} {error.mean():>11.6f} {flipped:>15} "
+                  f"{adjusted_rand_index(reference['threshold_labels'], result['threshold_labels']):>11.3f} "
+                  f"{adjusted_rand_index(reference['louvain_labels'], result['louvain_labels']):>12.3f} "
+                  f"{np.mean(overlaps):>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
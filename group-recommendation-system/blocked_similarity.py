@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Blocked Similarity
+
+Cálculo em blocos da similaridade entre usuários (a mesma de
+SteamGraphAnalyzer.calculate_user_similarity), com memória limitada, para
+datasets cuja matriz n × n não cabe na RAM:
+
+- os usuários são divididos em blocos de linhas dimensionados por um
+  orçamento de memória (cada linha custa n células de trabalho mais as posses
+  dos donos dos seus jogos)
+- cada bloco é calculado vetorizado em NumPy contra todos os usuários:
+  interseções e similaridade de tempo de jogo por contagem nas listas de donos
+  de cada jogo, país e amizade por comparação direta
+- do bloco só ficam os pares acima do limiar e, por linha, os top-k; o
+  resultado parcial é gravado em arquivos .npy
+- no fim, os blocos são combinados em uma matriz CSR em disco (memmap)
+
+SparseSimilarity expõe a matriz em disco com a mesma interface de dicionário
+de dicionários de user_similarity_matrix (pares podados valem 0). Os valores
+são gravados em float32 ou quantizados em 8 bits (similarity_store.py).
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import logging
+import os
+import shutil
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from als_recommender import csr_gather, transpose_csr
+from friendship_graph import INCOMING, OUTGOING, FriendshipGraph
+from similarity_store import SimilarityRow, SimilarityStore, decode, encode
+
+logger = logging.getLogger(__name__)
+
+# Bytes de trabalho estimados por célula (linha × usuário) e por posse visitada
+CELL_BYTES = 64
+ENTRY_BYTES = 64
+
+# Intervalo mínimo (s) entre mensagens de progresso
+PROGRESS_INTERVAL = 5.0
+
+
+class UserFeatures:
+    """Usuários em arrays: jogos e tempo de jogo (CSR e transposta), país e amigos listados."""
+
+    def __init__(self, users_data: List[Dict], graph: Optional[FriendshipGraph] = None):
+        """
+        Args:
+            users_data: Lista de usuários do steam_user_miner
+            graph: Grafo de amizades do dataset (construído se omitido)
+        """
+        self.steam_ids = [user['steam_id'] for user in users_data]
+        self.num_users = len(users_data)
+
+        game_index: Dict[str, int] = {}
+        indptr = np.zeros(self.num_users + 1, dtype=np.int64)
+        indices, playtime = [], []
+        for row, user in enumerate(users_data):
+            # Como em calculate_user_similarity: um tempo por appid (o último)
+            games = {str(game['appid']): game.get('playtime_forever', 0)
+                     for game in user.get('owned_games', {}).get('games', [])}
+            for app_id, minutes in games.items():
+                indices.append(game_index.setdefault(app_id, len(game_index)))
+                playtime.append(minutes)
+            indptr[row + 1] = len(indices)
+
+        self.indptr = indptr
+        self.indices = np.array(indices, dtype=np.int64)
+        self.playtime = np.array(playtime, dtype=np.float64)
+        self.game_count = np.diff(indptr)
+        self.t_indptr, self.t_indices, self.t_playtime = transpose_csr(
+            indptr, self.indices, self.playtime, len(game_index))
+        owner_count = np.diff(self.t_indptr)
+
+        # Posses visitadas por linha: soma dos donos de cada jogo do usuário
+        visited = np.concatenate([[0], np.cumsum(owner_count[self.indices])])
+        self.row_entries = visited[indptr[1:]] - visited[indptr[:-1]]
+
+        countries: Dict[str, int] = {}
+        self.country = np.array([
+            countries.setdefault(code, len(countries)) if code else -1
+            for code in (user.get('profile_info', {}).get('loccountrycode', '') for user in users_data)
+        ], dtype=np.int64)
+
+        # Amigos listados pelo usuário (OUTGOING) e quem lista o usuário (INCOMING)
+        graph = graph or FriendshipGraph.from_users(users_data)
+        rows = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+        self.friends = {}
+        for flag in (OUTGOING, INCOMING):
+            mask = (graph.flags & flag) > 0
+            friend_indptr = np.zeros(self.num_users + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows[mask], minlength=self.num_users), out=friend_indptr[1:])
+            self.friends[flag] = (friend_indptr, graph.indices[mask])
+
+    def save(self, path: str):
+        """Salva os arrays em .npz (para outros processos, ex. distributed_analysis.py)."""
+        np.savez(path, steam_ids=np.array(self.steam_ids), indptr=self.indptr, indices=self.indices,
+                 playtime=self.playtime, t_indptr=self.t_indptr, t_indices=self.t_indices,
+                 t_playtime=self.t_playtime, row_entries=self.row_entries, country=self.country,
+                 outgoing_indptr=self.friends[OUTGOING][0], outgoing_indices=self.friends[OUTGOING][1],
+                 incoming_indptr=self.friends[INCOMING][0], incoming_indices=self.friends[INCOMING][1])
+
+    @classmethod
+    def load(cls, path: str) -> 'UserFeatures':
+        """Carrega arrays salvos por save."""
+        features = cls.__new__(cls)
+        with np.load(path, allow_pickle=False) as data:
+            features.steam_ids = data['steam_ids'].tolist()
+            for name in ('indptr', 'indices', 'playtime', 't_indptr', 't_indices', 't_playtime',
+                         'row_entries', 'country'):
+                setattr(features, name, data[name])
+            features.friends = {OUTGOING: (data['outgoing_indptr'], data['outgoing_indices']),
+                                INCOMING: (data['incoming_indptr'], data['incoming_indices'])}
+        features.num_users = len(features.steam_ids)
+        features.game_count = np.diff(features.indptr)
+        return features
+
+    def row_bytes(self) -> np.ndarray:
+        """Memória de trabalho estimada para calcular cada linha."""
+        return self.num_users * CELL_BYTES + self.row_entries * ENTRY_BYTES
+
+    def block(self, start: int, stop: int, incoming: bool = False) -> np.ndarray:
+        """
+        Similaridade das linhas [start, stop) com todos os usuários (matriz
+        densa (stop - start) × n), com os mesmos pesos de
+        calculate_user_similarity.
+        """
+        return self.block_rows(np.arange(start, stop), incoming)
+
+    def block_rows(self, rows: np.ndarray, incoming: bool = False) -> np.ndarray:
+        """
+        Similaridade dos usuários `rows` (posições) com todos os usuários.
+
+        Args:
+            rows: Posições das linhas
+            incoming: Se True, o sentido oposto: a linha i traz a similaridade
+                de cada usuário com rows[i] (a coluna da matriz). Só o termo
+                de amizade muda (quem lista rows[i], em vez de quem rows[i] lista)
+        """
+        n = self.num_users
+        rows = np.asarray(rows, dtype=np.int64)
+        size = len(rows)
+        cells = size * n
+
+        # Para cada jogo das linhas do bloco, todos os donos do jogo
+        entries = csr_gather(self.indptr, rows)
+        games = self.indices[entries]
+        owners = csr_gather(self.t_indptr, games)
+        repeats = self.t_indptr[games + 1] - self.t_indptr[games]
+        local = np.repeat(np.repeat(np.arange(size), self.game_count[rows]), repeats)
+        cell = local * n + self.t_indices[owners]
+
+        common = np.bincount(cell, minlength=cells).reshape(size, n).astype(np.float64)
+        union = self.game_count[rows, None] + self.game_count[None, :] - common
+        similarity = 0.4 * np.divide(common, union, out=np.zeros((size, n)), where=union > 0)
+
+        # Tempo de jogo nos jogos em comum (só pares com tempo total > 0)
+        own_time = np.repeat(self.playtime[entries], repeats)
+        other_time = self.t_playtime[owners]
+        total = own_time + other_time
+        valid = total > 0
+        time_sum = np.bincount(cell[valid], weights=1 - np.abs(own_time[valid] - other_time[valid]) / total[valid],
+                               minlength=cells).reshape(size, n)
+        time_count = np.bincount(cell[valid], minlength=cells).reshape(size, n)
+        similarity += 0.2 * np.divide(time_sum, time_count, out=np.zeros((size, n)), where=time_count > 0)
+
+        country = self.country[rows, None]
+        similarity += 0.15 * ((country == self.country[None, :]) & (country >= 0))
+
+        friend_indptr, friend_indices = self.friends[INCOMING if incoming else OUTGOING]
+        friends = csr_gather(friend_indptr, rows)
+        friend_rows = np.repeat(np.arange(size), friend_indptr[rows + 1] - friend_indptr[rows])
+        similarity[friend_rows, friend_indices[friends]] += 0.25
+
+        np.minimum(similarity, 1.0, out=similarity)
+        similarity[np.arange(size), rows] = 1.0
+        return similarity
+
+    def pair(self, i: int, j: int) -> float:
+        """Similaridade de um único par (i → j), sem montar a linha inteira."""
+        if i == j:
+            return 1.0
+        lo_i, hi_i = self.indptr[i], self.indptr[i + 1]
+        lo_j, hi_j = self.indptr[j], self.indptr[j + 1]
+        common, own, other = np.intersect1d(self.indices[lo_i:hi_i], self.indices[lo_j:hi_j],
+                                            assume_unique=True, return_indices=True)
+        similarity = 0.0
+
+        union = (hi_i - lo_i) + (hi_j - lo_j) - len(common)
+        if union:
+            similarity += 0.4 * (len(common) / union)
+            own_time = self.playtime[lo_i + own]
+            other_time = self.playtime[lo_j + other]
+            total = own_time + other_time
+            valid = total > 0
+            if valid.any():
+                time_similarity = 1 - np.abs(own_time[valid] - other_time[valid]) / total[valid]
+                similarity += 0.2 * (float(time_similarity.sum()) / int(valid.sum()))
+
+        if self.country[i] >= 0 and self.country[i] == self.country[j]:
+            similarity += 0.15
+
+        friend_indptr, friend_indices = self.friends[OUTGOING]
+        if (friend_indices[friend_indptr[i]:friend_indptr[i + 1]] == j).any():
+            similarity += 0.25
+
+        return min(similarity, 1.0)
+
+
+def prune_block(similarity: np.ndarray, start: int, top_k: Optional[int], threshold: float,
+                encoding: str = 'float32') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pares mantidos de um bloco: acima do limiar e, por linha, os top-k (a
+    diagonal não é guardada).
+
+    Returns:
+        Tupla (pares por linha, colunas, valores codificados em `encoding`),
+        cada linha em ordem decrescente de similaridade
+    """
+    size = len(similarity)
+    masked = np.where(similarity > threshold, similarity, -np.inf)
+    masked[np.arange(size), np.arange(start, start + size)] = -np.inf
+
+    if top_k is not None and top_k < masked.shape[1]:
+        columns = np.argpartition(-masked, top_k - 1, axis=1)[:, :top_k]
+    else:
+        columns = np.broadcast_to(np.arange(masked.shape[1]), masked.shape)
+    values = np.take_along_axis(masked, columns, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    columns = np.take_along_axis(columns, order, axis=1)
+    values = np.take_along_axis(values, order, axis=1)
+
+    keep = np.isfinite(values)
+    return keep.sum(axis=1), columns[keep].astype(np.int32), encode(values[keep], encoding)
+
+
+def block_ranges(features: UserFeatures, memory_budget_mb: float, start: int = 0,
+                 stop: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Divide as linhas [start, stop) em blocos cujo custo estimado (row_bytes)
+    cabe no orçamento (no mínimo uma linha por bloco).
+    """
+    stop = features.num_users if stop is None else stop
+    budget = memory_budget_mb * 1024 * 1024
+    cost = np.concatenate([[0], np.cumsum(features.row_bytes())])
+    ranges = []
+    while start < stop:
+        end = max(int(np.searchsorted(cost, cost[start] + budget, side='right')) - 1, start + 1)
+        ranges.append((start, min(end, stop)))
+        start = ranges[-1][1]
+    return ranges
+
+
+def write_tile(features: UserFeatures, prefix: str, start: int, stop: int, top_k: Optional[int],
+               threshold: float, encoding: str):
+    """Calcula e poda as linhas [start, stop), gravando <prefix>_{counts,indices,values}.npy."""
+    counts, columns, values = prune_block(features.block(start, stop), start, top_k, threshold, encoding)
+    np.save(f'{prefix}_counts.npy', counts)
+    np.save(f'{prefix}_indices.npy', columns)
+    np.save(f'{prefix}_values.npy', values)
+
+
+def compute_blocked(features: UserFeatures, output_dir: str, memory_budget_mb: float = 512,
+                    top_k: Optional[int] = 50, threshold: float = 0.0, encoding: str = 'float32',
+                    progress: Optional[Callable[[int, int, float], None]] = None) -> None:
+    """
+    Calcula a matriz podada em blocos e grava o CSR em output_dir
+    (similarity_indptr.npy, similarity_indices.npy, similarity_values.npy).
+
+    Args:
+        features: Usuários em arrays (UserFeatures)
+        output_dir: Diretório do resultado (e dos blocos parciais)
+        memory_budget_mb: Memória de trabalho por bloco
+        top_k: Pares mantidos por linha (None = todos acima do limiar)
+        threshold: Similaridade mínima (exclusiva) de um par mantido
+        encoding: Codificação dos valores ('float32' ou 'uint8')
+        progress: Chamado após cada bloco com (linhas feitas, total, ETA em s)
+    """
+    n = features.num_users
+    budget = memory_budget_mb * 1024 * 1024
+    tile_dir = os.path.join(output_dir, 'tiles')
+    os.makedirs(tile_dir, exist_ok=True)
+
+    if n and features.row_bytes().max() > budget:
+        logger.warning(f"Orçamento de {memory_budget_mb} MB menor que uma linha; usando blocos de 1 linha")
+
+    started = time.perf_counter()
+    last_report = started
+    tiles = []
+    for start, stop in block_ranges(features, memory_budget_mb):
+        prefix = os.path.join(tile_dir, f'tile_{len(tiles):05d}')
+        write_tile(features, prefix, start, stop, top_k, threshold, encoding)
+        tiles.append(prefix)
+
+        now = time.perf_counter()
+        eta = (now - started) / stop * (n - stop)
+        if progress is not None:
+            progress(stop, n, eta)
+        if now - last_report >= PROGRESS_INTERVAL or stop == n:
+            logger.info(f"Similaridade em blocos: {stop}/{n} usuários ({stop / n:.0%}), "
+                        f"{len(tiles)} blocos, ETA {eta:.0f}s")
+            last_report = now
+
+    merge_tiles(tiles, output_dir, n, encoding)
+    shutil.rmtree(tile_dir, ignore_errors=True)
+    logger.info(f"Similaridade em blocos concluída em {time.perf_counter() - started:.1f}s ({len(tiles)} blocos)")
+
+
+def merge_tiles(tiles: List[str], output_dir: str, num_users: int, encoding: str):
+    """Combina os blocos parciais em um CSR (memmap) sem carregar tudo na memória."""
+    counts = np.concatenate([np.load(f'{prefix}_counts.npy') for prefix in tiles]) if tiles else np.zeros(0)
+    indptr = np.zeros(num_users + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    np.save(os.path.join(output_dir, 'similarity_indptr.npy'), indptr)
+
+    nnz = int(indptr[-1])
+    indices = np.lib.format.open_memmap(os.path.join(output_dir, 'similarity_indices.npy'),
+                                        mode='w+', dtype=np.int32, shape=(nnz,))
+    values = np.lib.format.open_memmap(os.path.join(output_dir, 'similarity_values.npy'),
+                                       mode='w+', dtype=encode(np.zeros(0), encoding).dtype, shape=(nnz,))
+    offset = 0
+    for prefix in tiles:
+        tile_indices = np.load(f'{prefix}_indices.npy', mmap_mode='r')
+        indices[offset:offset + len(tile_indices)] = tile_indices
+        values[offset:offset + len(tile_indices)] = np.load(f'{prefix}_values.npy', mmap_mode='r')
+        offset += len(tile_indices)
+    indices.flush()
+    values.flush()
+    del indices, values
+
+
+class SparseSimilarity(SimilarityStore):
+    """Matriz de similaridade podada em CSR (memmap), com valores codificados."""
+
+    def __init__(self, steam_ids: List[str], indptr: np.ndarray, indices: np.ndarray,
+                 values: np.ndarray, params: Optional[Dict] = None, cache_rows: int = 4096):
+        """
+        Args:
+            steam_ids: SteamID de cada linha/coluna
+            indptr, indices, values: Pares mantidos de cada linha (CSR, valores
+                codificados)
+            params: Parâmetros do cálculo (para recalcular com os mesmos)
+            cache_rows: Linhas decodificadas mantidas em cache
+        """
+        super().__init__(steam_ids, params)
+        self.indptr = indptr
+        self.indices = indices
+        self.values = values
+        self._rows = lru_cache(maxsize=cache_rows)(self._build_row)
+        self._transposed = None
+
+    @classmethod
+    def open(cls, directory: str, steam_ids: List[str], params: Optional[Dict] = None) -> 'SparseSimilarity':
+        """Abre o resultado de compute_blocked (índices e valores em memmap)."""
+        return cls(steam_ids,
+                   np.load(os.path.join(directory, 'similarity_indptr.npy')),
+                   np.load(os.path.join(directory, 'similarity_indices.npy'), mmap_mode='r'),
+                   np.load(os.path.join(directory, 'similarity_values.npy'), mmap_mode='r'),
+                   params)
+
+    def row(self, position: int) -> SimilarityRow:
+        return self._rows(position)
+
+    def _build_row(self, position: int) -> SimilarityRow:
+        lo, hi = self.indptr[position], self.indptr[position + 1]
+        row = SimilarityRow(zip([self.steam_ids[i] for i in self.indices[lo:hi].tolist()],
+                                decode(self.values[lo:hi]).tolist()))
+        row[self.steam_ids[position]] = 1.0
+        return row
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.values.nbytes
+
+    @property
+    def transposed(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Colunas da matriz em CSR (transposta, em memória), montada no primeiro uso."""
+        if self._transposed is None:
+            self._transposed = transpose_csr(self.indptr, np.asarray(self.indices), np.asarray(self.values),
+                                             len(self.steam_ids))
+        return self._transposed
+
+    def block(self, rows: List[int], columns: List[int]) -> np.ndarray:
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        # Poucas colunas (ex.: um membro do cluster): lidas na transposta
+        if len(columns) < len(rows):
+            return self._gather(*self.transposed, columns, rows).T
+        return self._gather(self.indptr, self.indices, self.values, rows, columns)
+
+    def _gather(self, indptr: np.ndarray, indices: np.ndarray, values: np.ndarray,
+                lines: np.ndarray, others: np.ndarray) -> np.ndarray:
+        """Submatriz lines × others de um CSR (a matriz ou a transposta), com a diagonal em 1."""
+        slot = np.full(len(self.steam_ids), -1, dtype=np.int64)
+        slot[others] = np.arange(len(others))
+        if not np.array_equal(slot[others], np.arange(len(others))):
+            # Posições repetidas em others: calculado nas distintas
+            unique, inverse = np.unique(others, return_inverse=True)
+            return self._gather(indptr, indices, values, lines, unique)[:, inverse]
+
+        result = np.zeros((len(lines), len(others)))
+        entries = csr_gather(indptr, lines)
+        local = np.repeat(np.arange(len(lines)), indptr[lines + 1] - indptr[lines])
+        target = slot[indices[entries]]
+        keep = target >= 0
+        result[local[keep], target[keep]] = decode(values[entries[keep]])
+
+        diagonal = slot[lines]
+        hit = diagonal >= 0
+        result[np.flatnonzero(hit), diagonal[hit]] = 1.0
+        return result
+
+    @property
+    def nnz(self) -> int:
+        """Pares guardados."""
+        return int(self.indptr[-1])
+
+    def group_similarity(self, steam_ids: List[str]) -> np.ndarray:
+        """
+        Similaridade média de cada usuário com o grupo, pelas linhas dos
+        membros (pares podados valem 0).
+        """
+        result = np.zeros(len(self.steam_ids))
+        members = [self.position[steam_id] for steam_id in steam_ids]
+        for position in members:
+            lo, hi = self.indptr[position], self.indptr[position + 1]
+            np.add.at(result, self.indices[lo:hi], decode(self.values[lo:hi]))
+        np.add.at(result, members, 1.0)
+        return result / max(len(members), 1)
+
+    def edges(self, threshold: float) -> Tuple[List[int], List[int], List[float]]:
+        n = len(self.steam_ids)
+        rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.indptr))
+        columns = np.asarray(self.indices, dtype=np.int64)
+        keys = np.minimum(rows, columns) * n + np.maximum(rows, columns)
+        pairs, inverse = np.unique(keys, return_inverse=True)
+        weights = np.bincount(inverse, weights=decode(np.asarray(self.values))) / 2
+        keep = weights > threshold
+        return (list((pairs[keep] // n).tolist()), list((pairs[keep] % n).tolist()),
+                list(weights[keep].tolist()))
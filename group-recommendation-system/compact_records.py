@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Compact Records
+
+Representação compacta dos usuários coletados, para coletas grandes em que
+manter os payloads brutos da API em memória custaria gigabytes:
+
+- SteamIDs inteiros (o usuário e cada amigo) e o instante da coleta
+- jogos como dois arrays paralelos: appids e playtime_forever (minutos)
+- só os campos de perfil usados pelo analisador (PROFILE_FIELDS)
+- nomes de jogos em uma tabela global (appid → nome), gravada uma única vez
+  no arquivo, na primeira vez que o appid aparece
+
+Cada registro é gravado direto no arquivo JSONL de saída assim que o usuário é
+processado. O arquivo mistura linhas de nomes ({"names": {...}}) e linhas de
+usuários ({"id": ..., "c": ..., "p": ..., "a": ..., "t": ..., "f": ...}); iter_users
+devolve os usuários já no formato completo do steam_user_miner.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import json
+import logging
+import sys
+from typing import Dict, Iterator, List, Optional
+
+import json_codec
+
+logger = logging.getLogger(__name__)
+
+# Campos do perfil lidos pelo analisador, pela visualização, pelo serviço e
+# pela recoleta incremental (delta_crawl.py)
+PROFILE_FIELDS = ('personaname', 'loccountrycode', 'communityvisibilitystate', 'lastlogoff')
+
+
+def slim_profile(profile: Dict) -> Dict:
+    """Mantém apenas os campos de PROFILE_FIELDS presentes no perfil."""
+    return {field: profile[field] for field in PROFILE_FIELDS if field in profile}
+
+
+class GameNameTable:
+    """Tabela global appid → nome, com os nomes internados."""
+
+    def __init__(self):
+        self.names: Dict[int, str] = {}
+
+    def add(self, appid: int, name: str) -> bool:
+        """Registra um nome; retorna True se o appid ainda não era conhecido."""
+        if appid in self.names:
+            return False
+        self.names[appid] = sys.intern(name)
+        return True
+
+    def get(self, appid: int) -> str:
+        return self.names.get(appid, f'Game {appid}')
+
+
+def compact_user(steam_id: str, profile: Dict, games: List[Dict], friends: List[str],
+                 crawled_at: Optional[int] = None) -> Dict:
+    """
+    Monta o registro compacto de um usuário a partir das respostas da API.
+
+    Os nomes dos jogos não entram no registro: ficam em '_names', para o
+    CompactJsonlWriter gravá-los na tabela global.
+    """
+    return {
+        'id': int(steam_id),
+        'c': crawled_at,
+        'p': slim_profile(profile),
+        'a': [game['appid'] for game in games],
+        't': [game.get('playtime_forever', 0) for game in games],
+        'f': [int(friend_id) for friend_id in friends],
+        '_names': {game['appid']: game['name'] for game in games if 'name' in game}
+    }
+
+
+def expand_user(record: Dict, names: GameNameTable) -> Dict:
+    """Converte um registro compacto para o formato completo do steam_user_miner."""
+    games = [{'appid': appid, 'name': names.get(appid), 'playtime_forever': playtime}
+             for appid, playtime in zip(record['a'], record['t'])]
+    friends = [str(friend_id) for friend_id in record['f']]
+    steam_id = str(record['id'])
+    user = {
+        'steam_id': steam_id,
+        'profile_info': dict(record['p'], steamid=steam_id),
+        'owned_games': {'game_count': len(games), 'games': games},
+        'friends_list': {'friend_count': len(friends), 'friends': friends}
+    }
+    if record.get('c') is not None:
+        user['crawled_at'] = record['c']
+    return user
+
+
+class CompactJsonlWriter:
+    """
+    Sink do minerador: grava cada usuário como um registro compacto, precedido
+    pelos nomes de jogos ainda não gravados no arquivo.
+    """
+
+    def __init__(self, path: str, append: bool = True):
+        """
+        Args:
+            path: Arquivo JSONL de saída
+            append: Se True, continua o arquivo (shards da coleta paralela,
+                retomada pela fronteira persistente); senão o arquivo é
+                reescrito (coleta que sempre recomeça das sementes)
+        """
+        self.path = path
+        self.names = GameNameTable()
+        self.file = open(path, 'ab' if append else 'wb')
+        self.count = 0
+
+    def __call__(self, record: Dict):
+        new_names = {appid: name for appid, name in record.pop('_names', {}).items()
+                     if self.names.add(appid, name)}
+        if new_names:
+            self.file.write(json_codec.dumps({'names': new_names}))
+            self.file.write(b'\n')
+        self.file.write(json_codec.dumps(record))
+        self.file.write(b'\n')
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+def iter_users(path: str) -> Iterator[Dict]:
+    """
+    Lê um arquivo JSONL de usuários, no formato compacto ou completo (uma linha
+    por usuário, como os shards da coleta paralela), devolvendo cada usuário
+    no formato completo.
+    """
+    names = GameNameTable()
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json_codec.loads(line)
+            except json.JSONDecodeError:
+                # Última linha truncada por uma interrupção
+                logger.warning(f"Linha inválida ignorada: {path}:{line_number}")
+                continue
+
+            if 'names' in item:
+                for appid, name in item['names'].items():
+                    names.add(int(appid), name)
+            elif 'steam_id' in item:
+                yield item
+            else:
+                yield expand_user(item, names)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Crawl Frontier
+
+Fronteira deduplicada da coleta de usuários Steam: guarda os SteamIDs já
+descobertos e entrega os próximos a processar, sem repetir usuários.
+
+Implementações:
+- MemoryFrontier: em memória, para um único processo (SteamUserMiner padrão)
+- SQLiteFrontier: arquivo SQLite compartilhado entre processos, com reserva
+  atômica de itens (BEGIN IMMEDIATE), usado pela coleta paralela
+
+A ordem de coleta é definida pela prioridade de cada item (maior primeiro,
+FIFO entre iguais); as políticas de frontier_policy.py decidem essas
+prioridades. Outras subclasses de Frontier podem substituí-las (por exemplo,
+uma fila em outro serviço); open_frontier escolhe
+a implementação a partir de uma URL como "sqlite:crawl_frontier.db" ou
+"memory:".
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import heapq
+import itertools
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+# Estados de um item da fronteira
+PENDING = 0
+CLAIMED = 1
+DONE = 2
+FAILED = 3
+
+STATE_NAMES = {PENDING: 'pending', CLAIMED: 'claimed', DONE: 'done', FAILED: 'failed'}
+
+
+class Frontier(ABC):
+    """Interface da fronteira de coleta (subclasses implementam todos os métodos abstratos)."""
+
+    @abstractmethod
+    def add(self, steam_ids: Iterable[str], priority: float = 0.0) -> int:
+        """
+        Adiciona SteamIDs ainda não vistos.
+
+        Returns:
+            Número de SteamIDs novos
+        """
+
+    @abstractmethod
+    def bump(self, steam_ids: Iterable[str], delta: float = 1.0) -> int:
+        """
+        Soma `delta` à prioridade dos SteamIDs pendentes e adiciona os não
+        vistos com prioridade `delta` (SteamIDs já reservados ou concluídos
+        não mudam).
+
+        Returns:
+            Número de SteamIDs novos
+        """
+
+    @abstractmethod
+    def unseen(self, steam_ids: Iterable[str]) -> List[str]:
+        """SteamIDs que ainda não estão na fronteira."""
+
+    @abstractmethod
+    def claim(self, worker: str = '', count: int = 1) -> List[str]:
+        """Reserva até `count` SteamIDs pendentes (maior prioridade primeiro, depois FIFO)."""
+
+    @abstractmethod
+    def complete(self, steam_id: str, success: bool = True):
+        """Marca um SteamID reservado como concluído (ou falho)."""
+
+    @abstractmethod
+    def in_progress(self) -> int:
+        """Número de SteamIDs reservados e ainda não concluídos."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Contagem de SteamIDs por estado."""
+
+    def close(self):
+        """Libera recursos."""
+
+
+class MemoryFrontier(Frontier):
+    """Fronteira em memória (um único processo)."""
+
+    def __init__(self, budget: Optional[int] = None):
+        """
+        Args:
+            budget: Máximo de SteamIDs reservados/concluídos (None = sem limite)
+        """
+        self.budget = budget
+        self.state: Dict[str, int] = {}
+        self.priority: Dict[str, float] = {}
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._counts = {PENDING: 0, CLAIMED: 0, DONE: 0, FAILED: 0}
+
+    def add(self, steam_ids: Iterable[str], priority: float = 0.0) -> int:
+        added = 0
+        for steam_id in steam_ids:
+            if steam_id not in self.state:
+                self.state[steam_id] = PENDING
+                self.priority[steam_id] = priority
+                self._counts[PENDING] += 1
+                heapq.heappush(self._heap, (-priority, next(self._seq), steam_id))
+                added += 1
+        return added
+
+    def bump(self, steam_ids: Iterable[str], delta: float = 1.0) -> int:
+        added = 0
+        for steam_id in steam_ids:
+            state = self.state.get(steam_id)
+            if state is None:
+                added += self.add([steam_id], delta)
+            elif state == PENDING:
+                # Entrada nova no heap; a antiga fica obsoleta e é descartada no claim
+                self.priority[steam_id] += delta
+                heapq.heappush(self._heap, (-self.priority[steam_id], next(self._seq), steam_id))
+        return added
+
+    def unseen(self, steam_ids: Iterable[str]) -> List[str]:
+        return [steam_id for steam_id in steam_ids if steam_id not in self.state]
+
+    def claim(self, worker: str = '', count: int = 1) -> List[str]:
+        if self.budget is not None:
+            count = min(count, self.budget - self._counts[CLAIMED] - self._counts[DONE])
+
+        claimed = []
+        while self._heap and len(claimed) < count:
+            negative_priority, _, steam_id = heapq.heappop(self._heap)
+            if self.state[steam_id] != PENDING or -negative_priority != self.priority[steam_id]:
+                continue
+            self._move(steam_id, CLAIMED)
+            claimed.append(steam_id)
+        return claimed
+
+    def complete(self, steam_id: str, success: bool = True):
+        self._move(steam_id, DONE if success else FAILED)
+
+    def _move(self, steam_id: str, state: int):
+        if state != PENDING:
+            self.priority.pop(steam_id, None)
+        self._counts[self.state[steam_id]] -= 1
+        self._counts[state] += 1
+        self.state[steam_id] = state
+
+    def in_progress(self) -> int:
+        return self._counts[CLAIMED]
+
+    def __contains__(self, steam_id: str) -> bool:
+        return steam_id in self.state
+
+    def stats(self) -> Dict[str, int]:
+        return {STATE_NAMES[state]: count for state, count in self._counts.items()}
+
+
+class SQLiteFrontier(Frontier):
+    """
+    Fronteira em um arquivo SQLite compartilhado entre processos.
+
+    Cada processo abre a própria conexão. A unicidade do steam_id garante a
+    deduplicação e a reserva roda em uma transação BEGIN IMMEDIATE, então dois
+    processos nunca recebem o mesmo SteamID.
+    """
+
+    def __init__(self, path: str = "crawl_frontier.db", budget: Optional[int] = None,
+                 timeout: float = 60.0):
+        """
+        Args:
+            path: Arquivo do banco
+            budget: Máximo global de SteamIDs reservados/concluídos; gravado no
+                banco e compartilhado por todos os processos (None = mantém o
+                valor gravado)
+            timeout: Espera máxima (s) por um lock do banco
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                steam_id TEXT NOT NULL UNIQUE,
+                state INTEGER NOT NULL DEFAULT 0,
+                priority REAL NOT NULL DEFAULT 0,
+                worker TEXT,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (state, priority DESC, seq);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        if budget is not None:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('budget', ?)", (str(budget),))
+
+    @property
+    def budget(self) -> Optional[int]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'budget'").fetchone()
+        return int(row[0]) if row else None
+
+    def add(self, steam_ids: Iterable[str], priority: float = 0.0) -> int:
+        rows = [(steam_id, priority, time.time()) for steam_id in steam_ids]
+        if not rows:
+            return 0
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO frontier (steam_id, priority, updated_at) VALUES (?, ?, ?)", rows)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return self.conn.total_changes - before
+
+    def bump(self, steam_ids: Iterable[str], delta: float = 1.0) -> int:
+        steam_ids = list(steam_ids)
+        if not steam_ids:
+            return 0
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "UPDATE frontier SET priority = priority + ? WHERE steam_id = ? AND state = ?",
+                [(delta, steam_id, PENDING) for steam_id in steam_ids])
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO frontier (steam_id, priority, updated_at) VALUES (?, ?, ?)",
+                [(steam_id, delta, now) for steam_id in steam_ids])
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def unseen(self, steam_ids: Iterable[str]) -> List[str]:
+        steam_ids = list(steam_ids)
+        seen = set()
+        # Consulta em lotes (limite de parâmetros do SQLite)
+        for start in range(0, len(steam_ids), 500):
+            batch = steam_ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            seen.update(row[0] for row in self.conn.execute(
+                f"SELECT steam_id FROM frontier WHERE steam_id IN ({placeholders})", batch))
+        return [steam_id for steam_id in steam_ids if steam_id not in seen]
+
+    def claim(self, worker: str = '', count: int = 1) -> List[str]:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            budget = self.budget
+            if budget is not None:
+                used = self.conn.execute("SELECT COUNT(*) FROM frontier WHERE state IN (?, ?)",
+                                         (CLAIMED, DONE)).fetchone()[0]
+                count = min(count, budget - used)
+
+            claimed = []
+            if count > 0:
+                claimed = [row[0] for row in self.conn.execute(
+                    "SELECT steam_id FROM frontier WHERE state = ? ORDER BY priority DESC, seq LIMIT ?",
+                    (PENDING, count))]
+                self.conn.executemany(
+                    "UPDATE frontier SET state = ?, worker = ?, updated_at = ? WHERE steam_id = ?",
+                    [(CLAIMED, worker, time.time(), steam_id) for steam_id in claimed])
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def complete(self, steam_id: str, success: bool = True):
+        self.conn.execute("UPDATE frontier SET state = ?, updated_at = ? WHERE steam_id = ?",
+                          (DONE if success else FAILED, time.time(), steam_id))
+
+    def requeue_stale(self, max_age: float = 600.0) -> int:
+        """
+        Devolve à fila itens reservados há mais de `max_age` segundos (por
+        exemplo, de um processo que morreu no meio da coleta).
+
+        Returns:
+            Número de itens devolvidos
+        """
+        cursor = self.conn.execute(
+            "UPDATE frontier SET state = ?, worker = NULL WHERE state = ? AND updated_at < ?",
+            (PENDING, CLAIMED, time.time() - max_age))
+        return cursor.rowcount
+
+    def in_progress(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM frontier WHERE state = ?", (CLAIMED,)).fetchone()[0]
+
+    def __contains__(self, steam_id: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM frontier WHERE steam_id = ?", (steam_id,)).fetchone() is not None
+
+    def stats(self) -> Dict[str, int]:
+        counts = {name: 0 for name in STATE_NAMES.values()}
+        for state, count in self.conn.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state"):
+            counts[STATE_NAMES[state]] = count
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+def open_frontier(url: str, budget: Optional[int] = None) -> Frontier:
+    """
+    Abre uma fronteira a partir de uma URL.
+
+    Args:
+        url: "memory:", "sqlite:<arquivo>" ou apenas o caminho de um arquivo SQLite
+        budget: Máximo de SteamIDs a coletar
+
+    Returns:
+        Instância de Frontier
+    """
+    scheme, _, location = url.partition(':')
+    if scheme == 'memory':
+        return MemoryFrontier(budget)
+    if scheme == 'sqlite':
+        return SQLiteFrontier(location, budget)
+    if not location or os.path.sep in scheme:
+        return SQLiteFrontier(url, budget)
+    raise ValueError(f"Fronteira desconhecida: {url}")
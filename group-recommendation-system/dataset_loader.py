@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Dataset Loader
+
+Carregamento único do dataset do steam_user_miner (JSON ou JSONL compacto),
+compartilhado pelo analisador, pelos exemplos e pelos scripts auxiliares:
+
+- valida a estrutura dos usuários uma vez
+- monta os índices derivados: posição de cada usuário, banco de jogos (donos
+  e tempo de jogo por appid) e o grafo de amizades em CSR (FriendshipGraph)
+- guarda o resultado em um cache em disco (pickle) identificado pelo caminho
+  do arquivo e validado pela impressão digital (tamanho, mtime e SHA-256)
+
+Com o cache válido, o próximo script começa direto dos índices prontos. Se só
+o mtime mudou (arquivo copiado ou tocado), o SHA-256 confirma que o conteúdo é
+o mesmo e o cache continua valendo.
+
+O cache fica em STEAM_DATASET_CACHE ou, por padrão, em .dataset_cache/ ao lado
+do dataset.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import json_codec
+from compact_records import iter_users
+from friendship_graph import FriendshipGraph
+
+logger = logging.getLogger(__name__)
+
+# Versão do formato do cache (mudar invalida os caches existentes)
+CACHE_VERSION = 1
+
+
+class DatasetError(ValueError):
+    """Dataset com estrutura inválida."""
+
+
+class Dataset:
+    """Usuários do dataset e seus índices derivados."""
+
+    def __init__(self, users: List[Dict]):
+        self.users = users
+        self.user_index = {user['steam_id']: i for i, user in enumerate(users)}
+        self.game_database = build_game_database(users)
+        self.graph = FriendshipGraph.from_users(users)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+
+def build_game_database(users: List[Dict]) -> Dict[str, Dict]:
+    """
+    Banco de jogos únicos: {appid: {'appid', 'name', 'owners', 'total_playtime',
+    'avg_playtime'}}, na ordem em que os jogos aparecem no dataset.
+    """
+    game_database = {}
+
+    for user in users:
+        games = user.get('owned_games', {}).get('games', [])
+        for game in games:
+            app_id = str(game.get('appid', ''))
+            if app_id and app_id not in game_database:
+                game_database[app_id] = {
+                    'appid': app_id,
+                    'name': game.get('name', f'Game {app_id}'),
+                    'owners': [],
+                    'total_playtime': 0,
+                    'avg_playtime': 0
+                }
+
+            if app_id:
+                game_database[app_id]['owners'].append(user['steam_id'])
+                game_database[app_id]['total_playtime'] += game.get('playtime_forever', 0)
+
+    # Calcular tempo médio de jogo
+    for game in game_database.values():
+        if len(game['owners']) > 0:
+            game['avg_playtime'] = game['total_playtime'] / len(game['owners'])
+
+    return game_database
+
+
+def validate_users(users) -> None:
+    """
+    Confere a estrutura do dataset.
+
+    Raises:
+        DatasetError: Se o dataset não for uma lista de usuários válidos
+    """
+    if not isinstance(users, list):
+        raise DatasetError("O dataset deve ser uma lista de usuários")
+
+    seen = set()
+    for position, user in enumerate(users):
+        if not isinstance(user, dict) or not isinstance(user.get('steam_id'), str):
+            raise DatasetError(f"Usuário {position}: steam_id ausente ou inválido")
+        if user['steam_id'] in seen:
+            raise DatasetError(f"Usuário {position}: steam_id {user['steam_id']} repetido")
+        seen.add(user['steam_id'])
+
+        for field, inner in (('profile_info', None), ('owned_games', 'games'), ('friends_list', 'friends')):
+            value = user.get(field, {})
+            if not isinstance(value, dict) or (inner and not isinstance(value.get(inner, []), list)):
+                raise DatasetError(f"Usuário {user['steam_id']}: campo {field} inválido")
+
+
+def _file_digest(path: str) -> str:
+    """SHA-256 do conteúdo do arquivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(path: str, cache_dir: Optional[str]) -> str:
+    """Arquivo de cache de um dataset (um por caminho absoluto)."""
+    path = os.path.abspath(path)
+    cache_dir = cache_dir or os.getenv('STEAM_DATASET_CACHE') or os.path.join(os.path.dirname(path), '.dataset_cache')
+    name = hashlib.sha256(path.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f'{os.path.basename(path)}.{name}.pickle')
+
+
+def _read_users(path: str) -> List[Dict]:
+    """Lê o dataset do disco (JSON ou JSONL)."""
+    if path.endswith('.jsonl'):
+        return list(iter_users(path))
+    return json_codec.load(path)
+
+
+def _load_cache(cache_file: str, stat: os.stat_result, path: str) -> Tuple[Optional[Dataset], Optional[str]]:
+    """
+    Dataset do cache, se a impressão digital ainda corresponde ao arquivo.
+
+    Returns:
+        Tupla (dataset ou None, SHA-256 do arquivo se foi preciso calculá-lo)
+    """
+    digest = None
+    try:
+        with open(cache_file, 'rb') as f:
+            fingerprint = pickle.load(f)
+            if fingerprint.get('version') != CACHE_VERSION or fingerprint['size'] != stat.st_size:
+                return None, None
+            if fingerprint['mtime_ns'] != stat.st_mtime_ns:
+                digest = _file_digest(path)
+                if digest != fingerprint['sha256']:
+                    return None, digest
+            return pickle.load(f), digest
+    except FileNotFoundError:
+        return None, digest
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, ImportError) as e:
+        logger.warning(f"Cache {cache_file} ignorado: {e}")
+        return None, digest
+
+
+def _write_cache(cache_file: str, stat: os.stat_result, path: str, dataset: Dataset,
+                 digest: Optional[str] = None):
+    """Grava o cache de forma atômica (outros scripts podem estar lendo)."""
+    fingerprint = {
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest or _file_digest(path)
+    }
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_file), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(fingerprint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(dataset, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_file)
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar o cache {cache_file}: {e}")
+
+
+def load_dataset(path: str = 'steam_user_data.json', use_cache: bool = True,
+                 cache_dir: Optional[str] = None) -> Dataset:
+    """
+    Carrega um dataset com seus índices, pelo cache quando válido.
+
+    Args:
+        path: Dataset JSON (ou JSONL compacto)
+        use_cache: Se False, sempre lê e valida o arquivo (e não grava cache)
+        cache_dir: Diretório do cache (padrão: STEAM_DATASET_CACHE ou
+            .dataset_cache/ ao lado do dataset)
+
+    Raises:
+        FileNotFoundError: Se o dataset não existir
+        json.JSONDecodeError: Se o arquivo não for JSON válido
+        DatasetError: Se a estrutura dos usuários for inválida
+    """
+    stat = os.stat(path)
+    cache_file = _cache_path(path, cache_dir)
+
+    digest = None
+    if use_cache:
+        dataset, digest = _load_cache(cache_file, stat, path)
+        if dataset is not None:
+            logger.info(f"{len(dataset)} usuários carregados do cache ({cache_file})")
+            if digest is not None:
+                # Mesmo conteúdo com outro mtime: atualiza a impressão digital
+                _write_cache(cache_file, stat, path, dataset, digest)
+            return dataset
+
+    users = _read_users(path)
+    validate_users(users)
+    dataset = Dataset(users)
+
+    if use_cache:
+        _write_cache(cache_file, stat, path, dataset, digest)
+    return dataset
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Delta Crawl
+
+Recoleta incremental: em vez de refazer a BFS a partir do SteamID inicial,
+parte de um dataset existente e busca de novo apenas os usuários que
+- foram coletados há mais tempo que o limite de validade (crawled_at; sem
+  ele, vale a data de modificação do arquivo), ou
+- ficaram ativos desde a última coleta (lastlogoff do perfil mais recente que
+  o registrado)
+
+Os perfis de todos os usuários são consultados em lotes de 100
+(GetPlayerSummaries); jogos e amigos só dos selecionados, em várias threads.
+O resultado é um changeset (usuários atualizados) que o analisador aplica
+com SteamGraphAnalyzer.apply_changeset, sem recarregar tudo, e que pode ser
+incorporado ao dataset com --apply.
+
+Usuários que já estavam no cache negativo (negative_cache.py) como privados
+ou inexistentes ficam como estão, sem requisições de jogos e amigos; perfis
+que ficaram privados são atualizados só com o perfil.
+
+Uso:
+    python delta_crawl.py --data steam_user_data.json --max-age-hours 168 \\
+        --workers 8 --changeset steam_user_changeset.json --apply \\
+        --negative-cache steam_negative_cache.db
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import json_codec
+from dataset_loader import load_dataset
+from negative_cache import NegativeCache
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_VISIBILITY = 3
+
+
+def load_users(data_file: str) -> List[Dict]:
+    """Lê um dataset JSON (ou JSONL) no formato do steam_user_miner."""
+    return load_dataset(data_file).users
+
+
+def select_users(users: List[Dict], summaries: Dict[str, Dict], max_age: float,
+                 now: float, default_crawled_at: float) -> Dict[str, str]:
+    """
+    Escolhe os usuários a recoletar.
+
+    Args:
+        users: Dataset atual
+        summaries: Perfis recém-consultados {steam_id: perfil}
+        max_age: Validade (s) de um usuário coletado
+        now: Instante atual (epoch)
+        default_crawled_at: crawled_at dos usuários que não o têm
+
+    Returns:
+        Dict {steam_id: motivo} com motivo 'stale' ou 'active'
+    """
+    selected = {}
+    for user in users:
+        steam_id = user['steam_id']
+        crawled_at = user.get('crawled_at', default_crawled_at)
+        if now - crawled_at > max_age:
+            selected[steam_id] = 'stale'
+            continue
+
+        # Usuários sem perfil na consulta (falha ou conta removida) ficam como estão
+        summary = summaries.get(steam_id)
+        if summary is None:
+            continue
+        last_seen = user.get('profile_info', {}).get('lastlogoff', crawled_at)
+        if summary.get('lastlogoff', 0) > last_seen:
+            selected[steam_id] = 'active'
+    return selected
+
+
+def refresh(miner, users: List[Dict], max_age: float, workers: int = 4,
+            default_crawled_at: Optional[float] = None) -> Dict:
+    """
+    Recoleta os usuários desatualizados ou ativos de um dataset.
+
+    Args:
+        miner: SteamUserMiner usado para as requisições (e sua contagem)
+        users: Dataset atual
+        max_age: Validade (s) de um usuário coletado
+        workers: Threads para buscar jogos e amigos
+        default_crawled_at: crawled_at dos usuários que não o têm (padrão: 0,
+            isto é, todos desatualizados)
+
+    Returns:
+        Changeset {'created_at', 'checked', 'selected', 'skipped', 'updated': [usuários]}
+        (skipped: selecionados descartados pelo cache negativo do minerador)
+    """
+    now = time.time()
+    steam_ids = [user['steam_id'] for user in users]
+    # Entradas anteriores a esta recoleta (a consulta de perfis abaixo atualiza o cache)
+    negative = miner.negative_cache.known(steam_ids) if miner.negative_cache is not None else {}
+    summaries = miner.get_player_summaries(steam_ids)
+    if negative:
+        # Perfis que voltaram a ser públicos saíram do cache
+        negative = miner.negative_cache.known(negative)
+    selected = select_users(users, summaries, max_age, now, default_crawled_at or 0)
+    skipped = [steam_id for steam_id in selected if steam_id in negative]
+    for steam_id in skipped:
+        del selected[steam_id]
+    reasons = list(selected.values())
+    logger.info(f"{len(selected)} de {len(users)} usuários selecionados "
+                f"({reasons.count('stale')} desatualizados, {reasons.count('active')} ativos, "
+                f"{len(skipped)} no cache negativo)")
+
+    def fetch(steam_id: str) -> Optional[Dict]:
+        profile_info = summaries.get(steam_id) or miner.get_player_summary(steam_id)
+        if not profile_info:
+            return None
+        if profile_info.get('communityvisibilitystate') != PUBLIC_VISIBILITY:
+            # Perfil privado: jogos e amigos não são devolvidos pela API
+            return miner.build_user_record(steam_id, profile_info, {'game_count': 0, 'games': []}, [])
+        owned_games = miner.get_owned_games(steam_id)
+        if owned_games is None:
+            return None
+        time.sleep(miner.request_delay)
+        friends = miner.get_friend_list(steam_id)
+        time.sleep(miner.request_delay)
+        return miner.build_user_record(steam_id, profile_info, owned_games, friends)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        updated = [user for user in executor.map(fetch, list(selected)) if user is not None]
+
+    if len(updated) < len(selected):
+        logger.warning(f"{len(selected) - len(updated)} usuários não puderam ser recoletados")
+
+    return {
+        'created_at': int(now),
+        'checked': len(users),
+        'selected': len(selected),
+        'skipped': len(skipped),
+        'updated': updated
+    }
+
+
+def merge_changeset(users: List[Dict], changeset: Dict) -> List[Dict]:
+    """
+    Aplica um changeset a um dataset: usuários atualizados substituem os
+    existentes (na mesma posição); usuários novos vão para o final.
+    """
+    position = {user['steam_id']: i for i, user in enumerate(users)}
+    merged = list(users)
+    for user in changeset['updated']:
+        index = position.get(user['steam_id'])
+        if index is None:
+            position[user['steam_id']] = len(merged)
+            merged.append(user)
+        else:
+            merged[index] = user
+    return merged
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Recoleta os usuários desatualizados de um dataset."""
+    parser = argparse.ArgumentParser(description="Recoleta incremental de um dataset Steam")
+    parser.add_argument('--data', default='steam_user_data.json', help="Dataset atual")
+    parser.add_argument('--changeset', default='steam_user_changeset.json', help="Arquivo do changeset")
+    parser.add_argument('--max-age-hours', type=float, default=168.0, help="Validade de um usuário coletado (h)")
+    parser.add_argument('--workers', type=int, default=4, help="Threads de coleta")
+    parser.add_argument('--request-delay', type=float, default=0.5, help="Delay (s) entre requisições de cada thread")
+    parser.add_argument('--apply', action='store_true', help="Também grava o dataset atualizado em --data")
+    parser.add_argument('--negative-cache', default='steam_negative_cache.db',
+                        help="Cache de SteamIDs privados/inexistentes ('' desativa)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from dotenv import load_dotenv
+    from steam_user_miner import SteamUserMiner
+
+    load_dotenv()
+    api_key = os.getenv('STEAM_API_KEY')
+    if not api_key:
+        logger.error("STEAM_API_KEY não definida")
+        return 2
+
+    try:
+        users = load_users(args.data)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Não foi possível ler {args.data}: {e}")
+        return 1
+
+    negative_cache = NegativeCache(args.negative_cache) if args.negative_cache else None
+    miner = SteamUserMiner(api_key, [], negative_cache=negative_cache)
+    miner.request_delay = args.request_delay
+    changeset = refresh(miner, users, args.max_age_hours * 3600, args.workers,
+                        default_crawled_at=os.path.getmtime(args.data))
+    changeset['base'] = args.data
+
+    json_codec.dump(changeset, args.changeset)
+    logger.info(f"{len(changeset['updated'])} usuários atualizados em {miner.request_count} "
+                f"requisições; changeset salvo em {args.changeset}")
+
+    if args.apply:
+        if args.data.endswith('.jsonl'):
+            logger.error("--apply não suporta datasets JSONL; use o changeset no analisador")
+            return 1
+        json_codec.dump(merge_changeset(users, changeset), args.data)
+        logger.info(f"Dataset {args.data} atualizado")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Distributed Analysis
+
+Análise map/reduce sobre um dataset em shards, para quando um único host de
+análise é o gargalo. A coordenação passa por um diretório compartilhado (um
+disco de rede entre as máquinas, ou um diretório local para vários processos
+na mesma máquina), que faz o papel de uma fila de jobs:
+
+    <workdir>/jobs/{pending,running,done,failed}/<job>.json
+
+Um worker reserva um job movendo o arquivo de pending/ para running/
+(os.rename é atômico: só um worker consegue) e grava o resultado em done/.
+Jobs de workers que morreram voltam para pending/ depois de --stale-after
+segundos.
+
+Etapas:
+1. map (um job por shard): lê o shard (JSONL da coleta paralela, completo ou
+   compacto), grava os usuários só com os campos usados na análise e os
+   agregados de jogos do shard (donos e tempo total)
+2. reduce: combina os usuários (a versão do último shard vence, como em
+   parallel_crawl.merge_shards) e os agregados no banco de jogos global, e
+   grava os arrays de UserFeatures (blocked_similarity.py)
+3. map (um job por faixa de linhas de custo parecido): calcula a similaridade
+   das linhas em blocos com orçamento de memória e grava só os pares
+   candidatos (top-k acima do limiar)
+4. reduce: combina os blocos na matriz esparsa (SparseSimilarity), calcula os
+   clusters globais e as recomendações e exporta para a visualização
+
+O resultado é o mesmo de `pipeline.py --similarity blocked` com os mesmos
+parâmetros.
+
+Uso:
+    # Coordenador com 4 workers locais sobre os shards da coleta paralela
+    python distributed_analysis.py --shards crawl_shards/shard-*.jsonl --workers 4
+
+    # Um dataset único dividido em 8 shards
+    python distributed_analysis.py --data steam_user_data.json --partitions 8 --workers 4
+
+    # Vários hosts: o coordenador sem workers locais e um worker por host
+    python distributed_analysis.py --shards /mnt/shared/shards/*.jsonl --workdir /mnt/shared/analysis --workers 0
+    python distributed_analysis.py --worker --workdir /mnt/shared/analysis
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import socket
+import time
+from multiprocessing import Process
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import json_codec
+from blocked_similarity import SparseSimilarity, UserFeatures, block_ranges, merge_tiles, write_tile
+from compact_records import iter_users, slim_profile
+from dataset_loader import build_game_database, load_dataset
+from steam_graph_analyzer import SteamGraphAnalyzer
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ('pending', 'running', 'done', 'failed')
+
+
+class JobError(RuntimeError):
+    """Um job do map/reduce falhou."""
+
+
+class JobQueue:
+    """Fila de jobs em um diretório compartilhado (um arquivo JSON por job)."""
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Diretório da fila (criado se não existir)
+        """
+        self.directory = directory
+        for state in JOB_STATES:
+            os.makedirs(os.path.join(directory, state), exist_ok=True)
+
+    def _path(self, state: str, job_id: str) -> str:
+        return os.path.join(self.directory, state, f'{job_id}.json')
+
+    def _write(self, path: str, data: Dict):
+        """Grava o arquivo de forma atômica (outro processo nunca vê um JSON pela metade)."""
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+
+    def submit(self, job_id: str, kind: str, **payload) -> str:
+        """Adiciona um job (kind define a função de map que o executa)."""
+        self._write(self._path('pending', job_id), dict(payload, id=job_id, kind=kind))
+        return job_id
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Reserva o próximo job pendente, ou None se não houver."""
+        try:
+            names = sorted(os.listdir(os.path.join(self.directory, 'pending')))
+        except FileNotFoundError:
+            # Fila recriada pelo coordenador no início de uma análise
+            return None
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            job_id = name[:-len('.json')]
+            try:
+                os.rename(self._path('pending', job_id), self._path('running', job_id))
+            except FileNotFoundError:
+                continue  # reservado por outro worker
+            os.utime(self._path('running', job_id))
+            with open(self._path('running', job_id), 'r', encoding='utf-8') as f:
+                job = json.load(f)
+            job['worker'] = worker
+            return job
+        return None
+
+    def complete(self, job: Dict, result: Dict):
+        """Registra o resultado de um job reservado."""
+        self._write(self._path('done', job['id']), dict(job, result=result))
+        self._remove(self._path('running', job['id']))
+
+    def fail(self, job: Dict, error: str):
+        """Registra a falha de um job reservado."""
+        self._write(self._path('failed', job['id']), dict(job, error=error))
+        self._remove(self._path('running', job['id']))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def requeue_stale(self, max_age: float) -> int:
+        """Devolve para pending/ os jobs reservados há mais de max_age segundos."""
+        requeued = 0
+        now = time.time()
+        running = os.path.join(self.directory, 'running')
+        for name in os.listdir(running):
+            path = os.path.join(running, name)
+            try:
+                if name.endswith('.json') and now - os.path.getmtime(path) > max_age:
+                    os.rename(path, os.path.join(self.directory, 'pending', name))
+                    requeued += 1
+            except FileNotFoundError:
+                continue
+        if requeued:
+            logger.warning(f"{requeued} jobs sem resposta devolvidos para a fila")
+        return requeued
+
+    def counts(self) -> Dict[str, int]:
+        """Jobs em cada estado."""
+        return {state: sum(1 for name in os.listdir(os.path.join(self.directory, state)) if name.endswith('.json'))
+                for state in JOB_STATES}
+
+    def wait(self, job_ids: List[str], poll: float = 0.2, stale_after: Optional[float] = None) -> List[Dict]:
+        """
+        Espera os jobs terminarem.
+
+        Returns:
+            Resultados, na ordem de job_ids
+
+        Raises:
+            JobError: Se algum job falhou
+        """
+        last_report = time.monotonic()
+        while True:
+            for job_id in job_ids:
+                if os.path.exists(self._path('failed', job_id)):
+                    with open(self._path('failed', job_id), 'r', encoding='utf-8') as f:
+                        failed = json.load(f)
+                    raise JobError(f"Job {job_id} falhou em {failed.get('worker')}: {failed.get('error')}")
+
+            done = [job_id for job_id in job_ids if os.path.exists(self._path('done', job_id))]
+            if len(done) == len(job_ids):
+                results = []
+                for job_id in job_ids:
+                    with open(self._path('done', job_id), 'r', encoding='utf-8') as f:
+                        results.append(json.load(f)['result'])
+                return results
+
+            if stale_after is not None:
+                self.requeue_stale(stale_after)
+            if time.monotonic() - last_report >= 30:
+                logger.info(f"Aguardando jobs: {len(done)}/{len(job_ids)} concluídos ({self.counts()})")
+                last_report = time.monotonic()
+            time.sleep(poll)
+
+    def stop(self):
+        """Sinaliza aos workers que não haverá novos jobs."""
+        open(os.path.join(self.directory, 'STOP'), 'w').close()
+
+    def stopped(self, since: float = 0.0) -> bool:
+        """Se o fim foi sinalizado depois de `since` (timestamp)."""
+        try:
+            return os.path.getmtime(os.path.join(self.directory, 'STOP')) >= since
+        except FileNotFoundError:
+            return False
+
+
+def slim_user(user: Dict) -> Dict:
+    """Usuário só com os campos usados pela análise, pelo export e pelo serviço."""
+    friends = user.get('friends_list', {})
+    return {
+        'steam_id': user['steam_id'],
+        'profile_info': slim_profile(user.get('profile_info', {})),
+        'owned_games': {'games': [{'appid': game['appid'], 'playtime_forever': game.get('playtime_forever', 0)}
+                                  for game in user.get('owned_games', {}).get('games', [])]},
+        'friends_list': {'friends': friends.get('friends', []),
+                         'friend_count': friends.get('friend_count', len(friends.get('friends', [])))}
+    }
+
+
+def _write_jsonl(users: List[Dict], path: str):
+    """Grava usuários em JSONL (um por linha, como os shards da coleta)."""
+    with open(path, 'wb') as f:
+        for user in users:
+            f.write(json_codec.dumps(user))
+            f.write(b'\n')
+
+
+def map_extract(workdir: str, job: Dict) -> Dict:
+    """Map da etapa 1: usuários enxutos e agregados de jogos de um shard."""
+    users: Dict[str, Dict] = {}
+    for user in iter_users(job['shard']):
+        users.pop(user['steam_id'], None)
+        users[user['steam_id']] = user
+    users = list(users.values())
+
+    prefix = os.path.join(workdir, 'parts', job['id'])
+    _write_jsonl([slim_user(user) for user in users], f'{prefix}.jsonl')
+    json_codec.dump(build_game_database(users), f'{prefix}.games.json')
+    logger.info(f"{job['id']}: {len(users)} usuários de {job['shard']}")
+    return {'part': job['id'], 'users': len(users)}
+
+
+def map_similarity(workdir: str, job: Dict, features: UserFeatures) -> Dict:
+    """Map da etapa 3: pares candidatos das linhas [start, stop), em blocos de memória limitada."""
+    tiles = []
+    for start, stop in block_ranges(features, job['memory_budget_mb'], job['start'], job['stop']):
+        name = f"{job['id']}_{len(tiles):04d}"
+        write_tile(features, os.path.join(workdir, 'tiles', name), start, stop,
+                   job['top_k'], job['threshold'], job['encoding'])
+        tiles.append(name)
+    logger.info(f"{job['id']}: linhas {job['start']}-{job['stop']} em {len(tiles)} blocos")
+    return {'tiles': tiles}
+
+
+def run_worker(workdir: str, worker_id: Optional[str] = None, poll: float = 0.5,
+               idle_timeout: Optional[float] = None) -> int:
+    """
+    Executa jobs da fila até o coordenador sinalizar o fim (ou ficar
+    idle_timeout segundos sem jobs).
+
+    Returns:
+        Número de jobs executados
+    """
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    queue = JobQueue(os.path.join(workdir, 'jobs'))
+    started = time.time()
+    features, features_key = None, None
+    executed = 0
+    idle_since = time.monotonic()
+
+    while True:
+        job = queue.claim(worker_id)
+        if job is None:
+            if queue.stopped(started) or (idle_timeout is not None and time.monotonic() - idle_since > idle_timeout):
+                break
+            time.sleep(poll)
+            continue
+
+        try:
+            if job['kind'] == 'extract':
+                result = map_extract(workdir, job)
+            elif job['kind'] == 'similarity':
+                # Os arrays são carregados uma vez por worker (e de novo se o reduce os regravar)
+                path = os.path.join(workdir, 'features.npz')
+                key = os.stat(path).st_mtime_ns
+                if key != features_key:
+                    features, features_key = UserFeatures.load(path), key
+                result = map_similarity(workdir, job, features)
+            else:
+                raise ValueError(f"Tipo de job desconhecido: {job['kind']}")
+        except Exception as e:
+            logger.exception(f"{worker_id}: job {job['id']} falhou")
+            queue.fail(job, f'{type(e).__name__}: {e}')
+        else:
+            queue.complete(job, result)
+            executed += 1
+        idle_since = time.monotonic()
+
+    logger.info(f"{worker_id}: {executed} jobs executados")
+    return executed
+
+
+def partition_dataset(data_file: str, output_dir: str, partitions: int) -> List[str]:
+    """Divide um dataset em shards JSONL contíguos."""
+    users = load_dataset(data_file).users
+    os.makedirs(output_dir, exist_ok=True)
+    bounds = np.linspace(0, len(users), partitions + 1).astype(int)
+    paths = []
+    for index in range(partitions):
+        path = os.path.join(output_dir, f'shard-{index:03d}.jsonl')
+        _write_jsonl(users[bounds[index]:bounds[index + 1]], path)
+        paths.append(path)
+    return paths
+
+
+def reduce_extract(workdir: str, results: List[Dict]) -> Tuple[List[Dict], Dict[str, Dict]]:
+    """
+    Reduce da etapa 2: usuários de todos os shards (a versão do último shard
+    vence) e o banco de jogos global, na ordem de build_game_database.
+    """
+    users: Dict[str, Dict] = {}
+    duplicates = 0
+    for result in results:
+        for user in iter_users(os.path.join(workdir, 'parts', f"{result['part']}.jsonl")):
+            duplicates += users.pop(user['steam_id'], None) is not None
+            users[user['steam_id']] = user
+    users = list(users.values())
+
+    game_database: Dict[str, Dict] = {}
+    for result in results:
+        for app_id, game in json_codec.load(os.path.join(workdir, 'parts', f"{result['part']}.games.json")).items():
+            merged = game_database.setdefault(app_id, dict(game, owners=[], total_playtime=0))
+            merged['owners'].extend(game['owners'])
+            merged['total_playtime'] += game['total_playtime']
+
+    if duplicates:
+        # Usuário coletado em mais de um shard: os agregados contariam as versões antigas
+        names = {app_id: game['name'] for app_id, game in game_database.items()}
+        game_database = build_game_database(users)
+        for app_id, game in game_database.items():
+            game['name'] = names.get(app_id, game['name'])
+    else:
+        for game in game_database.values():
+            game['avg_playtime'] = game['total_playtime'] / len(game['owners']) if game['owners'] else 0
+
+    logger.info(f"Reduce: {len(users)} usuários, {len(game_database)} jogos ({duplicates} repetidos entre shards)")
+    return users, game_database
+
+
+def _row_splits(features: UserFeatures, parts: int) -> List[Tuple[int, int]]:
+    """Faixas de linhas com custo estimado parecido (row_bytes)."""
+    cost = np.concatenate([[0], np.cumsum(features.row_bytes())])
+    bounds = np.unique(np.searchsorted(cost, np.linspace(0, cost[-1], parts + 1)[1:-1]))
+    bounds = [0] + [int(b) for b in bounds if 0 < b < features.num_users] + [features.num_users]
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+def run_analysis(shards: List[str], workdir: str, output_file: str, workers: int = 2,
+                 num_clusters: int = 6, clustering_method: str = 'threshold',
+                 memory_budget_mb: float = 512, top_k: int = 50, threshold: float = 0.0,
+                 encoding: str = 'float32', similarity_jobs: Optional[int] = None,
+                 with_layout: bool = True, stale_after: Optional[float] = 1800.0) -> Dict:
+    """
+    Coordena o map/reduce completo e exporta o resultado.
+
+    Args:
+        shards: Shards JSONL de entrada
+        workdir: Diretório compartilhado com os workers
+        output_file: Arquivo exportado para a visualização
+        workers: Workers locais iniciados pelo coordenador (0 = só externos)
+        num_clusters: Número de clusters
+        clustering_method: 'threshold' ou 'louvain'
+        memory_budget_mb: Memória de trabalho por bloco de similaridade
+        top_k: Pares mantidos por usuário
+        threshold: Similaridade mínima de um par mantido
+        encoding: Codificação dos valores ('float32' ou 'uint8')
+        similarity_jobs: Jobs de similaridade (padrão: 4 por worker)
+        with_layout: Se True, calcula o layout dos nós no export
+        stale_after: Segundos até um job reservado voltar para a fila
+
+    Returns:
+        Estatísticas do export
+    """
+    for name in ('jobs', 'parts', 'tiles', 'similarity'):
+        shutil.rmtree(os.path.join(workdir, name), ignore_errors=True)
+    for name in ('parts', 'tiles', 'similarity'):
+        os.makedirs(os.path.join(workdir, name))
+    queue = JobQueue(os.path.join(workdir, 'jobs'))
+
+    processes = [Process(target=run_worker, args=(workdir, f'local-{index:03d}'), name=f'local-{index:03d}')
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        started = time.perf_counter()
+        jobs = [queue.submit(f'extract-{index:05d}', 'extract', shard=os.path.abspath(shard))
+                for index, shard in enumerate(shards)]
+        users, game_database = reduce_extract(workdir, queue.wait(jobs, stale_after=stale_after))
+        logger.info(f"Extração: {len(jobs)} shards em {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        analyzer = SteamGraphAnalyzer(output_file)
+        analyzer.load_users(users, game_database)
+        features = UserFeatures(users, analyzer.friendship_graph)
+        features.save(os.path.join(workdir, 'features.npz'))
+
+        jobs = [queue.submit(f'similarity-{index:05d}', 'similarity', start=start, stop=stop,
+                             memory_budget_mb=memory_budget_mb, top_k=top_k, threshold=threshold,
+                             encoding=encoding)
+                for index, (start, stop) in enumerate(_row_splits(features, similarity_jobs or 4 * max(workers, 1)))]
+        results = queue.wait(jobs, stale_after=stale_after)
+        logger.info(f"Similaridade: {len(jobs)} jobs em {time.perf_counter() - started:.1f}s")
+    finally:
+        queue.stop()
+        for process in processes:
+            process.join()
+
+    similarity_dir = os.path.join(workdir, 'similarity')
+    tiles = [os.path.join(workdir, 'tiles', tile) for result in results for tile in result['tiles']]
+    merge_tiles(tiles, similarity_dir, features.num_users, encoding)
+    params = {'memory_budget_mb': memory_budget_mb, 'top_k': top_k, 'threshold': threshold,
+              'output_dir': similarity_dir, 'encoding': encoding}
+    analyzer.user_similarity_matrix = SparseSimilarity.open(similarity_dir, features.steam_ids, params)
+
+    if clustering_method == 'louvain':
+        analyzer.cluster_users_louvain(num_clusters)
+    else:
+        analyzer.cluster_users(num_clusters)
+    analyzer.process_clusters(max(workers, 1))
+    return analyzer.export_for_visualization(output_file, with_layout=with_layout)['statistics']
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Executa o coordenador ou um worker."""
+    parser = argparse.ArgumentParser(description="Análise map/reduce sobre shards de usuários")
+    parser.add_argument('--worker', action='store_true', help="Executar como worker de um coordenador")
+    parser.add_argument('--workdir', default='analysis_work', help="Diretório compartilhado da fila e dos resultados")
+    parser.add_argument('--shards', nargs='*',
+                        help="Shards JSONL de entrada (ex.: crawl_shards/shard-*.jsonl; no mesmo caminho em todos os hosts)")
+    parser.add_argument('--data', help="Dataset único, dividido em --partitions shards")
+    parser.add_argument('--partitions', type=int, default=8, help="Shards criados a partir de --data")
+    parser.add_argument('--output', default='steam_graph_data.json', help="Arquivo exportado para a visualização")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Workers locais do coordenador (0 = só workers externos)")
+    parser.add_argument('--clusters', type=int, default=6, help="Número de clusters")
+    parser.add_argument('--clustering', choices=['threshold', 'louvain'], default='threshold',
+                        help="Algoritmo de clustering")
+    parser.add_argument('--memory-budget', type=float, default=512,
+                        help="Memória de trabalho (MB) por bloco de similaridade em cada worker")
+    parser.add_argument('--similarity-top-k', type=int, default=50, help="Pares mantidos por usuário")
+    parser.add_argument('--similarity-encoding', choices=['float32', 'uint8'], default='float32',
+                        help="Codificação dos valores da similaridade")
+    parser.add_argument('--similarity-jobs', type=int, help="Jobs de similaridade (padrão: 4 por worker)")
+    parser.add_argument('--stale-after', type=float, default=1800.0,
+                        help="Segundos até um job sem resposta voltar para a fila")
+    parser.add_argument('--idle-timeout', type=float, help="Worker: sair após estes segundos sem jobs")
+    parser.add_argument('--no-layout', action='store_true', help="Não calcular o layout dos nós")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+
+    if args.worker:
+        run_worker(args.workdir, idle_timeout=args.idle_timeout)
+        return 0
+
+    if args.workers < 0 or args.partitions < 1 or args.similarity_top_k < 1 or args.memory_budget <= 0:
+        parser.error("--workers deve ser >= 0; --partitions e --similarity-top-k >= 1; --memory-budget > 0")
+    if args.data:
+        shards = partition_dataset(args.data, os.path.join(args.workdir, 'input'), args.partitions)
+    else:
+        shards = args.shards or []
+    if not shards:
+        logger.error("Nenhum shard de entrada (--shards ou --data)")
+        return 1
+
+    start = time.time()
+    try:
+        statistics = run_analysis(shards, args.workdir, args.output, args.workers, args.clusters, args.clustering,
+                                  args.memory_budget, args.similarity_top_k, 0.0, args.similarity_encoding,
+                                  args.similarity_jobs, not args.no_layout, args.stale_after)
+    except JobError as e:
+        logger.error(str(e))
+        return 1
+    logger.info(f"Análise distribuída concluída em {time.time() - start:.1f}s: {statistics}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
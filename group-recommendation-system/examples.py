@@ -3,6 +3,7 @@
 Exemplo de uso do Steam User Miner com configurações personalizadas.
 """
 
+from dataset_loader import DatasetError, load_dataset
 from steam_user_miner import SteamUserMiner
 import os
 
@@ -50,8 +51,7 @@ def analyze_collected_data():
     import json
     
     try:
-        with open('steam_user_data.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_dataset('steam_user_data.json').users
         
         print(f"Total de usuários coletados: {len(data)}")
         
@@ -86,7 +86,7 @@ def analyze_collected_data():
             
     except FileNotFoundError:
         print("Arquivo steam_user_data.json não encontrado. Execute o minerador primeiro.")
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, DatasetError):
         print("Erro ao ler o arquivo JSON.")
 
 
@@ -95,56 +95,31 @@ def simple_friendship_analysis():
     import json
     
     try:
-        with open('steam_user_data.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        dataset = load_dataset('steam_user_data.json')
+        data = dataset.users
         
         print(f"Analisando amizades de {len(data)} usuários...")
         
-        # Criar mapa de usuários coletados
-        collected_users = {user['steam_id']: user for user in data}
-        
-        # Contar conexões mútuas (amizades bidirecionais)
-        mutual_friendships = 0
-        friendship_pairs = set()
-        
-        for user in data:
-            user_id = user['steam_id']
-            friends = user['friends_list']['friends']
-            
-            for friend_id in friends:
-                if friend_id in collected_users:
-                    # Verificar se é amizade mútua
-                    friend_data = collected_users[friend_id]
-                    if user_id in friend_data['friends_list']['friends']:
-                        # Criar par ordenado para evitar duplicatas
-                        pair = tuple(sorted([user_id, friend_id]))
-                        friendship_pairs.add(pair)
-        
-        mutual_friendships = len(friendship_pairs)
+        # Grafo CSR compartilhado (do cache do dataset_loader): amizades
+        # mútuas e conexões internas
+        graph = dataset.graph
+        mutual_friendships = graph.num_mutual_edges
         
         print(f"Amizades mútuas encontradas: {mutual_friendships}")
         print(f"Densidade de conexões: {(mutual_friendships * 2) / (len(data) * (len(data) - 1)) * 100:.2f}%")
         
-        # Encontrar usuários mais conectados no dataset
-        internal_connections = {}
-        for user in data:
-            user_id = user['steam_id']
-            friends_in_dataset = sum(1 for friend_id in user['friends_list']['friends'] 
-                                   if friend_id in collected_users)
-            internal_connections[user_id] = friends_in_dataset
-        
-        # Top 5 usuários mais conectados
-        top_connected = sorted(internal_connections.items(), key=lambda x: x[1], reverse=True)[:5]
+        # Top 5 usuários mais conectados (amigos listados que estão no dataset)
+        internal_connections = graph.out_degree()
+        top_connected = sorted(range(graph.num_nodes), key=lambda i: internal_connections[i], reverse=True)[:5]
         
         print("\nTop 5 usuários mais conectados no dataset:")
-        for user_id, connections in top_connected:
-            user_data = collected_users[user_id]
-            name = user_data['profile_info']['personaname']
-            print(f"  {name}: {connections} amigos no dataset")
+        for i in top_connected:
+            name = data[i]['profile_info']['personaname']
+            print(f"  {name}: {internal_connections[i]} amigos no dataset")
             
     except FileNotFoundError:
         print("Arquivo steam_user_data.json não encontrado. Execute o minerador primeiro.")
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, DatasetError):
         print("Erro ao ler o arquivo JSON.")
 
 
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Friendship Graph
+
+Estrutura compartilhada do grafo de amizades em formato CSR (compressed
+sparse row), construída uma única vez a partir dos dados coletados.
+
+Os nós são índices inteiros (0..n-1, na ordem do dataset) e cada entrada da
+adjacência carrega flags de direção:
+- OUTGOING: o usuário da linha lista o vizinho como amigo
+- INCOMING: o vizinho lista o usuário da linha como amigo
+Uma amizade é mútua quando as duas flags estão presentes.
+
+A adjacência é não direcionada (uma aresta existe se qualquer um dos lados
+listar o outro), com vizinhos ordenados em cada linha. Adaptadores para
+NetworkX e SciPy existem apenas para os algoritmos que precisarem deles.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Flags de direção das entradas da adjacência
+OUTGOING = 1
+INCOMING = 2
+MUTUAL = OUTGOING | INCOMING
+
+
+class FriendshipGraph:
+    """Grafo de amizades em CSR com IDs inteiros e flags mútua/unilateral."""
+
+    def __init__(self, steam_ids: List[str], indptr: np.ndarray, indices: np.ndarray,
+                 flags: np.ndarray, node_attributes: Optional[Dict[str, list]] = None):
+        """
+        Inicializa o grafo a partir dos arrays CSR.
+
+        Args:
+            steam_ids: SteamID de cada nó (posição = índice inteiro)
+            indptr: Início da linha de cada nó em `indices` (n + 1)
+            indices: Vizinhos de cada nó, ordenados por linha
+            flags: Flags de direção de cada entrada (OUTGOING/INCOMING)
+            node_attributes: Atributos por nó ({nome: lista de valores})
+        """
+        self.steam_ids = steam_ids
+        self.index = {steam_id: i for i, steam_id in enumerate(steam_ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.flags = flags
+        self.node_attributes = node_attributes or {}
+
+    @classmethod
+    def from_users(cls, users_data: List[Dict]) -> 'FriendshipGraph':
+        """
+        Constrói o grafo a partir da lista de usuários do steam_user_miner.
+
+        Apenas amizades entre usuários presentes no dataset viram arestas.
+        """
+        steam_ids = [user['steam_id'] for user in users_data]
+        index = {steam_id: i for i, steam_id in enumerate(steam_ids)}
+        n = len(steam_ids)
+
+        # Pares direcionados (quem lista -> quem é listado)
+        sources = []
+        targets = []
+        for i, user in enumerate(users_data):
+            for friend_id in user.get('friends_list', {}).get('friends', []):
+                j = index.get(friend_id)
+                if j is not None and j != i:
+                    sources.append(i)
+                    targets.append(j)
+
+        sources = np.array(sources, dtype=np.int64)
+        targets = np.array(targets, dtype=np.int64)
+
+        # Cada par direcionado gera duas entradas: (i -> j, OUTGOING) e (j -> i, INCOMING)
+        rows = np.concatenate([sources, targets])
+        cols = np.concatenate([targets, sources])
+        entry_flags = np.concatenate([np.full(len(sources), OUTGOING, dtype=np.uint8),
+                                      np.full(len(sources), INCOMING, dtype=np.uint8)])
+
+        # Agrupar entradas repetidas somando as flags por OR
+        keys = rows * max(n, 1) + cols
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        entry_flags = entry_flags[order]
+        if len(keys):
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            flags = np.bitwise_or.reduceat(entry_flags, starts)
+            keys = keys[starts]
+        else:
+            flags = entry_flags
+
+        rows = keys // max(n, 1)
+        indices = (keys % max(n, 1)).astype(np.int32)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+
+        profiles = [user.get('profile_info', {}) for user in users_data]
+        node_attributes = {
+            'name': [p.get('personaname', 'Unknown') for p in profiles],
+            'country': [p.get('loccountrycode', 'Unknown') for p in profiles],
+            'game_count': [user.get('owned_games', {}).get('game_count', 0) for user in users_data],
+            'friend_count': [user.get('friends_list', {}).get('friend_count', 0) for user in users_data]
+        }
+
+        return cls(steam_ids, indptr, indices, flags.astype(np.uint8), node_attributes)
+
+    @property
+    def num_nodes(self) -> int:
+        """Número de nós."""
+        return len(self.steam_ids)
+
+    @property
+    def num_edges(self) -> int:
+        """Número de arestas não direcionadas (mútuas ou não)."""
+        return len(self.indices) // 2
+
+    @property
+    def num_mutual_edges(self) -> int:
+        """Número de amizades mútuas."""
+        return int(np.count_nonzero(self.flags == MUTUAL)) // 2
+
+    def density(self) -> float:
+        """Densidade do grafo não direcionado."""
+        n = self.num_nodes
+        return 2 * self.num_edges / (n * (n - 1)) if n > 1 else 0.0
+
+    def neighbors(self, node: int, mutual_only: bool = False) -> np.ndarray:
+        """Vizinhos (ordenados) de um nó."""
+        start, stop = self.indptr[node], self.indptr[node + 1]
+        neighbors = self.indices[start:stop]
+        if mutual_only:
+            neighbors = neighbors[self.flags[start:stop] == MUTUAL]
+        return neighbors
+
+    def degree(self, mutual_only: bool = False) -> np.ndarray:
+        """Grau de cada nó no grafo não direcionado (ou só amizades mútuas)."""
+        if not mutual_only:
+            return np.diff(self.indptr)
+        return self._row_count(self.flags == MUTUAL)
+
+    def out_degree(self) -> np.ndarray:
+        """Quantos amigos do dataset cada usuário lista na própria friends_list."""
+        return self._row_count((self.flags & OUTGOING) != 0)
+
+    def _row_count(self, mask: np.ndarray) -> np.ndarray:
+        """Conta as entradas marcadas em `mask` por linha."""
+        rows = np.repeat(np.arange(self.num_nodes), np.diff(self.indptr))
+        return np.bincount(rows[mask], minlength=self.num_nodes)
+
+    def edges(self, mutual_only: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Arestas não direcionadas com origem < destino.
+
+        Returns:
+            Tupla (origens, destinos, flags vistas a partir da origem)
+        """
+        rows = np.repeat(np.arange(self.num_nodes), np.diff(self.indptr))
+        mask = rows < self.indices
+        if mutual_only:
+            mask &= self.flags == MUTUAL
+        return rows[mask], self.indices[mask].astype(np.int64), self.flags[mask]
+
+    def bfs(self, source: int, mutual_only: bool = False) -> np.ndarray:
+        """Distâncias (em saltos) de `source` a todos os nós; -1 se inalcançável."""
+        dist = np.full(self.num_nodes, -1, dtype=np.int64)
+        dist[source] = 0
+        frontier = np.array([source], dtype=np.int64)
+        level = 0
+        while len(frontier):
+            level += 1
+            neighbors = np.concatenate([self.neighbors(v, mutual_only) for v in frontier])
+            neighbors = np.unique(neighbors)
+            neighbors = neighbors[dist[neighbors] < 0]
+            dist[neighbors] = level
+            frontier = neighbors
+        return dist
+
+    def connected_components(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Componentes conexos em uma única passada de union-find vetorizado.
+
+        Cada rodada liga a raiz de maior rótulo de cada aresta à de menor
+        rótulo (hooking) e achata as árvores (pointer jumping) até que todas
+        as arestas tenham as duas pontas na mesma raiz.
+
+        Returns:
+            Tupla (rótulo 0..c-1 de cada nó, tamanho de cada componente)
+        """
+        parent = np.arange(self.num_nodes, dtype=np.int64)
+        sources, targets, _ = self.edges()
+
+        while len(sources):
+            root_u = parent[sources]
+            root_v = parent[targets]
+            pending = root_u != root_v
+            if not pending.any():
+                break
+            low = np.minimum(root_u[pending], root_v[pending])
+            high = np.maximum(root_u[pending], root_v[pending])
+            np.minimum.at(parent, high, low)
+
+            # Pointer jumping: cada nó passa a apontar direto para a raiz
+            while True:
+                grandparent = parent[parent]
+                if np.array_equal(grandparent, parent):
+                    break
+                parent = grandparent
+
+            # Só as arestas ainda entre componentes diferentes importam
+            sources = sources[pending]
+            targets = targets[pending]
+
+        _, labels = np.unique(parent, return_inverse=True)
+        sizes = np.bincount(labels)
+        return labels, sizes
+
+    def triangles(self, max_wedges: int = 5_000_000) -> np.ndarray:
+        """
+        Número de triângulos que passam por cada nó.
+
+        As arestas são orientadas do nó de menor para o de maior grau; para
+        cada nó u, os pares (v, w) de vizinhos "à frente" formam cunhas que
+        fecham um triângulo quando a aresta (v, w) existe. A verificação é
+        uma busca binária vetorizada na lista ordenada de arestas, e cada
+        triângulo é contado exatamente uma vez (a partir do seu nó de menor
+        posto). Custo O(m^1.5).
+
+        Args:
+            max_wedges: Cunhas processadas por lote (limita a memória)
+        """
+        n = self.num_nodes
+        counts = np.zeros(n, dtype=np.int64)
+        sources, targets, _ = self.edges()
+        if not len(sources):
+            return counts
+
+        # Posto de cada nó: grau, desempatado pelo índice
+        degree = self.degree()
+        rank = np.empty(n, dtype=np.int64)
+        rank[np.lexsort((np.arange(n), degree))] = np.arange(n)
+
+        # Adjacência orientada (u -> v com rank[u] < rank[v]), ordenada por posto
+        forward = rank[sources] < rank[targets]
+        tail = np.where(forward, sources, targets)
+        head = np.where(forward, targets, sources)
+        order = np.lexsort((rank[head], tail))
+        tail = tail[order]
+        head = head[order]
+        row_end = np.cumsum(np.bincount(tail, minlength=n))[tail]
+
+        # Chaves ordenadas das arestas não direcionadas para busca binária
+        edge_keys = np.sort(np.minimum(sources, targets) * n + np.maximum(sources, targets))
+
+        # Cunhas: cada entrada e se combina com as entradas seguintes da mesma linha
+        pairs_per_entry = row_end - np.arange(len(tail)) - 1
+        entry = 0
+        while entry < len(tail):
+            # Lote de entradas cujo total de cunhas cabe em max_wedges
+            cumulative = np.cumsum(pairs_per_entry[entry:])
+            stop = entry + max(1, int(np.searchsorted(cumulative, max_wedges, side='right')))
+            batch = np.arange(entry, stop)
+            repeats = pairs_per_entry[batch]
+            total = int(repeats.sum())
+            entry = stop
+            if total == 0:
+                continue
+
+            first = np.repeat(batch, repeats)
+            offsets = np.arange(total) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+            second = first + 1 + offsets
+
+            v = head[first]
+            w = head[second]
+            keys = np.minimum(v, w) * n + np.maximum(v, w)
+            position = np.minimum(np.searchsorted(edge_keys, keys), len(edge_keys) - 1)
+            closed = edge_keys[position] == keys
+
+            np.add.at(counts, tail[first[closed]], 1)
+            np.add.at(counts, v[closed], 1)
+            np.add.at(counts, w[closed], 1)
+
+        return counts
+
+    def clustering(self) -> np.ndarray:
+        """Coeficiente de clustering local de cada nó."""
+        degree = self.degree()
+        possible = degree * (degree - 1)
+        result = np.zeros(self.num_nodes)
+        mask = possible > 0
+        result[mask] = 2 * self.triangles()[mask] / possible[mask]
+        return result
+
+    def summary(self) -> Dict:
+        """
+        Métricas estruturais do grafo em uma única varredura.
+
+        Componentes (com tamanhos) vêm de uma passada de union-find e
+        triângulos/clustering de uma passada de interseção de adjacências.
+        """
+        labels, sizes = self.connected_components()
+        degree = self.degree()
+        triangles = self.triangles()
+
+        possible = degree * (degree - 1)
+        local_clustering = np.zeros(self.num_nodes)
+        mask = possible > 0
+        local_clustering[mask] = 2 * triangles[mask] / possible[mask]
+        connected_triples = int((possible // 2).sum())
+
+        largest = int(sizes.argmax()) if len(sizes) else -1
+        return {
+            'nodes': self.num_nodes,
+            'edges': self.num_edges,
+            'mutual_edges': self.num_mutual_edges,
+            'density': self.density(),
+            'is_connected': len(sizes) == 1,
+            'connected_components': len(sizes),
+            'component_sizes': sorted(sizes.tolist(), reverse=True),
+            'component_labels': labels,
+            'largest_component': np.flatnonzero(labels == largest),
+            'triangles': int(triangles.sum()) // 3,
+            'avg_clustering': float(local_clustering.mean()) if self.num_nodes else 0.0,
+            'transitivity': (int(triangles.sum()) / connected_triples) if connected_triples else 0.0
+        }
+
+    def subgraph(self, nodes: np.ndarray) -> 'FriendshipGraph':
+        """Subgrafo induzido pelos nós dados (reindexados na ordem recebida)."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        mapping = np.full(self.num_nodes, -1, dtype=np.int64)
+        mapping[nodes] = np.arange(len(nodes))
+
+        starts = self.indptr[nodes]
+        stops = self.indptr[nodes + 1]
+        positions = np.concatenate([np.arange(a, b) for a, b in zip(starts.tolist(), stops.tolist())]
+                                   or [np.zeros(0, dtype=np.int64)])
+        rows = np.repeat(np.arange(len(nodes)), stops - starts)
+        cols = mapping[self.indices[positions]]
+        keep = cols >= 0
+
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[keep], minlength=len(nodes)), out=indptr[1:])
+        # As colunas continuam ordenadas se os nós vierem em ordem crescente
+        indices = cols[keep].astype(np.int32)
+        flags = self.flags[positions][keep]
+        if np.any(np.diff(nodes) < 0):
+            order = np.lexsort((indices, rows[keep]))
+            indices = indices[order]
+            flags = flags[order]
+
+        node_list = nodes.tolist()
+        return FriendshipGraph([self.steam_ids[i] for i in node_list], indptr, indices, flags,
+                               {name: [values[i] for i in node_list]
+                                for name, values in self.node_attributes.items()})
+
+    def adjacency_lists(self) -> List[List[int]]:
+        """Listas de adjacência em Python (para laços puros como BFS de Brandes)."""
+        indices = self.indices.tolist()
+        indptr = self.indptr.tolist()
+        return [indices[indptr[i]:indptr[i + 1]] for i in range(self.num_nodes)]
+
+    def to_scipy(self):
+        """
+        Matriz de adjacência SciPy (CSR) com as flags de direção como valores.
+
+        O SciPy usa um único tipo para `indices` (int32 aqui) e `indptr`
+        (int64), então ao menos um dos dois é convertido (cópia linear, sem
+        refazer a ordenação).
+        """
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("Para o adaptador SciPy, instale: pip install scipy")
+
+        n = self.num_nodes
+        return csr_matrix((self.flags, self.indices, self.indptr), shape=(n, n), copy=False)
+
+    def to_networkx(self, mutual_only: bool = False):
+        """
+        Grafo NetworkX equivalente, com os atributos dos nós.
+
+        Usar apenas quando um algoritmo específico do NetworkX for necessário.
+        """
+        import networkx as nx
+
+        G = nx.Graph()
+        attribute_names = list(self.node_attributes)
+        for i, steam_id in enumerate(self.steam_ids):
+            G.add_node(steam_id, **{name: self.node_attributes[name][i] for name in attribute_names})
+
+        sources, targets, _ = self.edges(mutual_only)
+        ids = self.steam_ids
+        G.add_edges_from((ids[u], ids[v]) for u, v in zip(sources.tolist(), targets.tolist()))
+        return G
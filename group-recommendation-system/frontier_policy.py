@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Frontier Policies
+
+Políticas de expansão da fronteira de coleta: decidem quais amigos de um
+usuário coletado entram na fronteira e com que prioridade. A fronteira
+continua deduplicada, então nenhuma política revisita usuários.
+
+Políticas:
+- bfs: FIFO puro (comportamento original do minerador)
+- mutual: fila de prioridade pelo número de amigos em comum com usuários já
+  coletados (cada usuário coletado que lista o amigo soma 1 à prioridade),
+  favorecendo o núcleo denso do grafo social
+- public: como mutual, mais um prior de perfil público obtido com
+  GetPlayerSummaries em lotes de 100; perfis privados (que não contribuem
+  jogos para o grafo de similaridade) são descartados ou penalizados
+
+Todas aceitam um limite de grau: no máximo `degree_cap` amigos de cada
+usuário entram na fronteira, o que evita que hubs (perfis com milhares de
+amigos) dominem a fila.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+from typing import Dict, List, Optional, Set, Type
+
+# communityvisibilitystate de perfis públicos na Steam Web API
+PUBLIC_VISIBILITY = 3
+
+
+class FrontierPolicy:
+    """Política base: FIFO com limite de grau opcional."""
+
+    name = 'bfs'
+
+    def __init__(self, degree_cap: Optional[int] = None):
+        """
+        Args:
+            degree_cap: Máximo de amigos de cada usuário adicionados à
+                fronteira (None = sem limite)
+        """
+        self.degree_cap = degree_cap
+
+    def select(self, friends: List[str]) -> List[str]:
+        """Aplica o limite de grau à lista de amigos."""
+        if self.degree_cap is not None:
+            return friends[:self.degree_cap]
+        return friends
+
+    def enqueue(self, miner, steam_id: str, friends: List[str]) -> int:
+        """
+        Adiciona os amigos de um usuário coletado à fronteira do minerador.
+
+        Args:
+            miner: SteamUserMiner (fronteira e acesso à API)
+            steam_id: Usuário coletado
+            friends: SteamIDs dos amigos
+
+        Returns:
+            Número de SteamIDs novos na fronteira
+        """
+        return miner.frontier.add(self.select(friends))
+
+
+class FifoPolicy(FrontierPolicy):
+    """BFS: amigos entram em ordem de descoberta."""
+
+
+class MutualFriendPolicy(FrontierPolicy):
+    """Prioridade pelo número de amigos em comum com usuários já coletados."""
+
+    name = 'mutual'
+
+    def enqueue(self, miner, steam_id: str, friends: List[str]) -> int:
+        return miner.frontier.bump(self.select(friends), 1.0)
+
+
+class PublicProfilePolicy(MutualFriendPolicy):
+    """
+    Amigos em comum + prior de perfil público.
+
+    Os perfis dos amigos ainda não vistos são consultados em lote (uma
+    requisição a cada 100 amigos). Perfis privados são descartados (ou,
+    com skip_private=False, entram sem o bônus de perfil público).
+    """
+
+    name = 'public'
+
+    def __init__(self, degree_cap: Optional[int] = None, public_bonus: float = 2.0,
+                 skip_private: bool = True):
+        """
+        Args:
+            degree_cap: Máximo de amigos de cada usuário adicionados à fronteira
+            public_bonus: Prioridade inicial de perfis públicos (em "amigos em comum")
+            skip_private: Se True, perfis privados não entram na fronteira
+        """
+        super().__init__(degree_cap)
+        self.public_bonus = public_bonus
+        self.skip_private = skip_private
+        # Perfis privados descartados (para não consultá-los de novo)
+        self.private: Set[str] = set()
+
+    def enqueue(self, miner, steam_id: str, friends: List[str]) -> int:
+        friends = [friend for friend in self.select(friends) if friend not in self.private]
+        frontier = miner.frontier
+
+        # Já vistos: apenas soma um amigo em comum
+        new = set(frontier.unseen(friends))
+        frontier.bump([friend for friend in friends if friend not in new], 1.0)
+        if not new:
+            return 0
+
+        summaries = miner.get_player_summaries(sorted(new))
+        public = sorted(friend for friend in new
+                        if summaries.get(friend, {}).get('communityvisibilitystate') == PUBLIC_VISIBILITY)
+        private = sorted(new.difference(public))
+
+        added = frontier.add(public, 1.0 + self.public_bonus)
+        if self.skip_private:
+            self.private.update(private)
+        else:
+            added += frontier.add(private, 1.0)
+        return added
+
+
+POLICIES: Dict[str, Type[FrontierPolicy]] = {
+    FifoPolicy.name: FifoPolicy,
+    MutualFriendPolicy.name: MutualFriendPolicy,
+    PublicProfilePolicy.name: PublicProfilePolicy,
+}
+
+
+def make_policy(name: str = 'bfs', degree_cap: Optional[int] = None) -> FrontierPolicy:
+    """
+    Cria uma política pelo nome.
+
+    Args:
+        name: 'bfs', 'mutual' ou 'public'
+        degree_cap: Máximo de amigos de cada usuário adicionados à fronteira
+
+    Returns:
+        Instância de FrontierPolicy
+    """
+    if name not in POLICIES:
+        raise ValueError(f"Política desconhecida: {name} (opções: {', '.join(POLICIES)})")
+    return POLICIES[name](degree_cap=degree_cap)
@@ -9,19 +9,23 @@ Dependências adicionais:
 pip install networkx matplotlib pandas seaborn
 """
 
-import json
 import networkx as nx
 import matplotlib.pyplot as plt
 import pandas as pd
 from collections import Counter
 import numpy as np
 
+from approximate_metrics import APPROXIMATE_THRESHOLD, DEFAULT_SAMPLES, sample_graph_metrics
+from dataset_loader import load_dataset
+from friendship_graph import FriendshipGraph
+from graph_layout import compute_layout
+from louvain import csr_from_edges, louvain_levels, modularity
+
 
 def load_steam_data(filename: str = 'steam_user_data.json') -> list:
-    """Carrega os dados coletados do arquivo JSON."""
+    """Carrega os dados coletados do arquivo JSON (pelo cache do dataset_loader)."""
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_dataset(filename).users
     except FileNotFoundError:
         print(f"Arquivo {filename} não encontrado!")
         return []
@@ -31,44 +35,45 @@ def create_friendship_graph(users_data: list) -> nx.Graph:
     """
     Cria um grafo de amizades a partir dos dados coletados.
     
+    A estrutura de adjacência é a FriendshipGraph (CSR) compartilhada; o grafo
+    NetworkX é gerado a partir dela para os algoritmos que precisam dele.
+    
     Args:
         users_data: Lista de dados de usuários do steam_user_miner
         
     Returns:
         Grafo NetworkX com usuários como nós e amizades como arestas
     """
-    G = nx.Graph()
+    # Só existem arestas entre usuários presentes no dataset
+    return FriendshipGraph.from_users(users_data).to_networkx()
+
+
+def _use_approximation(num_nodes: int, approximate) -> bool:
+    """Decide o modo: explícito, ou automático acima de APPROXIMATE_THRESHOLD nós."""
+    if approximate is None:
+        return num_nodes > APPROXIMATE_THRESHOLD
+    return approximate
+
+
+def analyze_graph_metrics(G, approximate: bool = None,
+                          samples: int = DEFAULT_SAMPLES, workers: int = None) -> dict:
+    """
+    Calcula métricas básicas do grafo.
     
-    # Criar conjunto de todos os usuários coletados
-    collected_users = {user['steam_id'] for user in users_data}
+    Com uma FriendshipGraph, componentes e clustering saem de uma única
+    varredura sobre o CSR (ver analyze_csr_metrics); com um grafo NetworkX,
+    são usadas as funções do NetworkX.
     
-    # Adicionar nós com atributos do perfil
-    for user in users_data:
-        user_id = user['steam_id']
-        profile = user['profile_info']
-        
-        # Adicionar nó com atributos úteis
-        G.add_node(user_id, 
-                  name=profile.get('personaname', 'Unknown'),
-                  country=profile.get('loccountrycode', 'Unknown'),
-                  game_count=user['owned_games'].get('game_count', 0),
-                  friend_count=user['friends_list'].get('friend_count', 0))
-    
-    # Adicionar arestas de amizade (apenas entre usuários coletados)
-    for user in users_data:
-        user_id = user['steam_id']
-        friends = user['friends_list'].get('friends', [])
-        
-        for friend_id in friends:
-            # Só criar aresta se ambos os usuários estão no dataset
-            if friend_id in collected_users and user_id != friend_id:
-                G.add_edge(user_id, friend_id)
+    Args:
+        G: Grafo de amizades (NetworkX ou FriendshipGraph)
+        approximate: Estimar diâmetro e caminho médio por amostragem de BFS
+            (None = automático para grafos grandes)
+        samples: Orçamento de fontes amostradas no modo aproximado
+        workers: Processos usados no modo aproximado
+    """
+    if isinstance(G, FriendshipGraph):
+        return analyze_csr_metrics(G, approximate, samples, workers)
     
-    return G
-
-
-def analyze_graph_metrics(G: nx.Graph) -> dict:
-    """Calcula métricas básicas do grafo."""
     metrics = {
         'nodes': G.number_of_nodes(),
         'edges': G.number_of_edges(),
@@ -77,72 +82,172 @@ def analyze_graph_metrics(G: nx.Graph) -> dict:
         'connected_components': nx.number_connected_components(G)
     }
     
+    approximate = _use_approximation(G.number_of_nodes(), approximate)
+    
     if metrics['is_connected']:
-        metrics['diameter'] = nx.diameter(G)
-        metrics['avg_path_length'] = nx.average_shortest_path_length(G)
+        target = G
+        prefix = ''
     else:
         # Para grafos desconectados, usar o maior componente
         largest_cc = max(nx.connected_components(G), key=len)
-        subgraph = G.subgraph(largest_cc)
+        target = G.subgraph(largest_cc)
+        prefix = 'largest_component_'
         metrics['largest_component_size'] = len(largest_cc)
-        metrics['largest_component_diameter'] = nx.diameter(subgraph)
-        metrics['largest_component_avg_path'] = nx.average_shortest_path_length(subgraph)
+    
+    if approximate:
+        _add_path_metrics(metrics, prefix, sample_graph_metrics(target, samples=samples, workers=workers))
+    else:
+        metrics[prefix + 'diameter'] = nx.diameter(target)
+        metrics[prefix + ('avg_path' if prefix else 'avg_path_length')] = nx.average_shortest_path_length(target)
     
     metrics['avg_clustering'] = nx.average_clustering(G)
     
     return metrics
 
 
-def find_influential_users(G: nx.Graph, top_n: int = 10) -> dict:
-    """Encontra usuários mais influentes usando diferentes métricas de centralidade."""
+def analyze_csr_metrics(graph: FriendshipGraph, approximate: bool = None,
+                        samples: int = DEFAULT_SAMPLES, workers: int = None) -> dict:
+    """
+    Calcula as mesmas métricas de analyze_graph_metrics sobre o grafo CSR.
+    
+    Componentes, tamanhos, triângulos e clustering vêm de FriendshipGraph.summary();
+    diâmetro e caminho médio vêm de BFS sobre o maior componente (todas as
+    fontes no modo exato, uma amostra no modo aproximado).
+    """
+    summary = graph.summary()
+    metrics = {
+        'nodes': summary['nodes'],
+        'edges': summary['edges'],
+        'density': summary['density'],
+        'is_connected': summary['is_connected'],
+        'connected_components': summary['connected_components']
+    }
+    
+    if summary['is_connected']:
+        target = graph
+        prefix = ''
+    else:
+        target = graph.subgraph(summary['largest_component'])
+        prefix = 'largest_component_'
+        metrics['largest_component_size'] = target.num_nodes
+    
+    if _use_approximation(graph.num_nodes, approximate):
+        _add_path_metrics(metrics, prefix, sample_graph_metrics(target, samples=samples, workers=workers))
+    else:
+        # BFS a partir de todas as fontes = valores exatos
+        exact = sample_graph_metrics(target, samples=target.num_nodes, workers=workers)
+        metrics[prefix + 'diameter'] = exact['diameter']
+        metrics[prefix + ('avg_path' if prefix else 'avg_path_length')] = exact['avg_path_length']
+    
+    metrics['avg_clustering'] = summary['avg_clustering']
+    
+    return metrics
+
+
+def _add_path_metrics(metrics: dict, prefix: str, sampled: dict):
+    """Copia diâmetro e caminho médio estimados (com limites de erro) para as métricas."""
+    metrics[prefix + 'diameter'] = sampled['diameter']
+    metrics[prefix + 'diameter_upper_bound'] = sampled['diameter_upper_bound']
+    metrics[prefix + ('avg_path' if prefix else 'avg_path_length')] = sampled['avg_path_length']
+    metrics['avg_path_error_bound'] = sampled['error_bounds']['avg_path_length']
+    metrics['samples'] = sampled['samples']
+
+
+def find_influential_users(G: nx.Graph, top_n: int = 10, approximate: bool = None,
+                           samples: int = DEFAULT_SAMPLES, workers: int = None) -> dict:
+    """
+    Encontra usuários mais influentes usando diferentes métricas de centralidade.
+    
+    Args:
+        G: Grafo de amizades
+        top_n: Número de usuários por métrica
+        approximate: Estimar betweenness/closeness por amostragem de pivôs
+            (None = automático para grafos grandes)
+        samples: Orçamento de fontes amostradas no modo aproximado
+        workers: Processos usados no modo aproximado
+    """
     
     # Diferentes métricas de centralidade
     degree_centrality = nx.degree_centrality(G)
-    betweenness_centrality = nx.betweenness_centrality(G)
-    closeness_centrality = nx.closeness_centrality(G)
+    
+    error_bounds = None
+    if _use_approximation(G.number_of_nodes(), approximate):
+        sampled = sample_graph_metrics(G, samples=samples, workers=workers)
+        betweenness_centrality = sampled['betweenness']
+        closeness_centrality = sampled['closeness']
+        error_bounds = sampled['error_bounds']
+    else:
+        betweenness_centrality = nx.betweenness_centrality(G)
+        closeness_centrality = nx.closeness_centrality(G)
     
     # Top usuários por cada métrica
     top_degree = sorted(degree_centrality.items(), key=lambda x: x[1], reverse=True)[:top_n]
     top_betweenness = sorted(betweenness_centrality.items(), key=lambda x: x[1], reverse=True)[:top_n]
     top_closeness = sorted(closeness_centrality.items(), key=lambda x: x[1], reverse=True)[:top_n]
     
-    return {
+    result = {
         'degree_centrality': top_degree,
         'betweenness_centrality': top_betweenness,
         'closeness_centrality': top_closeness
     }
+    if error_bounds:
+        result['error_bounds'] = error_bounds
+    
+    return result
 
 
-def analyze_communities(G: nx.Graph):
-    """Detecta comunidades no grafo."""
-    try:
-        # Usar algoritmo de Louvain para detecção de comunidades
-        import community as community_louvain
-        partition = community_louvain.best_partition(G)
-        
-        # Contar tamanho das comunidades
-        community_sizes = Counter(partition.values())
-        
-        return {
-            'num_communities': len(community_sizes),
-            'community_sizes': dict(community_sizes),
-            'partition': partition
-        }
-    except ImportError:
-        print("Para análise de comunidades, instale: pip install python-louvain")
-        return None
+def analyze_communities(G, resolution: float = 1.0, seed: int = 42):
+    """
+    Detecta comunidades no grafo com o Louvain nativo (louvain.py).
+    
+    Args:
+        G: Grafo de amizades (NetworkX ou FriendshipGraph)
+        resolution: Resolução do Louvain (maior = comunidades menores)
+        seed: Semente da ordem de visita (resultado determinístico)
+    """
+    if isinstance(G, FriendshipGraph):
+        node_ids = G.steam_ids
+        indptr, indices = G.indptr, G.indices
+        weights = np.ones(len(indices))
+    else:
+        node_ids = list(G.nodes())
+        index = {node: i for i, node in enumerate(node_ids)}
+        edge_array = np.array([(index[u], index[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+        indptr, indices, weights = csr_from_edges(len(node_ids), edge_array[:, 0], edge_array[:, 1])
+    
+    levels = louvain_levels(indptr, indices, weights, resolution=resolution, seed=seed)
+    labels = levels[-1]
+    
+    # Contar tamanho das comunidades
+    community_sizes = Counter(labels.tolist())
+    
+    return {
+        'num_communities': len(community_sizes),
+        'community_sizes': dict(community_sizes),
+        'partition': dict(zip(node_ids, labels.tolist())),
+        'modularity': modularity(indptr, indices, weights, labels, resolution),
+        'levels': len(levels)
+    }
 
 
-def visualize_graph(G: nx.Graph, filename: str = 'steam_friendship_graph.png'):
-    """Cria visualização básica do grafo."""
+def visualize_graph(G: nx.Graph, filename: str = 'steam_friendship_graph.png',
+                    previous_layout: dict = None) -> dict:
+    """
+    Cria visualização básica do grafo.
+    
+    Args:
+        G: Grafo de amizades
+        filename: Arquivo PNG de saída
+        previous_layout: Layout anterior {id: (x, y)} para reaproveitar
+            (por exemplo, as coordenadas de steam_graph_data.json)
+        
+    Returns:
+        Layout usado {id: (x, y)}
+    """
     plt.figure(figsize=(12, 8))
     
-    # Layout do grafo
-    if G.number_of_nodes() < 100:
-        pos = nx.spring_layout(G, k=1, iterations=50)
-    else:
-        # Para grafos grandes, usar layout mais rápido
-        pos = nx.spring_layout(G, k=3, iterations=20)
+    # Layout do grafo (aproximação em grade, reaproveitando o anterior)
+    pos, _ = compute_layout(list(G.nodes()), G.edges(), previous=previous_layout)
     
     # Tamanho dos nós baseado no número de amigos
     node_sizes = [G.nodes[node].get('friend_count', 1) * 2 for node in G.nodes()]
@@ -158,6 +263,8 @@ def visualize_graph(G: nx.Graph, filename: str = 'steam_friendship_graph.png'):
     plt.title(f"Grafo de Amizades da Steam\n{G.number_of_nodes()} usuários, {G.number_of_edges()} conexões")
     plt.savefig(filename, dpi=300, bbox_inches='tight')
     plt.show()
+    
+    return pos
 
 
 def create_statistics_report(users_data: list, G: nx.Graph):
@@ -203,7 +310,11 @@ def create_statistics_report(users_data: list, G: nx.Graph):
 def main():
     """Função principal para executar todas as análises."""
     print("🔍 Carregando dados da Steam...")
-    users_data = load_steam_data()
+    try:
+        dataset = load_dataset('steam_user_data.json')
+    except FileNotFoundError:
+        dataset = None
+    users_data = dataset.users if dataset else []
     
     if not users_data:
         print("❌ Nenhum dado encontrado. Execute primeiro o steam_user_miner.py")
@@ -215,12 +326,13 @@ def main():
     create_statistics_report(users_data, None)
     
     print("\n🕸️ Construindo grafo de amizades...")
-    G = create_friendship_graph(users_data)
+    graph = dataset.graph
+    G = graph.to_networkx()
     
     print(f"✅ Grafo criado com {G.number_of_nodes()} nós e {G.number_of_edges()} arestas")
     
     print("\n📈 Calculando métricas do grafo...")
-    metrics = analyze_graph_metrics(G)
+    metrics = analyze_graph_metrics(graph)
     
     print("=== MÉTRICAS DO GRAFO ===")
     for key, value in metrics.items():
@@ -238,9 +350,10 @@ def main():
         print(f"  {name} ({user_id}): {centrality:.4f}")
     
     print("\n🏘️ Analisando comunidades...")
-    communities = analyze_communities(G)
+    communities = analyze_communities(graph)
     if communities:
-        print(f"Número de comunidades detectadas: {communities['num_communities']}")
+        print(f"Número de comunidades detectadas: {communities['num_communities']} "
+              f"(modularidade: {communities['modularity']:.4f})")
         print("Tamanho das maiores comunidades:")
         sorted_communities = sorted(communities['community_sizes'].items(), 
                                    key=lambda x: x[1], reverse=True)
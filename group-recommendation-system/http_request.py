@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+HTTP Request
+
+Leitura de requisições HTTP/1.1 de um asyncio.StreamReader, comum ao serviço
+de recomendações (recommendation_service.py) e ao servidor da visualização
+(visualization_server.py): linha de requisição, cabeçalhos, corpo pelo
+Content-Length e a decisão de keep-alive (HTTP/1.0 só mantém a conexão com
+"Connection: keep-alive").
+
+Uma requisição malformada (linha maior que o limite do leitor, linha de
+requisição incompleta, Content-Length inválido ou negativo, cabeçalhos
+demais) levanta BadRequest: sem o enquadramento da requisição não há como
+achar a próxima, então quem atende responde 400 e fecha a conexão.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# Cabeçalhos aceitos por requisição
+MAX_HEADERS = 100
+
+
+class BadRequest(ValueError):
+    """Requisição malformada (responder 400 e fechar a conexão)."""
+
+
+class Request:
+    """Uma requisição lida da conexão."""
+
+    __slots__ = ('method', 'target', 'version', 'headers', 'body')
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes):
+        """
+        Args:
+            method: Método em maiúsculas
+            target: Alvo da linha de requisição (caminho e query string)
+            version: Versão do protocolo (ex.: 'HTTP/1.1')
+            headers: Cabeçalhos, com os nomes em minúsculas
+            body: Corpo (vazio sem Content-Length)
+        """
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def path(self) -> str:
+        return urlsplit(self.target).path
+
+    @property
+    def query(self) -> str:
+        return urlsplit(self.target).query
+
+    @property
+    def keep_alive(self) -> bool:
+        """Se a conexão continua aberta depois da resposta."""
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+
+async def _readline(reader: asyncio.StreamReader) -> bytes:
+    """Uma linha da conexão; uma linha maior que o limite do leitor vira BadRequest."""
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError) as e:
+        raise BadRequest(f"Linha maior que o limite do leitor: {e}") from e
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """
+    Lê a próxima requisição da conexão (com o corpo).
+
+    Returns:
+        A requisição, ou None se o cliente fechou a conexão entre requisições
+
+    Raises:
+        BadRequest: Requisição malformada
+        asyncio.IncompleteReadError: Conexão fechada no meio do corpo
+    """
+    request_line = await _readline(reader)
+    if not request_line:
+        return None
+
+    headers = {}
+    for _ in range(MAX_HEADERS + 1):
+        line = await _readline(reader)
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise BadRequest(f"Mais de {MAX_HEADERS} cabeçalhos")
+
+    parts = request_line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise BadRequest(f"Linha de requisição inválida: {request_line[:100]!r}")
+    method, target, version = parts
+
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError as e:
+        raise BadRequest(f"Content-Length inválido: {headers['content-length']!r}") from e
+    if length < 0:
+        raise BadRequest(f"Content-Length negativo: {length}")
+    body = await reader.readexactly(length) if length else b''
+
+    return Request(method.upper(), target, version, headers, body)
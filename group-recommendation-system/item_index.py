@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Item Index
+
+Índice item-item de co-posse pré-calculado a partir da matriz usuário × jogo:
+para cada jogo, os N jogos mais similares por cosseno entre as listas de donos
+
+    sim(i, j) = co(i, j) / sqrt(n_i · n_j) · co(i, j) / (co(i, j) + shrinkage)
+
+em que co(i, j) é o número de usuários que possuem os dois jogos e n_i o
+número de donos de i. Pares com menos de `min_support` donos em comum são
+descartados e cada jogo guarda só os seus top-N vizinhos, em CSR.
+
+As co-posses são contadas jogo a jogo pelas listas de jogos dos seus donos
+(custo proporcional à soma dos quadrados das bibliotecas, não a jogos²).
+Consultar jogos "parecidos com estes", para um jogo ou para um grupo, junta só
+as listas de vizinhos dos jogos de entrada. O índice é salvo em .npz.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from als_recommender import csr_gather, dataset_fingerprint, interaction_matrix, transpose_csr
+
+logger = logging.getLogger(__name__)
+
+
+def _top_neighbours(indptr: np.ndarray, indices: np.ndarray, t_indptr: np.ndarray,
+                    t_indices: np.ndarray, owner_count: np.ndarray, item: int, top_n: int,
+                    min_support: int, shrinkage: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Vizinhos (posições) e similaridades de um jogo, ordenados por similaridade."""
+    owners = t_indices[t_indptr[item]:t_indptr[item + 1]]
+    others, co = np.unique(indices[csr_gather(indptr, owners)], return_counts=True)
+
+    keep = (others != item) & (co >= min_support)
+    others, co = others[keep], co[keep].astype(np.float64)
+    if not len(others):
+        return others, co
+
+    scores = co / np.sqrt(owner_count[item] * owner_count[others])
+    if shrinkage > 0:
+        scores *= co / (co + shrinkage)
+
+    if len(scores) > top_n:
+        best = np.argpartition(-scores, top_n - 1)[:top_n]
+        others, scores = others[best], scores[best]
+    order = np.argsort(-scores, kind='stable')
+    return others[order], scores[order]
+
+
+class ItemIndex:
+    """Top-N vizinhos por co-posse de cada jogo."""
+
+    def __init__(self, steam_ids: List[str], appids: List[str], indptr: np.ndarray,
+                 neighbours: np.ndarray, scores: np.ndarray, params: Dict, fingerprint: str = ''):
+        """
+        Args:
+            steam_ids: Usuários do dataset usado no cálculo
+            appids: AppID de cada linha do índice
+            indptr, neighbours, scores: Vizinhos de cada jogo (CSR), em ordem
+                decrescente de similaridade
+            params: Parâmetros do cálculo
+            fingerprint: dataset_fingerprint do dataset do cálculo (para matches)
+        """
+        self.steam_ids = list(steam_ids)
+        self.appids = list(appids)
+        self.item_position = {appid: i for i, appid in enumerate(self.appids)}
+        self.indptr = indptr
+        self.neighbours = neighbours
+        self.scores = scores.astype(np.float32)
+        self.params = params
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, users_data: List[Dict], top_n: int = 50, min_support: int = 2,
+              shrinkage: float = 5.0) -> 'ItemIndex':
+        """
+        Calcula o índice sobre o dataset.
+
+        Args:
+            users_data: Lista de usuários do steam_user_miner
+            top_n: Vizinhos mantidos por jogo
+            min_support: Mínimo de donos em comum para um par ser vizinho
+            shrinkage: Atenuação de pares com poucos donos em comum (0 = cosseno puro)
+        """
+        start = time.perf_counter()
+        steam_ids, appids, indptr, indices, _ = interaction_matrix(users_data)
+        num_games = len(appids)
+        t_indptr, t_indices, _ = transpose_csr(indptr, indices, np.zeros(len(indices)), num_games)
+        owner_count = np.diff(t_indptr).astype(np.float64)
+
+        index_indptr = np.zeros(num_games + 1, dtype=np.int64)
+        neighbours = []
+        scores = []
+        for item in range(num_games):
+            others, similarity = _top_neighbours(indptr, indices, t_indptr, t_indices, owner_count,
+                                                 item, top_n, min_support, shrinkage)
+            neighbours.append(others)
+            scores.append(similarity)
+            index_indptr[item + 1] = index_indptr[item] + len(others)
+
+        neighbours = np.concatenate(neighbours) if neighbours else np.zeros(0, dtype=np.int64)
+        scores = np.concatenate(scores) if scores else np.zeros(0)
+
+        logger.info(f"Índice item-item: {num_games} jogos, {len(neighbours)} vizinhos "
+                    f"(top {top_n}, suporte >= {min_support}) em {time.perf_counter() - start:.2f}s")
+
+        params = {'top_n': top_n, 'min_support': min_support, 'shrinkage': shrinkage}
+        return cls(steam_ids, appids, index_indptr, neighbours.astype(np.int32), scores, params,
+                   dataset_fingerprint(users_data))
+
+    def save(self, path: str):
+        """Salva o índice em .npz."""
+        np.savez(path,
+                 steam_ids=np.array(self.steam_ids), appids=np.array(self.appids),
+                 indptr=self.indptr, neighbours=self.neighbours, scores=self.scores,
+                 fingerprint=np.array(self.fingerprint),
+                 param_names=np.array(list(self.params)),
+                 param_values=np.array(list(self.params.values()), dtype=np.float64))
+
+    @classmethod
+    def load(cls, path: str) -> 'ItemIndex':
+        """Carrega um índice salvo por save."""
+        with np.load(path, allow_pickle=False) as data:
+            params = {name: float(value) if name == 'shrinkage' else int(value)
+                      for name, value in zip(data['param_names'].tolist(), data['param_values'].tolist())}
+            # Índices salvos sem a impressão digital nunca são reaproveitados
+            fingerprint = str(data['fingerprint']) if 'fingerprint' in data.files else ''
+            return cls(data['steam_ids'].tolist(), data['appids'].tolist(), data['indptr'],
+                       data['neighbours'], data['scores'], params, fingerprint)
+
+    def matches(self, users_data: List[Dict]) -> bool:
+        """Se o índice foi calculado sobre exatamente este dataset (usuários, jogos e tempos de jogo)."""
+        return bool(self.fingerprint) and self.fingerprint == dataset_fingerprint(users_data)
+
+    def similar(self, appid: str, top_n: int = 10) -> List[Tuple[str, float]]:
+        """Vizinhos de um jogo, ordenados por similaridade."""
+        position = self.item_position.get(str(appid))
+        if position is None:
+            return []
+        lo = self.indptr[position]
+        hi = min(self.indptr[position + 1], lo + max(top_n, 0))
+        return [(self.appids[i], float(score))
+                for i, score in zip(self.neighbours[lo:hi].tolist(), self.scores[lo:hi].tolist())]
+
+    def related(self, weights: Dict[str, float], top_n: int = 10,
+                exclude: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Jogos parecidos com um conjunto de jogos: soma das similaridades com
+        cada jogo de entrada, ponderadas pelo seu peso.
+
+        Args:
+            weights: {appid: peso} (ex.: quantos membros do grupo possuem o jogo)
+            top_n: Número de jogos retornados
+            exclude: AppIDs que não podem ser retornados (por padrão, os de entrada)
+
+        Returns:
+            Lista [(appid, score)] ordenada por score
+        """
+        seeds = [(self.item_position[str(appid)], weight) for appid, weight in weights.items()
+                 if str(appid) in self.item_position]
+        if not seeds or top_n <= 0:
+            return []
+
+        rows = np.array([position for position, _ in seeds], dtype=np.int64)
+        entries = csr_gather(self.indptr, rows)
+        if not len(entries):
+            return []
+        seed_weights = np.repeat(np.array([weight for _, weight in seeds], dtype=np.float64),
+                                 self.indptr[rows + 1] - self.indptr[rows])
+
+        candidates, inverse = np.unique(self.neighbours[entries], return_inverse=True)
+        totals = np.bincount(inverse, weights=self.scores[entries] * seed_weights)
+
+        excluded = weights if exclude is None else exclude
+        excluded = [self.item_position[str(appid)] for appid in excluded if str(appid) in self.item_position]
+        totals[np.isin(candidates, excluded)] = -np.inf
+
+        top_n = min(top_n, len(totals))
+        best = np.argpartition(-totals, top_n - 1)[:top_n]
+        ranked = best[np.argsort(-totals[best], kind='stable')]
+        return [(self.appids[candidates[i]], float(totals[i])) for i in ranked.tolist() if np.isfinite(totals[i])]
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+JSON Codec
+
+Camada única de (de)serialização JSON para os datasets e exports. Usa o
+backend mais rápido instalado, nesta ordem:
+
+- orjson (pip install orjson)
+- msgspec (pip install msgspec)
+- json da biblioteca padrão
+
+STEAM_JSON_BACKEND=orjson|msgspec|json força um backend. Todos produzem
+UTF-8 e sinalizam JSON inválido com json.JSONDecodeError.
+
+Com o msgspec instalado, load_user_records decodifica o dataset direto em
+structs tipados (UserRecord), validando o esquema e descartando os campos
+que o analisador não usa.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import json
+import os
+from collections.abc import Mapping
+from typing import Any, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+_AVAILABLE = [name for name, module in (('orjson', orjson), ('msgspec', msgspec)) if module is not None]
+_AVAILABLE.append('json')
+
+
+def _select_backend() -> str:
+    """Backend pedido em STEAM_JSON_BACKEND (se instalado) ou o mais rápido disponível."""
+    requested = os.getenv('STEAM_JSON_BACKEND', '').lower()
+    if requested:
+        if requested not in _AVAILABLE:
+            raise ImportError(f"Backend JSON '{requested}' indisponível; instalados: {', '.join(_AVAILABLE)}")
+        return requested
+    return _AVAILABLE[0]
+
+
+BACKEND = _select_backend()
+
+
+def available_backends() -> List[str]:
+    """Backends instalados, do mais rápido para o mais lento."""
+    return list(_AVAILABLE)
+
+
+def _to_builtin(obj: Any) -> Any:
+    """Converte tipos não nativos (escalares/arrays numpy, Mappings) para JSON."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+if msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder(enc_hook=_to_builtin)
+    _msgspec_decoder = msgspec.json.Decoder()
+
+
+def dumps(obj: Any, indent: bool = False, backend: Optional[str] = None) -> bytes:
+    """
+    Serializa para JSON em UTF-8.
+
+    Args:
+        obj: Objeto a serializar
+        indent: Se True, indenta com 2 espaços (arquivos lidos por pessoas)
+        backend: Backend a usar (padrão: BACKEND)
+    """
+    backend = backend or BACKEND
+    if backend == 'orjson':
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_to_builtin, option=options)
+    if backend == 'msgspec':
+        data = _msgspec_encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if indent else data
+    return json.dumps(obj, ensure_ascii=False, default=_to_builtin,
+                      indent=2 if indent else None,
+                      separators=None if indent else (',', ':')).encode('utf-8')
+
+
+def loads(data: Any, backend: Optional[str] = None) -> Any:
+    """Desserializa JSON (bytes ou str)."""
+    backend = backend or BACKEND
+    if backend == 'orjson':
+        return orjson.loads(data)
+    if backend == 'msgspec':
+        try:
+            return _msgspec_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), '', 0) from e
+    return json.loads(data)
+
+
+def load(path: str, backend: Optional[str] = None) -> Any:
+    """Lê e desserializa um arquivo JSON."""
+    with open(path, 'rb') as f:
+        return loads(f.read(), backend)
+
+
+def dump(obj: Any, path: str, indent: bool = False, backend: Optional[str] = None,
+         atomic: bool = False):
+    """
+    Serializa e grava um arquivo JSON.
+
+    Com atomic=True, grava em um arquivo temporário no mesmo diretório e o
+    renomeia: quem lê o arquivo (por exemplo, o servidor da visualização)
+    nunca vê uma versão pela metade.
+    """
+    data = dumps(obj, indent, backend)
+    target = f"{path}.tmp" if atomic else path
+    with open(target, 'wb') as f:
+        f.write(data)
+    if atomic:
+        os.replace(target, path)
+
+
+if msgspec is not None:
+    class Game(msgspec.Struct, gc=False):
+        """Jogo possuído (playtime_forever em minutos)."""
+        appid: int
+        playtime_forever: int = 0
+        name: str = ''
+
+    class Profile(msgspec.Struct, gc=False):
+        """Campos do perfil usados pelo analisador."""
+        personaname: str = 'Unknown'
+        loccountrycode: str = ''
+        communityvisibilitystate: int = 0
+        lastlogoff: int = 0
+
+    class OwnedGames(msgspec.Struct):
+        game_count: int = 0
+        games: List[Game] = []
+
+    class FriendsList(msgspec.Struct):
+        friend_count: int = 0
+        friends: List[str] = []
+
+    class UserRecord(msgspec.Struct):
+        """Usuário do dataset do steam_user_miner."""
+        steam_id: str
+        profile_info: Profile = msgspec.field(default_factory=Profile)
+        owned_games: OwnedGames = msgspec.field(default_factory=OwnedGames)
+        friends_list: FriendsList = msgspec.field(default_factory=FriendsList)
+        crawled_at: Optional[int] = None
+
+    _user_records_decoder = msgspec.json.Decoder(List[UserRecord])
+
+
+def load_user_records(path: str) -> list:
+    """
+    Decodifica um dataset JSON direto em structs UserRecord (msgspec),
+    validando o esquema.
+
+    Raises:
+        ImportError: Se o msgspec não estiver instalado
+        json.JSONDecodeError: Se o arquivo for inválido ou fora do esquema
+    """
+    if msgspec is None:
+        raise ImportError("Para decodificar em structs tipados, instale: pip install msgspec")
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        return _user_records_decoder.decode(data)
+    except msgspec.DecodeError as e:
+        raise json.JSONDecodeError(str(e), '', 0) from e
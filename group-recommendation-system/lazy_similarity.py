@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Lazy Similarity
+
+Similaridade entre usuários calculada sob demanda. Em vez de materializar os
+n² pares antes de qualquer uso, cada par (ou linha) é calculado no primeiro
+acesso a partir dos arrays de UserFeatures (blocked_similarity.py), montados
+uma vez em tempo linear, e memorizado em caches LRU limitados:
+
+- store[u][v] (export das amizades, consultas pontuais): um único par,
+  pela interseção das listas de jogos dos dois usuários
+- store[u].items() (nearest_users): a linha inteira, vetorizada
+- group_similarity, block e edges (recomendações e clustering): blocos de
+  linhas calculados na hora, sem cache
+
+Os valores são os de calculate_user_similarity. Execuções que só exportam o
+grafo ou só respondem consultas tocam apenas os pares que usam; o clustering
+continua percorrendo todos os pares, mas em blocos de memória limitada.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from similarity_store import SimilarityStore
+
+# Células (linhas × usuários) calculadas por bloco em block, group_similarity e edges
+BLOCK_CELLS = 1 << 22
+
+
+class LazyRow(Mapping):
+    """Linha de uma LazySimilarity: cada valor é calculado no acesso."""
+
+    __slots__ = ('store', 'position')
+
+    def __init__(self, store: 'LazySimilarity', position: int):
+        self.store = store
+        self.position = position
+
+    def __getitem__(self, steam_id: str) -> float:
+        return self.store.pair(self.position, self.store.position[steam_id])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.steam_ids)
+
+    def __len__(self) -> int:
+        return len(self.store.steam_ids)
+
+    def items(self):
+        return zip(self.store.steam_ids, self.store.row_values(self.position).tolist())
+
+
+class LazySimilarity(SimilarityStore):
+    """Similaridade calculada par a par no acesso, com caches limitados."""
+
+    def __init__(self, features, cache_pairs: int = 100_000, cache_rows: int = 256):
+        """
+        Args:
+            features: Usuários em arrays (blocked_similarity.UserFeatures)
+            cache_pairs: Pares memorizados (LRU)
+            cache_rows: Linhas inteiras memorizadas (LRU)
+        """
+        super().__init__(features.steam_ids, {'cache_pairs': cache_pairs, 'cache_rows': cache_rows})
+        self.features = features
+        self.pair = lru_cache(maxsize=cache_pairs)(features.pair)
+        self.row_values = lru_cache(maxsize=cache_rows)(self._build_row_values)
+
+    def _build_row_values(self, position: int) -> np.ndarray:
+        return self.features.block_rows([position])[0]
+
+    def row(self, position: int) -> LazyRow:
+        return LazyRow(self, position)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes das linhas em cache (os pares em cache são floats Python)."""
+        return self.row_values.cache_info().currsize * len(self.steam_ids) * 8
+
+    def computed(self) -> Dict[str, int]:
+        """Pares e linhas calculados até agora (falhas dos caches)."""
+        return {'pairs': self.pair.cache_info().misses, 'rows': self.row_values.cache_info().misses}
+
+    def _chunks(self, rows: List[int]) -> Iterator[Tuple[int, List[int]]]:
+        """Fatias de `rows` com no máximo BLOCK_CELLS células cada."""
+        step = max(1, BLOCK_CELLS // max(len(self.steam_ids), 1))
+        for start in range(0, len(rows), step):
+            yield start, rows[start:start + step]
+
+    def block(self, rows: List[int], columns: List[int]) -> np.ndarray:
+        # Poucas colunas (ex.: um membro do cluster): calculadas como linhas no sentido oposto
+        incoming = len(columns) < len(rows)
+        lines, others = (list(columns), rows) if incoming else (list(rows), columns)
+        result = np.empty((len(lines), len(others)))
+        for start, chunk in self._chunks(lines):
+            result[start:start + len(chunk)] = self.features.block_rows(chunk, incoming)[:, others]
+        return result.T if incoming else result
+
+    def group_similarity(self, steam_ids: List[str]) -> np.ndarray:
+        """
+        Similaridade média de cada usuário com o grupo: as colunas dos
+        membros, calculadas como linhas no sentido oposto (incoming).
+        """
+        members = [self.position[steam_id] for steam_id in steam_ids]
+        result = np.zeros(len(self.steam_ids))
+        for _, chunk in self._chunks(members):
+            result += self.features.block_rows(chunk, incoming=True).sum(axis=0)
+        return result / max(len(members), 1)
+
+    def edges(self, threshold: float) -> Tuple[List[int], List[int], List[float]]:
+        n = len(self.steam_ids)
+        sources, targets, weights = [], [], []
+        for start, chunk in self._chunks(list(range(n))):
+            block = (self.features.block_rows(chunk) + self.features.block_rows(chunk, incoming=True)) / 2
+            rows, columns = np.nonzero(np.triu(block > threshold, k=start + 1))
+            sources.extend((rows + start).tolist())
+            targets.extend(columns.tolist())
+            weights.extend(block[rows, columns].tolist())
+        return sources, targets, weights
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Mock Steam Web API
+
+Servidor HTTP local que imita os endpoints da Steam Web API usados pelo
+minerador, respondendo a partir de um grafo social sintético
+(synthetic_data.py):
+
+    GET /ISteamUser/GetPlayerSummaries/v0002/?key=...&steamids=a,b,...
+    GET /IPlayerService/GetOwnedGames/v0001/?key=...&steamid=...
+    GET /ISteamUser/GetFriendList/v0001/?key=...&steamid=...
+
+Permite testar concorrência e lógica de retentativa sem acessar
+api.steampowered.com: latência configurável, taxa de erros 500 e limite de
+requisições por API key (token bucket) que responde 429 com Retry-After.
+Perfis privados se comportam como na API real: GetOwnedGames retorna uma
+resposta vazia e GetFriendList retorna 401.
+
+Uso:
+    python mock_steam_api.py --users 5000 --port 8090 --latency 0.05 --rate-limit 20
+    STEAM_API_BASE_URL=http://127.0.0.1:8090 STEAM_API_KEY=teste python steam_user_miner.py
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from synthetic_data import generate_users
+
+PUBLIC_VISIBILITY = 3
+
+
+class TokenBucket:
+    """Limite de requisições por segundo com rajada."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> Tuple[bool, float]:
+        """
+        Consome um token.
+
+        Returns:
+            Tupla (permitido, segundos até haver um token)
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate
+
+
+class MockSteamAPI:
+    """Servidor mock da Steam Web API em uma thread de fundo."""
+
+    def __init__(self, users: List[Dict], latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: Optional[float] = None,
+                 burst: Optional[float] = None, seed: int = 42,
+                 host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            users: Usuários no formato do steam_user_miner (ex.: generate_users)
+            latency: Latência fixa de cada resposta (s)
+            jitter: Latência adicional aleatória, uniforme em [0, jitter] (s)
+            error_rate: Fração de requisições respondidas com 500
+            rate_limit: Requisições por segundo por API key (None = sem limite)
+            burst: Rajada do limite (padrão: rate_limit)
+            seed: Semente da latência e dos erros
+            host, port: Endereço do servidor (port 0 = porta livre)
+        """
+        self.users = {user['steam_id']: user for user in users}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.burst = burst if burst is not None else rate_limit
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.counts: Counter = Counter()
+
+        self.server = ThreadingHTTPServer((host, port), _MockHandler)
+        self.server.daemon_threads = True
+        self.server.api = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Inicia o servidor em segundo plano e retorna a URL base."""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """Encerra o servidor."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'MockSteamAPI':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        """Contagem de requisições por endpoint e por resultado."""
+        with self._lock:
+            return dict(self.counts)
+
+    def reset_stats(self):
+        """Zera as contagens."""
+        with self._lock:
+            self.counts.clear()
+
+    # ------------------------------------------------------------------
+    # Respostas
+
+    def respond(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, Dict, Dict]:
+        """
+        Resposta de uma requisição.
+
+        Returns:
+            Tupla (status HTTP, corpo JSON, cabeçalhos extras)
+        """
+        endpoint = path.strip('/').split('/')[1] if path.count('/') >= 2 else path
+        key = query.get('key', [''])[0]
+
+        with self._lock:
+            self.counts['requests'] += 1
+            self.counts[endpoint] += 1
+
+            if self.rate_limit:
+                bucket = self._buckets.setdefault(key, TokenBucket(self.rate_limit, self.burst))
+                allowed, wait = bucket.take()
+                if not allowed:
+                    self.counts['429'] += 1
+                    return 429, {}, {'Retry-After': str(max(1, round(wait)))}
+
+            delay = self.latency + self._rng.uniform(0, self.jitter) if self.jitter else self.latency
+            failed = self.error_rate and self._rng.random() < self.error_rate
+
+        if delay:
+            time.sleep(delay)
+        if failed:
+            with self._lock:
+                self.counts['500'] += 1
+            return 500, {}, {}
+
+        if endpoint == 'GetPlayerSummaries':
+            steam_ids = query.get('steamids', [''])[0].split(',')
+            players = [self.users[steam_id]['profile_info'] for steam_id in steam_ids[:100]
+                       if steam_id in self.users]
+            return 200, {'response': {'players': players}}, {}
+
+        steam_id = query.get('steamid', [''])[0]
+        user = self.users.get(steam_id)
+        public = user is not None and user['profile_info'].get('communityvisibilitystate') == PUBLIC_VISIBILITY
+
+        if endpoint == 'GetOwnedGames':
+            if not public:
+                return 200, {'response': {}}, {}
+            games = [{'appid': game['appid'], 'name': game['name'],
+                      'playtime_forever': game['playtime_forever']}
+                     for game in user['owned_games']['games']]
+            return 200, {'response': {'game_count': len(games), 'games': games}}, {}
+
+        if endpoint == 'GetFriendList':
+            if not public:
+                return 401, {}, {}
+            friends = [{'steamid': friend_id, 'relationship': 'friend', 'friend_since': 0}
+                       for friend_id in user['friends_list']['friends']]
+            return 200, {'friendslist': {'friends': friends}}, {}
+
+        return 404, {'error': 'endpoint desconhecido'}, {}
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Handler HTTP/1.1 (keep-alive) do mock."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        status, body, headers = self.server.api.respond(url.path, parse_qs(url.query))
+        payload = json.dumps(body).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    """Executa o mock até ser interrompido."""
+    parser = argparse.ArgumentParser(description="Mock local da Steam Web API")
+    parser.add_argument('--users', type=int, default=5000, help="Usuários do grafo sintético")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do grafo e dos erros")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço")
+    parser.add_argument('--port', type=int, default=8090, help="Porta")
+    parser.add_argument('--latency', type=float, default=0.0, help="Latência fixa (s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Latência aleatória adicional (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de respostas 500")
+    parser.add_argument('--rate-limit', type=float, help="Requisições/s por API key (429 acima disso)")
+    args = parser.parse_args()
+
+    users = generate_users(args.users, seed=args.seed)
+    api = MockSteamAPI(users, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                       rate_limit=args.rate_limit, seed=args.seed, host=args.host, port=args.port)
+    print(f"🧪 Mock da Steam Web API com {len(users)} usuários em {api.url}")
+    print(f"   SteamID inicial sugerido: {users[0]['steam_id']}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.server.server_close()
+        print(f"\n📊 Requisições: {api.stats()}")
+
+
+if __name__ == "__main__":
+    main()
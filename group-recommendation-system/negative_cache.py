@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Negative Cache
+
+Classificação das falhas da Steam Web API e cache persistente de SteamIDs
+sabidamente privados ou inexistentes.
+
+classify_failure separa as falhas que valem uma retentativa (429, 408, 5xx,
+timeout, conexão) das permanentes (401/403 de perfil privado e os demais
+4xx), que o minerador não repete. NegativeCache guarda, em SQLite, os
+SteamIDs cujo perfil veio privado (communityvisibilitystate != 3) ou que não
+vieram na resposta de GetPlayerSummaries (conta inexistente): coletas e
+recoletas seguintes os descartam antes de qualquer requisição. As entradas
+expiram após `ttl` (um perfil pode voltar a ser público) e um perfil público
+visto depois remove a entrada.
+
+O arquivo pode ser compartilhado entre processos (coleta paralela), como a
+fronteira SQLite.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+# Classes de falha
+RETRYABLE = 'retryable'
+PRIVATE = 'private'
+MISSING = 'missing'
+PERMANENT = 'permanent'
+
+# Status HTTP que valem uma retentativa (além de 5xx)
+RETRYABLE_STATUS = {408, 425, 429}
+PRIVATE_STATUS = {401, 403}
+
+DEFAULT_TTL = 30 * 24 * 3600.0
+
+
+def classify_failure(error: Exception) -> str:
+    """
+    Classifica uma falha de requisição.
+
+    Returns:
+        RETRYABLE (erro transitório), PRIVATE (401/403: dados não públicos)
+        ou PERMANENT (outros 4xx: a mesma requisição falharia de novo)
+    """
+    response = getattr(error, 'response', None)
+    if isinstance(error, requests.exceptions.HTTPError) and response is not None:
+        status = response.status_code
+        if status in PRIVATE_STATUS:
+            return PRIVATE
+        if status in RETRYABLE_STATUS or status >= 500:
+            return RETRYABLE
+        return PERMANENT
+    # Timeout, conexão recusada, resposta truncada/JSON inválido
+    return RETRYABLE
+
+
+class NegativeCache:
+    """SteamIDs privados ou inexistentes, com validade, em um arquivo SQLite."""
+
+    def __init__(self, path: str = ':memory:', ttl: Optional[float] = DEFAULT_TTL,
+                 timeout: float = 60.0):
+        """
+        Args:
+            path: Arquivo do banco (':memory:' = apenas neste processo)
+            ttl: Validade de cada entrada em segundos (None = sem expiração)
+            timeout: Espera máxima (s) por um lock do banco
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        if path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS negative (
+                steam_id TEXT PRIMARY KEY,
+                reason TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def _cutoff(self) -> float:
+        """Entradas gravadas antes deste instante estão expiradas."""
+        return time.time() - self.ttl if self.ttl is not None else float('-inf')
+
+    def add(self, steam_ids: Iterable[str], reason: str) -> int:
+        """
+        Registra SteamIDs como privados ou inexistentes (renovando a validade).
+
+        Returns:
+            Número de SteamIDs gravados
+        """
+        now = time.time()
+        rows = [(steam_id, reason, now) for steam_id in steam_ids]
+        if rows:
+            with self._lock:
+                self.conn.executemany("INSERT OR REPLACE INTO negative VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def discard(self, steam_ids: Iterable[str]) -> int:
+        """
+        Remove SteamIDs (por exemplo, perfis que voltaram a ser públicos).
+
+        Returns:
+            Número de entradas removidas
+        """
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany("DELETE FROM negative WHERE steam_id = ?",
+                                  [(steam_id,) for steam_id in steam_ids])
+            return self.conn.total_changes - before
+
+    def get(self, steam_id: str) -> Optional[str]:
+        """Motivo (PRIVATE ou MISSING) de um SteamID válido no cache, ou None."""
+        with self._lock:
+            row = self.conn.execute("SELECT reason FROM negative WHERE steam_id = ? AND updated_at >= ?",
+                                    (steam_id, self._cutoff())).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, steam_id: str) -> bool:
+        return self.get(steam_id) is not None
+
+    def known(self, steam_ids: Iterable[str]) -> Dict[str, str]:
+        """Entradas válidas entre os SteamIDs informados {steam_id: motivo}."""
+        steam_ids = list(steam_ids)
+        cutoff = self._cutoff()
+        found = {}
+        # Consulta em lotes (limite de parâmetros do SQLite)
+        with self._lock:
+            for start in range(0, len(steam_ids), 500):
+                batch = steam_ids[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                found.update(self.conn.execute(
+                    f"SELECT steam_id, reason FROM negative WHERE steam_id IN ({placeholders}) "
+                    f"AND updated_at >= ?", batch + [cutoff]))
+        return found
+
+    def exclude(self, steam_ids: Iterable[str]) -> List[str]:
+        """SteamIDs que não estão no cache, na ordem original."""
+        steam_ids = list(steam_ids)
+        known = self.known(steam_ids)
+        return [steam_id for steam_id in steam_ids if steam_id not in known]
+
+    def purge(self) -> int:
+        """
+        Remove as entradas expiradas.
+
+        Returns:
+            Número de entradas removidas
+        """
+        with self._lock:
+            return self.conn.execute("DELETE FROM negative WHERE updated_at < ?", (self._cutoff(),)).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Entradas válidas por motivo."""
+        counts = {PRIVATE: 0, MISSING: 0}
+        with self._lock:
+            for reason, count in self.conn.execute(
+                    "SELECT reason, COUNT(*) FROM negative WHERE updated_at >= ? GROUP BY reason",
+                    (self._cutoff(),)):
+                counts[reason] = count
+        return counts
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Parallel Steam Crawl
+
+Coleta paralela de usuários Steam: N processos (cada um com a sua API key)
+consomem uma fronteira SQLite compartilhada e deduplicada
+(crawl_frontier.SQLiteFrontier), partindo de vários SteamIDs iniciais.
+
+Cada processo grava os usuários coletados no próprio shard JSONL (uma linha
+por usuário, gravada assim que o usuário é processado) e, ao final, os shards
+são combinados em um único steam_user_data.json. A fronteira fica em disco,
+então uma coleta interrompida continua de onde parou. Com --compact, os shards
+usam os registros compactos de compact_records.py. O cache negativo
+(negative_cache.py) é um arquivo SQLite compartilhado pelos processos: um
+perfil privado descoberto por um processo é descartado por todos.
+
+Uso:
+    STEAM_API_KEYS=key1,key2,key3 python parallel_crawl.py \\
+        --seeds 76561197960287930 76561197960435530 --workers 3 --target-users 100000
+    python parallel_crawl.py --merge-only --shard-dir crawl_shards --output steam_user_data.json
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from multiprocessing import Process
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+import json_codec
+from compact_records import CompactJsonlWriter, iter_users
+from crawl_frontier import open_frontier
+from frontier_policy import POLICIES, make_policy
+from negative_cache import NegativeCache
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlShardWriter:
+    """Grava cada usuário coletado como uma linha JSON no shard do processo."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'ab')
+        self.count = 0
+
+    def __call__(self, user_data: Dict):
+        self.file.write(json_codec.dumps(user_data))
+        self.file.write(b'\n')
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+def crawl_worker(worker_id: str, api_key: str, frontier_url: str, shard_path: str,
+                 request_delay: float, policy: str = 'bfs', degree_cap: Optional[int] = None,
+                 retry_delay: float = 1.0, compact: bool = False,
+                 negative_cache: Optional[str] = None):
+    """
+    Processo de coleta: reserva SteamIDs na fronteira até ela esgotar ou o
+    orçamento global ser atingido. As estatísticas de rendimento são gravadas
+    ao lado do shard (<shard>.stats.json).
+    """
+    from steam_user_miner import SteamUserMiner
+
+    frontier = open_frontier(frontier_url)
+    writer = CompactJsonlWriter(shard_path) if compact else JsonlShardWriter(shard_path)
+    negative = NegativeCache(negative_cache) if negative_cache else None
+    try:
+        miner = SteamUserMiner(api_key, [], frontier=frontier, sink=writer, worker_id=worker_id,
+                               policy=make_policy(policy, degree_cap), compact=compact,
+                               negative_cache=negative)
+        miner.target_users = float('inf')
+        miner.request_delay = request_delay
+        miner.retry_delay = retry_delay
+        miner.show_progress = False
+        miner.mine_users()
+        logger.info(f"[{worker_id}] {writer.count} usuários gravados em {shard_path}")
+    finally:
+        writer.close()
+        frontier.close()
+        if negative is not None:
+            negative.close()
+
+    with open(shard_path + '.stats.json', 'w', encoding='utf-8') as f:
+        json.dump(miner.crawl_stats(), f)
+
+
+def crawl_yield(shard_dir: str) -> Dict:
+    """Soma as estatísticas de rendimento de todos os processos."""
+    totals = {'requests': 0, 'processed_users': 0, 'useful_users': 0,
+              'skipped_negative': 0, 'permanent_failures': 0}
+    for path in sorted(glob.glob(os.path.join(shard_dir, 'shard-*.jsonl.stats.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+        for key in totals:
+            totals[key] += stats.get(key, 0)
+    totals['useful_per_request'] = (totals['useful_users'] / totals['requests']
+                                    if totals['requests'] else 0.0)
+    return totals
+
+
+def shard_paths(shard_dir: str) -> List[str]:
+    """Shards JSONL de um diretório, em ordem."""
+    return sorted(glob.glob(os.path.join(shard_dir, 'shard-*.jsonl')))
+
+
+def merge_shards(paths: List[str], output_file: str) -> int:
+    """
+    Combina shards JSONL em um único arquivo no formato do steam_user_miner.
+
+    Um usuário repetido (gravado antes de uma interrupção e coletado de novo
+    ao retomar) fica com a versão mais recente. Shards compactos são
+    expandidos para o formato completo.
+
+    Returns:
+        Número de usuários no arquivo combinado
+    """
+    users: Dict[str, Dict] = {}
+    for path in paths:
+        for user in iter_users(path):
+            users.pop(user['steam_id'], None)
+            users[user['steam_id']] = user
+
+    json_codec.dump(list(users.values()), output_file)
+
+    logger.info(f"{len(users)} usuários de {len(paths)} shards combinados em {output_file}")
+    return len(users)
+
+
+def run_crawl(api_keys: List[str], seeds: List[str], workers: int, target_users: int,
+              frontier_url: str, shard_dir: str, request_delay: float,
+              policy: str = 'bfs', degree_cap: Optional[int] = None,
+              retry_delay: float = 1.0, compact: bool = False,
+              negative_cache: Optional[str] = None) -> Dict[str, int]:
+    """
+    Executa a coleta paralela e espera todos os processos terminarem.
+
+    Args:
+        negative_cache: Arquivo do cache negativo compartilhado (None = sem cache)
+
+    Returns:
+        Contagem final da fronteira por estado
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+
+    frontier = open_frontier(frontier_url, budget=target_users)
+    # Nenhum processo está rodando: reservas antigas são de uma coleta interrompida
+    requeued = frontier.requeue_stale(0)
+    if requeued:
+        logger.info(f"{requeued} usuários reservados por uma coleta anterior voltaram para a fila")
+    if negative_cache:
+        cache = NegativeCache(negative_cache)
+        known = cache.known(seeds)
+        cache.close()
+        if known:
+            logger.info(f"{len(known)} SteamIDs iniciais no cache negativo descartados")
+            seeds = [steam_id for steam_id in seeds if steam_id not in known]
+    frontier.add(seeds)
+    logger.info(f"Fronteira: {frontier.stats()}")
+    frontier.close()
+
+    processes = []
+    for index in range(workers):
+        worker_id = f"worker-{index:03d}"
+        process = Process(
+            target=crawl_worker,
+            args=(worker_id, api_keys[index % len(api_keys)], frontier_url,
+                  os.path.join(shard_dir, f"shard-{index:03d}.jsonl"), request_delay,
+                  policy, degree_cap, retry_delay, compact, negative_cache),
+            name=worker_id
+        )
+        process.start()
+        processes.append(process)
+
+    for process in processes:
+        process.join()
+        if process.exitcode != 0:
+            logger.error(f"{process.name} terminou com código {process.exitcode}")
+
+    frontier = open_frontier(frontier_url)
+    stats = frontier.stats()
+    frontier.close()
+    return stats
+
+
+def _read_seeds(args: argparse.Namespace) -> List[str]:
+    """SteamIDs iniciais da linha de comando, de um arquivo ou do ambiente."""
+    seeds = list(args.seeds or [])
+    if args.seeds_file:
+        with open(args.seeds_file, 'r', encoding='utf-8') as f:
+            seeds.extend(line.strip() for line in f if line.strip())
+    if not seeds and os.getenv('INITIAL_STEAM_ID'):
+        seeds = [s.strip() for s in os.getenv('INITIAL_STEAM_ID').split(',') if s.strip()]
+    return seeds
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Executa a coleta paralela e combina os shards."""
+    parser = argparse.ArgumentParser(description="Coleta paralela de usuários Steam")
+    parser.add_argument('--seeds', nargs='*', help="SteamIDs iniciais (padrão: INITIAL_STEAM_ID)")
+    parser.add_argument('--seeds-file', help="Arquivo com um SteamID inicial por linha")
+    parser.add_argument('--api-keys', help="API keys separadas por vírgula (padrão: STEAM_API_KEYS ou STEAM_API_KEY)")
+    parser.add_argument('--workers', type=int, default=0, help="Processos de coleta (padrão: um por API key)")
+    parser.add_argument('--target-users', type=int, default=1000, help="Total de usuários a coletar")
+    parser.add_argument('--frontier', default='sqlite:crawl_frontier.db', help="URL da fronteira compartilhada")
+    parser.add_argument('--shard-dir', default='crawl_shards', help="Diretório dos shards JSONL")
+    parser.add_argument('--output', default='steam_user_data.json', help="Arquivo combinado de saída")
+    parser.add_argument('--request-delay', type=float, default=0.5, help="Delay (s) entre requisições de cada processo")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='bfs',
+                        help="Política da fronteira (bfs, mutual: amigos em comum, public: + perfil público)")
+    parser.add_argument('--degree-cap', type=int, help="Máximo de amigos de cada usuário adicionados à fronteira")
+    parser.add_argument('--compact', action='store_true',
+                        help="Shards com registros compactos (IDs inteiros, arrays de appid/tempo, tabela de nomes)")
+    parser.add_argument('--negative-cache', default='steam_negative_cache.db',
+                        help="Cache compartilhado de SteamIDs privados/inexistentes ('' desativa)")
+    parser.add_argument('--merge-only', action='store_true', help="Apenas combinar os shards existentes")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    load_dotenv()
+
+    if not args.merge_only:
+        keys = args.api_keys or os.getenv('STEAM_API_KEYS') or os.getenv('STEAM_API_KEY') or ''
+        api_keys = [key.strip() for key in keys.split(',') if key.strip()]
+        seeds = _read_seeds(args)
+
+        if not api_keys:
+            logger.error("Nenhuma API key informada (--api-keys, STEAM_API_KEYS ou STEAM_API_KEY)")
+            return 2
+        invalid = [seed for seed in seeds if not seed.isdigit() or len(seed) != 17]
+        if invalid:
+            logger.error(f"SteamIDs devem ser números de 17 dígitos: {invalid}")
+            return 2
+
+        start = time.time()
+        stats = run_crawl(api_keys, seeds, args.workers or len(api_keys), args.target_users,
+                          args.frontier, args.shard_dir, args.request_delay,
+                          args.policy, args.degree_cap, compact=args.compact,
+                          negative_cache=args.negative_cache)
+        logger.info(f"Coleta concluída em {time.time() - start:.0f}s: {stats}")
+        totals = crawl_yield(args.shard_dir)
+        logger.info(f"Rendimento ({args.policy}): {totals['useful_users']} usuários úteis em "
+                    f"{totals['requests']} requisições = {totals['useful_per_request']:.3f} por requisição")
+        logger.info(f"Descartados pelo cache negativo: {totals['skipped_negative']} | "
+                    f"falhas permanentes: {totals['permanent_failures']}")
+
+    paths = shard_paths(args.shard_dir)
+    if not paths:
+        logger.error(f"Nenhum shard encontrado em {args.shard_dir}")
+        return 1
+    merge_shards(paths, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
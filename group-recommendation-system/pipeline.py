@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Steam Batch Pipeline
+
+Ponto de entrada não interativo da pipeline completa (coleta → análise →
+exportação), para execução agendada (cron) em máquinas de batch.
+
+Diferente de run_analysis.py, não faz perguntas nem inicia servidor HTTP:
+todos os parâmetros vêm de flags (e, para a coleta, das variáveis de ambiente
+STEAM_API_KEY / INITIAL_STEAM_ID). Etapas independentes se sobrepõem:
+- o layout da visualização depende só do grafo de amizades e é calculado em
+  outro processo enquanto a similaridade e os clusters são calculados (em uma
+  thread ele disputaria o GIL com o cálculo de similaridade)
+- características e recomendações de cada cluster são calculadas em paralelo
+
+Códigos de saída:
+    0    sucesso
+    1    falha ao carregar ou analisar os dados (ou erro inesperado)
+    2    parâmetros inválidos
+    3    falha na coleta
+    4    falha na exportação
+    130  interrompido pelo usuário
+
+Uso:
+    python pipeline.py --data steam_user_data.json --output steam_graph_data.json \\
+        --clusters 6 --clustering louvain --workers 4
+    python pipeline.py --mine --target-users 1000 --data steam_user_data.json
+    python pipeline.py --similarity lazy --clustering none   # só o grafo, sem o passo quadrático
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from graph_layout import compute_layout
+from steam_graph_analyzer import SteamGraphAnalyzer
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_ANALYSIS_FAILED = 1
+EXIT_USAGE = 2
+EXIT_MINING_FAILED = 3
+EXIT_EXPORT_FAILED = 4
+EXIT_INTERRUPTED = 130
+
+
+class PipelineError(Exception):
+    """Falha de uma etapa da pipeline, com o código de saída correspondente."""
+
+    def __init__(self, message: str, exit_code: int):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+class StageTimer:
+    """Mede o tempo de parede de cada etapa da pipeline."""
+
+    def __init__(self):
+        self.stages: List[Dict] = []
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Contexto que registra a duração e o resultado da etapa."""
+        logger.info(f"▶ {name}")
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            yield
+        except BaseException:
+            status = 'failed'
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages.append({'stage': name, 'seconds': round(elapsed, 3), 'status': status})
+            logger.info(f"✔ {name} ({elapsed:.2f}s)" if status == 'ok' else f"✘ {name} ({elapsed:.2f}s)")
+
+    def summary(self) -> Dict:
+        """Resumo das etapas e tempo total."""
+        return {
+            'stages': self.stages,
+            'total_seconds': round(time.perf_counter() - self.start, 3)
+        }
+
+
+def _timed_layout(*inputs):
+    """Executa compute_layout (no processo de segundo plano) medindo a duração."""
+    start = time.perf_counter()
+    result = compute_layout(*inputs)
+    return result, time.perf_counter() - start
+
+
+def run_mining(data_file: str, steam_id: Optional[str], target_users: int):
+    """Executa o minerador sem prompts (credenciais via ambiente)."""
+    from dotenv import load_dotenv
+    from steam_user_miner import SteamUserMiner
+
+    load_dotenv()
+    api_key = os.getenv('STEAM_API_KEY')
+    steam_id = steam_id or os.getenv('INITIAL_STEAM_ID')
+
+    if not api_key or not steam_id:
+        raise PipelineError("STEAM_API_KEY e SteamID inicial (--steam-id ou INITIAL_STEAM_ID) "
+                            "são obrigatórios para a coleta", EXIT_MINING_FAILED)
+    if not steam_id.isdigit() or len(steam_id) != 17:
+        raise PipelineError("SteamID deve ser um número de 17 dígitos!", EXIT_MINING_FAILED)
+
+    miner = SteamUserMiner(api_key, steam_id)
+    miner.target_users = target_users
+    miner.mine_users(data_file)
+
+    if not miner.users_data:
+        raise PipelineError("Nenhum usuário coletado", EXIT_MINING_FAILED)
+
+
+def run_pipeline(args: argparse.Namespace, timer: StageTimer) -> Dict:
+    """
+    Executa as etapas da pipeline.
+
+    Returns:
+        Estatísticas do export
+    """
+    if args.mine:
+        with timer.stage('coleta'):
+            run_mining(args.data, args.steam_id, args.target_users)
+
+    if not os.path.exists(args.data):
+        raise PipelineError(f"Arquivo de dados não encontrado: {args.data}", EXIT_ANALYSIS_FAILED)
+
+    analyzer = SteamGraphAnalyzer(args.data)
+
+    with timer.stage('carregamento'):
+        if not analyzer.load_data():
+            raise PipelineError(f"Falha ao carregar {args.data}", EXIT_ANALYSIS_FAILED)
+
+    with ProcessPoolExecutor(max_workers=1) as background:
+        # O layout depende só do grafo de amizades: roda junto com a análise
+        layout_future = None
+        if not args.no_layout:
+            layout_future = background.submit(_timed_layout, *analyzer.layout_inputs(args.output))
+
+        stage = {'full': 'similaridade', 'blocked': 'similaridade (blocos)', 'lazy': 'similaridade (sob demanda)'}
+        with timer.stage(stage[args.similarity]):
+            if args.similarity == 'blocked':
+                analyzer.create_similarity_matrix_blocked(args.memory_budget, args.similarity_top_k,
+                                                          encoding=args.similarity_encoding or 'float32')
+            elif args.similarity == 'lazy':
+                analyzer.create_similarity_matrix_lazy()
+            else:
+                analyzer.create_similarity_matrix(args.similarity_encoding)
+
+        if args.clustering != 'none':
+            with timer.stage(f'clustering ({args.clustering})'):
+                if args.clustering == 'louvain':
+                    analyzer.cluster_users_louvain(args.clusters)
+                else:
+                    analyzer.cluster_users(args.clusters)
+
+        if args.recommender == 'als':
+            with timer.stage('modelo ALS'):
+                analyzer.train_recommendation_model(args.als_model, factors=args.als_factors,
+                                                    iterations=args.als_iterations, workers=args.workers)
+        elif args.recommender == 'item':
+            with timer.stage('índice item-item'):
+                analyzer.build_item_index(args.item_index, top_n=args.item_neighbours)
+
+        with timer.stage(f'clusters ({args.workers} workers)'):
+            analyzer.process_clusters(args.workers)
+
+        with timer.stage('exportação'):
+            layout = None
+            if layout_future is not None:
+                try:
+                    layout, layout_seconds = layout_future.result()
+                except Exception as e:
+                    raise PipelineError(f"Falha no layout: {e}", EXIT_EXPORT_FAILED) from e
+                timer.stages.append({'stage': 'layout (segundo plano)',
+                                     'seconds': round(layout_seconds, 3), 'status': 'ok'})
+            try:
+                data = analyzer.export_for_visualization(args.output, with_layout=not args.no_layout,
+                                                         layout=layout)
+            except OSError as e:
+                raise PipelineError(f"Falha ao exportar {args.output}: {e}", EXIT_EXPORT_FAILED) from e
+
+    if args.similarity == 'lazy':
+        computed = analyzer.user_similarity_matrix.computed()
+        logger.info(f"Similaridade sob demanda: {computed['pairs']} pares e {computed['rows']} linhas calculados")
+
+    return data['statistics']
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Lê os parâmetros da linha de comando."""
+    parser = argparse.ArgumentParser(description="Pipeline não interativa: coleta → análise → exportação")
+    parser.add_argument('--data', default='steam_user_data.json', help="Arquivo de dados dos usuários")
+    parser.add_argument('--output', default='steam_graph_data.json', help="Arquivo exportado para a visualização")
+    parser.add_argument('--clusters', type=int, default=6, help="Número de clusters")
+    parser.add_argument('--clustering', choices=['threshold', 'louvain', 'none'], default='threshold',
+                        help="Algoritmo de clustering ('none': exporta só o grafo, sem clusters)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Threads para processar os clusters")
+    parser.add_argument('--similarity', choices=['full', 'blocked', 'lazy'], default='full',
+                        help="Matriz de similaridade completa em memória, em blocos (podada, em disco) "
+                             "ou calculada sob demanda (só os pares usados)")
+    parser.add_argument('--memory-budget', type=float, default=512,
+                        help="Memória de trabalho (MB) por bloco da similaridade em blocos")
+    parser.add_argument('--similarity-top-k', type=int, default=50,
+                        help="Pares mantidos por usuário na similaridade em blocos")
+    parser.add_argument('--similarity-encoding', choices=['float64', 'float32', 'uint8'],
+                        help="Matriz de similaridade compacta em arrays (padrão: dicionários; "
+                             "float32 na similaridade em blocos)")
+    parser.add_argument('--recommender', choices=['heuristic', 'als', 'item'], default='heuristic',
+                        help="Recomendações: score ponderado, fatoração de matriz (ALS) ou vizinhos de co-posse")
+    parser.add_argument('--als-model', help="Arquivo .npz do modelo ALS (reaproveitado se cobrir o dataset)")
+    parser.add_argument('--als-factors', type=int, default=32, help="Dimensão dos vetores do ALS")
+    parser.add_argument('--als-iterations', type=int, default=10, help="Iterações do ALS")
+    parser.add_argument('--item-index', help="Arquivo .npz do índice item-item (reaproveitado se cobrir o dataset)")
+    parser.add_argument('--item-neighbours', type=int, default=50, help="Vizinhos mantidos por jogo no índice")
+    parser.add_argument('--no-layout', action='store_true', help="Não calcular o layout dos nós")
+    parser.add_argument('--mine', action='store_true', help="Coletar os dados antes da análise")
+    parser.add_argument('--steam-id', help="SteamID inicial da coleta (padrão: INITIAL_STEAM_ID)")
+    parser.add_argument('--target-users', type=int, default=1000, help="Usuários a coletar")
+    parser.add_argument('--timings', help="Salvar o resumo de tempos em JSON neste arquivo")
+    parser.add_argument('--quiet', action='store_true', help="Mostrar apenas avisos e erros")
+    args = parser.parse_args(argv)
+
+    if args.clusters < 1:
+        parser.error("--clusters deve ser >= 1")
+    if args.workers < 1:
+        parser.error("--workers deve ser >= 1")
+    if args.memory_budget <= 0:
+        parser.error("--memory-budget deve ser > 0")
+    if args.similarity_top_k < 1:
+        parser.error("--similarity-top-k deve ser >= 1")
+    if args.item_neighbours < 1:
+        parser.error("--item-neighbours deve ser >= 1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Executa a pipeline e retorna o código de saída."""
+    args = parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING if args.quiet else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    timer = StageTimer()
+    exit_code = EXIT_OK
+    statistics = None
+    try:
+        statistics = run_pipeline(args, timer)
+    except PipelineError as e:
+        logger.error(str(e))
+        exit_code = e.exit_code
+    except KeyboardInterrupt:
+        logger.error("Pipeline interrompida pelo usuário")
+        exit_code = EXIT_INTERRUPTED
+    except Exception:
+        # Erro fora das falhas previstas: registra o traceback e ainda imprime o resumo
+        logger.exception("Erro inesperado na pipeline")
+        exit_code = EXIT_ANALYSIS_FAILED
+
+    summary = timer.summary()
+    summary['exit_code'] = exit_code
+    summary['statistics'] = statistics
+
+    print()
+    print("⏱️  RESUMO DA PIPELINE")
+    print("-" * 50)
+    for stage in summary['stages']:
+        print(f"   {stage['stage']:<30} {stage['seconds']:>9.2f}s  {stage['status']}")
+    print(f"   {'total':<30} {summary['total_seconds']:>9.2f}s")
+    if statistics:
+        print(f"   Usuários: {statistics['total_users']} | Jogos: {statistics['total_games']} | "
+              f"Amizades: {statistics['total_friendships']} | Clusters: {statistics['clusters_count']}")
+    print(f"   Código de saída: {exit_code}")
+
+    if args.timings:
+        with open(args.timings, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
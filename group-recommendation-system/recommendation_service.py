@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Steam Recommendation Service
+
+Serviço HTTP local (asyncio) que carrega o dataset analisado uma única vez e
+mantém em memória os índices de similaridade e de posse de jogos para
+responder consultas com baixa latência:
+
+    GET  /health                              Estado do serviço
+    GET  /clusters                            Resumo dos clusters
+    GET  /clusters/<id>                       Detalhes de um cluster
+    GET  /users/<steam_id>                    Cluster do usuário
+    GET  /users/<steam_id>/neighbours?k=10    Usuários mais similares
+    GET  /recommendations?steam_ids=a,b&top_n=10
+                                              Recomendações para um grupo
+    GET  /games/<appid>/similar?k=10          Jogos parecidos (--recommender item)
+    GET  /stats                               Latência por rota e cache
+    POST /reload                              Recarrega o snapshot
+
+Um novo snapshot (por exemplo, após uma nova coleta) é analisado em segundo
+plano e trocado atomicamente: as requisições em andamento continuam usando o
+snapshot antigo e nenhuma requisição fica sem resposta durante a troca. Cada
+snapshot tem o próprio cache de recomendações, então a troca também invalida
+os resultados em cache.
+
+Uso:
+    python recommendation_service.py --data steam_user_data.json --port 8080
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote
+
+import json_codec
+from http_request import BadRequest, read_request
+from lazy_similarity import LazySimilarity
+from steam_graph_analyzer import SteamGraphAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Vizinhos pré-calculados por usuário
+MAX_NEIGHBOURS = 50
+
+
+class LatencyTracker:
+    """Guarda as latências recentes de cada rota e calcula percentis."""
+
+    def __init__(self, window: int = 10000):
+        """
+        Args:
+            window: Número de amostras mantidas por rota
+        """
+        self.samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, elapsed_ms: float):
+        """Registra a latência de uma requisição."""
+        self.samples[route].append(elapsed_ms)
+        self.counts[route] += 1
+
+    def percentiles(self) -> Dict[str, Dict]:
+        """Percentis p50/p90/p99/máximo (ms) por rota."""
+        report = {}
+        for route, values in self.samples.items():
+            ordered = sorted(values)
+            if not ordered:
+                continue
+
+            def pick(fraction: float) -> float:
+                return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+            report[route] = {
+                'requests': self.counts[route],
+                'p50_ms': pick(0.50),
+                'p90_ms': pick(0.90),
+                'p99_ms': pick(0.99),
+                'max_ms': round(ordered[-1], 3)
+            }
+        return report
+
+
+class ServiceSnapshot:
+    """Resultado imutável de uma análise, com os índices usados nas consultas."""
+
+    def __init__(self, analyzer: SteamGraphAnalyzer, source_mtime: float):
+        """
+        Args:
+            analyzer: Analisador já preparado (SteamGraphAnalyzer.prepare)
+            source_mtime: mtime do arquivo de dados analisado
+        """
+        self.analyzer = analyzer
+        self.source_mtime = source_mtime
+        self.loaded_at = time.time()
+
+        self.user_cluster = {user_id: cluster['id']
+                             for cluster in analyzer.clusters
+                             for user_id in cluster['users']}
+        self.profiles = {user['steam_id']: user.get('profile_info', {}) for user in analyzer.users_data}
+
+        # Vizinhos mais similares de cada usuário, prontos para consulta (com a
+        # similaridade sob demanda, calculados na consulta)
+        self.neighbours = {}
+        self.on_demand = isinstance(analyzer.user_similarity_matrix, LazySimilarity)
+        if not self.on_demand:
+            self.neighbours = {user_id: analyzer.nearest_users(user_id, MAX_NEIGHBOURS)
+                               for user_id in analyzer.user_similarity_matrix}
+
+    @classmethod
+    def build(cls, data_file: str, num_clusters: int, clustering_method: str,
+              recommender: str = 'heuristic', model_path: Optional[str] = None,
+              similarity: str = 'full') -> Optional['ServiceSnapshot']:
+        """Analisa o arquivo de dados e monta um snapshot (bloqueante)."""
+        source_mtime = os.path.getmtime(data_file)
+        analyzer = SteamGraphAnalyzer(data_file)
+        if not analyzer.prepare(num_clusters, clustering_method, recommender=recommender,
+                                model_path=model_path, similarity=similarity):
+            return None
+        return cls(analyzer, source_mtime)
+
+    def info(self) -> Dict:
+        """Metadados do snapshot."""
+        return {
+            'data_file': self.analyzer.data_file,
+            'users': len(self.analyzer.users_data),
+            'games': len(self.analyzer.game_database),
+            'clusters': len(self.analyzer.clusters),
+            'loaded_at': self.loaded_at,
+            'source_mtime': self.source_mtime,
+            'recommendation_cache': self.analyzer.recommendation_cache.stats()
+        }
+
+
+class RecommendationService:
+    """Serviço HTTP assíncrono sobre um snapshot de análise em memória."""
+
+    def __init__(self, data_file: str = "steam_user_data.json", num_clusters: int = 6,
+                 clustering_method: str = 'threshold', watch_interval: float = 5.0,
+                 recommender: str = 'heuristic', model_path: Optional[str] = None,
+                 similarity: str = 'full'):
+        """
+        Args:
+            data_file: Arquivo com os dados dos usuários
+            num_clusters: Número de clusters da análise
+            clustering_method: 'threshold' ou 'louvain'
+            watch_interval: Intervalo (s) de verificação de mudanças no arquivo
+                de dados (0 = sem recarga automática)
+            recommender: 'heuristic', 'als' (fatoração de matriz) ou 'item'
+                (vizinhos de co-posse)
+            model_path: Arquivo do modelo ALS ou do índice item-item
+                (reaproveitado se válido)
+            similarity: 'full' ou 'lazy' (pares calculados sob demanda,
+                lazy_similarity.py)
+        """
+        self.data_file = data_file
+        self.num_clusters = num_clusters
+        self.clustering_method = clustering_method
+        self.recommender = recommender
+        self.model_path = model_path
+        self.similarity = similarity
+        self.watch_interval = watch_interval
+
+        self.snapshot: Optional[ServiceSnapshot] = None
+        self.latency = LatencyTracker()
+        self.reloads = 0
+        # mtime de um arquivo de dados cuja análise falhou (não é retentado até mudar)
+        self.rejected_mtime: Optional[float] = None
+        self._reload_lock = asyncio.Lock()
+
+    async def reload(self) -> bool:
+        """
+        Analisa o arquivo de dados em uma thread e troca o snapshot.
+
+        Returns:
+            True se o novo snapshot foi carregado
+        """
+        async with self._reload_lock:
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            try:
+                mtime = os.path.getmtime(self.data_file)
+            except OSError as e:
+                logger.error(f"Erro ao carregar snapshot: {e}")
+                return False
+
+            try:
+                snapshot = await loop.run_in_executor(
+                    None, ServiceSnapshot.build, self.data_file, self.num_clusters, self.clustering_method,
+                    self.recommender, self.model_path, self.similarity)
+            except Exception:
+                # Arquivo incompleto, de outra versão etc.: o serviço continua com o snapshot atual
+                logger.exception("Erro ao carregar snapshot; mantendo o snapshot atual")
+                snapshot = None
+
+            if snapshot is None:
+                self.rejected_mtime = mtime
+                logger.error("Análise do snapshot falhou; mantendo o snapshot atual "
+                             "(nova tentativa quando o arquivo de dados mudar)")
+                return False
+
+            # Troca atômica: requisições já em andamento mantêm a referência antiga
+            self.snapshot = snapshot
+            self.rejected_mtime = None
+            self.reloads += 1
+            logger.info(f"Snapshot carregado em {time.perf_counter() - start:.2f}s "
+                        f"({len(snapshot.analyzer.users_data)} usuários)")
+            return True
+
+    async def watch(self):
+        """Recarrega o snapshot quando o arquivo de dados muda."""
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            try:
+                mtime = os.path.getmtime(self.data_file)
+            except OSError:
+                continue
+            if mtime == self.rejected_mtime:
+                continue
+            if self.snapshot is None or mtime > self.snapshot.source_mtime:
+                logger.info("Arquivo de dados alterado, recarregando snapshot...")
+                await self.reload()
+
+    # ------------------------------------------------------------------
+    # Rotas
+    # ------------------------------------------------------------------
+
+    def route(self, method: str, path: str, query: Dict[str, List[str]]) -> Tuple[str, int, object]:
+        """
+        Resolve uma requisição.
+
+        Returns:
+            Tupla (nome da rota, status HTTP, corpo serializável em JSON)
+        """
+        parts = [unquote(part) for part in path.strip('/').split('/') if part]
+        snapshot = self.snapshot
+
+        if method == 'POST' and parts == ['reload']:
+            return 'reload', 202, {'status': 'reloading'}
+
+        if method != 'GET':
+            return 'invalid', 405, {'error': 'Método não suportado'}
+
+        if parts == ['health']:
+            return 'health', 200, {'status': 'ok' if snapshot else 'loading', 'reloads': self.reloads}
+
+        if parts == ['stats']:
+            return 'stats', 200, {
+                'snapshot': snapshot.info() if snapshot else None,
+                'latency': self.latency.percentiles()
+            }
+
+        if snapshot is None:
+            return 'unavailable', 503, {'error': 'Snapshot ainda não carregado'}
+
+        clusters = snapshot.analyzer.clusters
+
+        if parts == ['clusters']:
+            return 'clusters', 200, [{
+                'id': cluster['id'],
+                'size': len(cluster['users']),
+                'top_recommendation': (cluster['recommended_games'][0]['name']
+                                       if cluster['recommended_games'] else None)
+            } for cluster in clusters]
+
+        if len(parts) == 2 and parts[0] == 'clusters':
+            try:
+                cluster = clusters[int(parts[1])]
+            except (ValueError, IndexError):
+                return 'cluster', 404, {'error': 'Cluster não encontrado'}
+            return 'cluster', 200, cluster
+
+        if len(parts) >= 2 and parts[0] == 'users':
+            steam_id = parts[1]
+            if steam_id not in snapshot.user_cluster:
+                return 'user', 404, {'error': 'Usuário não encontrado'}
+
+            if len(parts) == 2:
+                return 'user', 200, {
+                    'steam_id': steam_id,
+                    'name': snapshot.profiles.get(steam_id, {}).get('personaname', 'Unknown'),
+                    'cluster': snapshot.user_cluster[steam_id]
+                }
+
+            if len(parts) == 3 and parts[2] == 'neighbours':
+                k = _int_param(query, 'k', 10, 1, MAX_NEIGHBOURS)
+                if snapshot.on_demand:
+                    neighbours = snapshot.analyzer.nearest_users(steam_id, k)
+                else:
+                    neighbours = snapshot.neighbours[steam_id][:k]
+                return 'neighbours', 200, [{'steam_id': other, 'similarity': similarity}
+                                           for other, similarity in neighbours]
+
+        if parts == ['recommendations']:
+            steam_ids = [steam_id for value in query.get('steam_ids', [])
+                         for steam_id in value.split(',') if steam_id]
+            if not steam_ids:
+                return 'recommendations', 400, {'error': 'Informe steam_ids=id1,id2,...'}
+            top_n = _int_param(query, 'top_n', 10, 1, 100)
+            return 'recommendations', 200, {
+                'steam_ids': steam_ids,
+                'recommendations': snapshot.analyzer.recommend_for_group(steam_ids, top_n)
+            }
+
+        if len(parts) == 3 and parts[0] == 'games' and parts[2] == 'similar':
+            item_index = snapshot.analyzer.item_index
+            if item_index is None:
+                return 'similar', 404, {'error': 'Índice item-item não ativo (use --recommender item)'}
+            if parts[1] not in item_index.item_position:
+                return 'similar', 404, {'error': 'Jogo não encontrado'}
+            k = _int_param(query, 'k', 10, 1, 100)
+            return 'similar', 200, [{'appid': appid, 'similarity': similarity}
+                                    for appid, similarity in item_index.similar(parts[1], k)]
+
+        return 'not_found', 404, {'error': 'Rota não encontrada'}
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende uma conexão HTTP/1.1 (com keep-alive)."""
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except BadRequest as e:
+                    logger.debug(f"Requisição malformada: {e}")
+                    request = None
+                    start = time.perf_counter()
+                    route, status, body = 'invalid', 400, {'error': 'Requisição inválida'}
+                else:
+                    if request is None:
+                        break
+                    start = time.perf_counter()
+                    try:
+                        route, status, body = self.route(request.method, request.path, parse_qs(request.query))
+                    except ValueError:
+                        route, status, body = 'invalid', 400, {'error': 'Requisição inválida'}
+                    except Exception:
+                        logger.exception(f"Erro ao atender {request.method} {request.target}")
+                        route, status, body = 'error', 500, {'error': 'Erro interno'}
+
+                if route == 'reload':
+                    asyncio.get_running_loop().create_task(self.reload())
+
+                payload = json_codec.dumps(body)
+                # Requisição malformada: fecha a conexão
+                keep_alive = request is not None and request.keep_alive
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+                    + payload
+                )
+                await writer.drain()
+                self.latency.record(route, (time.perf_counter() - start) * 1000)
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080):
+        """Carrega o snapshot inicial e atende requisições até ser interrompido."""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info(f"Serviço de recomendações em http://{host}:{port}")
+
+        await self.reload()
+        if self.watch_interval > 0:
+            asyncio.get_running_loop().create_task(self.watch())
+
+        async with server:
+            await server.serve_forever()
+
+
+_REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def _int_param(query: Dict[str, List[str]], name: str, default: int, minimum: int, maximum: int) -> int:
+    """Lê um parâmetro inteiro da query string, limitado a [minimum, maximum]."""
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        value = default
+    return max(minimum, min(maximum, value))
+
+
+def main():
+    """Inicia o serviço de recomendações."""
+    parser = argparse.ArgumentParser(description="Serviço HTTP de recomendações Steam")
+    parser.add_argument('--data', default='steam_user_data.json', help="Arquivo de dados dos usuários")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço de escuta")
+    parser.add_argument('--port', type=int, default=8080, help="Porta")
+    parser.add_argument('--clusters', type=int, default=6, help="Número de clusters")
+    parser.add_argument('--clustering', choices=['threshold', 'louvain'], default='threshold',
+                        help="Método de clustering")
+    parser.add_argument('--watch-interval', type=float, default=5.0,
+                        help="Intervalo (s) para detectar um novo snapshot (0 = desativado)")
+    parser.add_argument('--recommender', choices=['heuristic', 'als', 'item'], default='heuristic',
+                        help="Recomendações: score ponderado, fatoração de matriz (ALS) ou vizinhos de co-posse")
+    parser.add_argument('--als-model', help="Arquivo .npz do modelo ALS (reaproveitado se cobrir o dataset)")
+    parser.add_argument('--item-index', help="Arquivo .npz do índice item-item (reaproveitado se cobrir o dataset)")
+    parser.add_argument('--similarity', choices=['full', 'lazy'], default='full',
+                        help="Matriz de similaridade completa ou calculada sob demanda")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    service = RecommendationService(args.data, args.clusters, args.clustering, args.watch_interval,
+                                    args.recommender,
+                                    args.item_index if args.recommender == 'item' else args.als_model,
+                                    args.similarity)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Serviço parado!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Result Cache
+
+Cache limitado de resultados com expulsão LRU, expiração por TTL,
+invalidação explícita (por exemplo, quando um novo snapshot de análise é
+carregado) e estatísticas de acerto.
+
+Usado na frente do caminho de recomendação do SteamGraphAnalyzer, onde os
+mesmos grupos de amigos repetem as mesmas consultas.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+_MISSING = object()
+
+
+def group_key(steam_ids: Iterable[str], **params) -> Tuple:
+    """
+    Chave canônica de uma consulta de grupo: o conjunto ordenado de SteamIDs
+    e os parâmetros ordenados por nome (a ordem dos IDs não importa).
+    """
+    return tuple(sorted(set(steam_ids))), tuple(sorted(params.items()))
+
+
+class ResultCache:
+    """Cache LRU com TTL, seguro para uso entre threads."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries: Número máximo de entradas (LRU acima disso)
+            ttl: Validade de cada entrada em segundos (None = sem expiração)
+            clock: Relógio monotônico (injetável para testes)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+
+        self._entries: 'OrderedDict[Hashable, Tuple[float, object]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default=None):
+        """Retorna o valor em cache (e o marca como recente) ou `default`."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            stored_at, value = entry
+            if self.ttl is not None and self.clock() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value):
+        """Armazena um valor, expulsando o menos recente se necessário."""
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Descarta todas as entradas (ex.: novo snapshot de análise)."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Estatísticas de uso do cache."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
@@ -120,7 +120,7 @@ def main():
     print("📋 Para abrir a visualização:")
     print("   1. Abra o arquivo steam_graph_visualization.html em um navegador")
     print("   2. Ou execute um servidor local:")
-    print("      python -m http.server 8000")
+    print("      python visualization_server.py --port 8000")
     print("      Depois acesse: http://localhost:8000/steam_graph_visualization.html")
     print()
     
@@ -129,23 +129,13 @@ def main():
     if response in ['s', 'sim', 'y', 'yes']:
         try:
             import webbrowser
-            import http.server
-            import socketserver
-            import threading
             import time
+            from visualization_server import serve_in_thread
             
-            # Iniciar servidor local
+            # Iniciar servidor local (arquivos em memória com gzip/ETag,
+            # recarregados quando uma nova análise grava o export)
             PORT = 8000
-            Handler = http.server.SimpleHTTPRequestHandler
-            
-            def start_server():
-                with socketserver.TCPServer(("", PORT), Handler) as httpd:
-                    httpd.serve_forever()
-            
-            server_thread = threading.Thread(target=start_server, daemon=True)
-            server_thread.start()
-            
-            time.sleep(2)  # Aguardar servidor iniciar
+            serve_in_thread(port=PORT)
             
             # Abrir navegador
             url = f"http://localhost:{PORT}/steam_graph_visualization.html"
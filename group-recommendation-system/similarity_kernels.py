@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Similarity Kernels
+
+Kernels numéricos da similaridade entre usuários e do clustering por limiar,
+compilados com Numba quando instalado (pip install numba). Sem o Numba, as
+mesmas funções rodam como Python puro.
+
+Os kernels trabalham sobre arrays em vez de dicionários e sets:
+
+- jogos de cada usuário como posições de appid ordenadas (CSR), com o tempo
+  de jogo alinhado: a interseção é um merge das duas listas
+- país como código inteiro (-1 = sem país) e amigos como posições
+
+As operações seguem a ordem de calculate_user_similarity (que soma os tempos
+em ordem de appid), então os resultados são idênticos bit a bit aos do
+caminho em dicionários, compilados ou não.
+
+O analisador só usa os kernels quando compilados (ENABLED): interpretados,
+percorrer arrays NumPy elemento a elemento é mais lento que os dicionários.
+STEAM_JIT=0 desativa o uso mesmo com o Numba instalado.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import os
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+ENABLED = numba is not None and os.getenv('STEAM_JIT', '1') != '0'
+
+
+def _jit(function):
+    """Compila com Numba (cache em disco), se instalado."""
+    if numba is None:
+        return function
+    return numba.njit(cache=True)(function)
+
+
+class UserArrays:
+    """Jogos (ordenados por appid), tempos, países e amigos de cada usuário em arrays."""
+
+    def __init__(self, users_data: List[Dict]):
+        """
+        Args:
+            users_data: Lista de usuários do steam_user_miner
+        """
+        self.steam_ids = [user['steam_id'] for user in users_data]
+        position = {steam_id: i for i, steam_id in enumerate(self.steam_ids)}
+
+        # Mesma semântica de calculate_user_similarity: último tempo de cada appid
+        libraries = [{str(game['appid']): game['playtime_forever']
+                      for game in user.get('owned_games', {}).get('games', [])}
+                     for user in users_data]
+        appids = sorted({appid for library in libraries for appid in library})
+        game_position = {appid: i for i, appid in enumerate(appids)}
+
+        self.indptr = np.zeros(len(users_data) + 1, dtype=np.int64)
+        np.cumsum([len(library) for library in libraries], out=self.indptr[1:])
+        self.games = np.empty(self.indptr[-1], dtype=np.int64)
+        self.playtime = np.empty(self.indptr[-1], dtype=np.float64)
+        for i, library in enumerate(libraries):
+            games = sorted(library)
+            self.games[self.indptr[i]:self.indptr[i + 1]] = [game_position[appid] for appid in games]
+            self.playtime[self.indptr[i]:self.indptr[i + 1]] = [library[appid] for appid in games]
+
+        countries = {}
+        self.country = np.array([
+            countries.setdefault(code, len(countries)) if code else -1
+            for code in (user.get('profile_info', {}).get('loccountrycode', '') for user in users_data)
+        ], dtype=np.int64)
+
+        friends = [[position[friend] for friend in set(user.get('friends_list', {}).get('friends', []))
+                    if friend in position] for user in users_data]
+        self.friend_indptr = np.zeros(len(users_data) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in friends], out=self.friend_indptr[1:])
+        self.friend_indices = np.array([friend for row in friends for friend in sorted(row)], dtype=np.int64)
+
+    def arrays(self) -> tuple:
+        """Argumentos de pair_similarity e similarity_block (antes das posições)."""
+        return (self.indptr, self.games, self.playtime, self.country, self.friend_indptr, self.friend_indices)
+
+
+@_jit
+def pair_similarity(indptr, games, playtime, country, friend_indptr, friend_indices, i, j):
+    """Similaridade i → j, com os pesos e a ordem de operações de calculate_user_similarity."""
+    a, a_end = indptr[i], indptr[i + 1]
+    b, b_end = indptr[j], indptr[j + 1]
+    union = (a_end - a) + (b_end - b)
+    common = 0
+    time_sum = 0.0
+    time_count = 0
+
+    while a < a_end and b < b_end:
+        if games[a] == games[b]:
+            common += 1
+            total = playtime[a] + playtime[b]
+            if total > 0:
+                time_sum += 1 - abs(playtime[a] - playtime[b]) / total
+                time_count += 1
+            a += 1
+            b += 1
+        elif games[a] < games[b]:
+            a += 1
+        else:
+            b += 1
+
+    similarity = 0.0
+    union -= common
+    if union > 0:
+        similarity += 0.4 * (common / union)
+        if time_count > 0:
+            similarity += 0.2 * (time_sum / time_count)
+
+    if country[i] >= 0 and country[i] == country[j]:
+        similarity += 0.15
+
+    for k in range(friend_indptr[i], friend_indptr[i + 1]):
+        if friend_indices[k] == j:
+            similarity += 0.25
+            break
+
+    return min(similarity, 1.0)
+
+
+@_jit
+def similarity_block(indptr, games, playtime, country, friend_indptr, friend_indices, start, stop):
+    """Linhas [start, stop) da matriz de similaridade (diagonal = 1)."""
+    n = len(indptr) - 1
+    block = np.empty((stop - start, n))
+    for i in range(start, stop):
+        for j in range(n):
+            if i == j:
+                block[i - start, j] = 1.0
+            else:
+                block[i - start, j] = pair_similarity(indptr, games, playtime, country,
+                                                      friend_indptr, friend_indices, i, j)
+    return block
+
+
+@_jit
+def count_above(similarity, candidates, threshold):
+    """Para cada candidato, quantos outros candidatos têm similaridade acima do limiar."""
+    counts = np.zeros(len(candidates), dtype=np.int64)
+    for a in range(len(candidates)):
+        for b in range(len(candidates)):
+            if a != b and similarity[candidates[a], candidates[b]] > threshold:
+                counts[a] += 1
+    return counts
+
+
+@_jit
+def grow_cluster(similarity, members, candidates, threshold):
+    """
+    Percorre os candidatos em ordem e adiciona quem tem similaridade média
+    com os membros acima do limiar (cada adicionado passa a contar).
+
+    Returns:
+        Máscara dos candidatos adicionados
+    """
+    sums = np.zeros(len(candidates))
+    for member in members:
+        for c in range(len(candidates)):
+            sums[c] += similarity[candidates[c], member]
+
+    size = len(members)
+    added = np.zeros(len(candidates), dtype=np.bool_)
+    for c in range(len(candidates)):
+        if sums[c] / size > threshold:
+            added[c] = True
+            size += 1
+            for d in range(len(candidates)):
+                sums[d] += similarity[candidates[d], candidates[c]]
+    return added
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Similarity Store
+
+Armazenamento compacto da similaridade entre usuários. Os scores ficam em
+[0, 1] e só três casas decimais importam, então em vez de floats Python em
+dicionários (dezenas de bytes por par) os valores são guardados em arrays com uma
+destas codificações:
+
+- 'float64': referência, sem perda (8 bytes por par)
+- 'float32': 4 bytes por par, erro ~1e-7
+- 'uint8': quantizado em 255 níveis, 1 byte por par, erro máximo 1/510
+
+A conversão de volta para float acontece só na leitura, para o valor ou a
+linha consultada. SimilarityStore define a interface de dicionário de
+dicionários de user_similarity_matrix (store[u][v], get, iteração) mais as
+operações vetorizadas usadas pelo clustering e pelas recomendações.
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+ENCODINGS = {'float64': np.float64, 'float32': np.float32, 'uint8': np.uint8}
+
+# Níveis da quantização em 8 bits
+QUANTIZATION_LEVELS = 255
+
+
+def encode(values: np.ndarray, encoding: str) -> np.ndarray:
+    """Codifica similaridades em [0, 1]."""
+    if encoding == 'uint8':
+        return np.rint(np.clip(values, 0.0, 1.0) * QUANTIZATION_LEVELS).astype(np.uint8)
+    return np.asarray(values, dtype=ENCODINGS[encoding])
+
+
+def decode(values: np.ndarray) -> np.ndarray:
+    """Similaridades (float64) a partir dos valores codificados."""
+    if values.dtype == np.uint8:
+        return values / float(QUANTIZATION_LEVELS)
+    return values.astype(np.float64)
+
+
+class SimilarityRow(dict):
+    """Linha da matriz de similaridade: pares ausentes (podados) valem 0."""
+
+    def __missing__(self, key):
+        return 0.0
+
+
+class SimilarityStore(ABC):
+    """Interface comum das matrizes de similaridade em arrays."""
+
+    def __init__(self, steam_ids: List[str], params: Optional[Dict] = None):
+        """
+        Args:
+            steam_ids: SteamID de cada linha/coluna
+            params: Parâmetros do cálculo (para recalcular com os mesmos)
+        """
+        self.steam_ids = steam_ids
+        self.position = {steam_id: i for i, steam_id in enumerate(steam_ids)}
+        self.params = params or {}
+
+    @abstractmethod
+    def row(self, position: int) -> Mapping:
+        """Linha de um usuário ({steam_id: similaridade})."""
+
+    def __getitem__(self, steam_id: str) -> Mapping:
+        return self.row(self.position[steam_id])
+
+    def get(self, steam_id: str, default=None):
+        position = self.position.get(steam_id)
+        return default if position is None else self.row(position)
+
+    def __contains__(self, steam_id) -> bool:
+        return steam_id in self.position
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.steam_ids)
+
+    def __len__(self) -> int:
+        return len(self.steam_ids)
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos arrays da matriz."""
+
+    @abstractmethod
+    def block(self, rows: List[int], columns: List[int]) -> np.ndarray:
+        """Submatriz decodificada (float64) das posições rows × columns."""
+
+    @abstractmethod
+    def group_similarity(self, steam_ids: List[str]) -> np.ndarray:
+        """Similaridade média de cada usuário com os membros do grupo."""
+
+    @abstractmethod
+    def edges(self, threshold: float) -> Tuple[List[int], List[int], List[float]]:
+        """
+        Arestas não direcionadas (i < j) com a média dos dois sentidos acima
+        do limiar, como em cluster_users_louvain.
+        """
+
+
+class DenseRow(Mapping):
+    """Linha de uma DenseSimilarity, decodificada só no acesso."""
+
+    __slots__ = ('store', 'values')
+
+    def __init__(self, store: 'DenseSimilarity', position: int):
+        self.store = store
+        self.values = store.data[position]
+
+    def __getitem__(self, steam_id: str) -> float:
+        value = self.values[self.store.position[steam_id]]
+        return value / float(QUANTIZATION_LEVELS) if self.store.quantized else float(value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.steam_ids)
+
+    def __len__(self) -> int:
+        return len(self.store.steam_ids)
+
+    def items(self):
+        return zip(self.store.steam_ids, decode(self.values).tolist())
+
+
+class DenseSimilarity(SimilarityStore):
+    """Matriz n × n completa em um array codificado (float64, float32 ou uint8)."""
+
+    def __init__(self, steam_ids: List[str], data: np.ndarray, params: Optional[Dict] = None):
+        """
+        Args:
+            steam_ids: SteamID de cada linha/coluna
+            data: Matriz codificada (n × n)
+            params: Parâmetros do cálculo
+        """
+        super().__init__(steam_ids, params)
+        self.data = data
+        self.quantized = data.dtype == np.uint8
+
+    @classmethod
+    def build(cls, features, encoding: str = 'float32', rows_per_block: int = 256) -> 'DenseSimilarity':
+        """
+        Calcula a matriz em blocos de linhas e codifica cada bloco.
+
+        Args:
+            features: Usuários em arrays (blocked_similarity.UserFeatures)
+            encoding: 'float64', 'float32' ou 'uint8'
+            rows_per_block: Linhas calculadas por vez
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Codificação desconhecida: {encoding}")
+        n = features.num_users
+        data = np.empty((n, n), dtype=ENCODINGS[encoding])
+        for start in range(0, n, rows_per_block):
+            stop = min(start + rows_per_block, n)
+            data[start:stop] = encode(features.block(start, stop), encoding)
+        return cls(features.steam_ids, data, {'encoding': encoding})
+
+    def row(self, position: int) -> DenseRow:
+        return DenseRow(self, position)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def block(self, rows: List[int], columns: List[int]) -> np.ndarray:
+        return decode(self.data[np.ix_(rows, columns)])
+
+    def group_similarity(self, steam_ids: List[str]) -> np.ndarray:
+        members = [self.position[steam_id] for steam_id in steam_ids]
+        return decode(self.data[:, members]).mean(axis=1)
+
+    def edges(self, threshold: float, rows_per_block: int = 1024) -> Tuple[List[int], List[int], List[float]]:
+        n = len(self.steam_ids)
+        sources, targets, weights = [], [], []
+        for start in range(0, n, rows_per_block):
+            stop = min(start + rows_per_block, n)
+            block = (decode(self.data[start:stop]) + decode(self.data[:, start:stop]).T) / 2
+            rows, columns = np.nonzero(np.triu(block > threshold, k=start + 1))
+            sources.extend((rows + start).tolist())
+            targets.extend(columns.tolist())
+            weights.extend(block[rows, columns].tolist())
+        return sources, targets, weights
@@ -9,40 +9,74 @@ Autor: Sistema automatizado
 Data: 2025-06-28
 """
 
+import heapq
 import json
 import math
+import os
 from collections import defaultdict, Counter
-from typing import Dict, List, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Dict, List, Optional, Set, Tuple
 import logging
 
+import numpy as np
+
+import json_codec
+import similarity_kernels
+from als_recommender import ALSModel
+from blocked_similarity import SparseSimilarity, UserFeatures, compute_blocked
+from dataset_loader import DatasetError, build_game_database, load_dataset
+from delta_crawl import merge_changeset
+from friendship_graph import INCOMING, OUTGOING, FriendshipGraph
+from graph_layout import compute_layout
+from item_index import ItemIndex
+from lazy_similarity import LazySimilarity
+from louvain import best_partition, csr_from_edges
+from result_cache import ResultCache, group_key
+from similarity_store import DenseSimilarity, SimilarityStore
+
 logger = logging.getLogger(__name__)
 
+# Memória (MB) de cada bloco lido da matriz no clustering, quando a matriz
+# não traz o seu orçamento (memory_budget_mb de create_similarity_matrix_blocked)
+CLUSTER_BLOCK_MB = 512
+
 
 class SteamGraphAnalyzer:
     """Analisador de grafo de usuários Steam para clustering e recomendações."""
     
-    def __init__(self, data_file: str = "steam_user_data.json"):
+    def __init__(self, data_file: str = "steam_user_data.json",
+                 cache_size: int = 1024, cache_ttl: float = 300.0):
         """
         Inicializa o analisador com os dados do Steam.
         
         Args:
-            data_file: Arquivo JSON com dados dos usuários
+            data_file: Arquivo JSON com dados dos usuários (ou JSONL, como os
+                registros compactos do minerador), lido por dataset_loader
+            cache_size: Máximo de consultas de recomendação em cache
+            cache_ttl: Validade (s) de cada recomendação em cache
         """
         self.data_file = data_file
         self.users_data = []
         self.game_database = {}
+        self.game_ids = []
+        self.user_position = {}
+        self.friendship_graph = None
         self.user_similarity_matrix = {}
         self.clusters = []
         self.game_recommendations = {}
+        self.recommendation_cache = ResultCache(cache_size, cache_ttl)
+        self.recommendation_model = None
+        self.item_index = None
         
     def load_data(self) -> bool:
-        """Carrega os dados dos usuários do arquivo JSON."""
+        """
+        Carrega os dados dos usuários do arquivo JSON (ou JSONL), com os índices
+        de jogos e de amizades prontos no cache do dataset_loader.
+        """
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                self.users_data = json.load(f)
-            
-            logger.info(f"Carregados {len(self.users_data)} usuários")
-            self._build_game_database()
+            dataset = load_dataset(self.data_file)
+            self.load_users(dataset.users, dataset.game_database, dataset.graph)
             return True
             
         except FileNotFoundError:
@@ -51,32 +85,90 @@ class SteamGraphAnalyzer:
         except json.JSONDecodeError:
             logger.error("Erro ao decodificar arquivo JSON")
             return False
+        except DatasetError as e:
+            logger.error(f"Dataset inválido: {e}")
+            return False
     
-    def _build_game_database(self):
-        """Constrói um banco de dados de jogos únicos."""
-        self.game_database = {}
+    def load_users(self, users: List[Dict], game_database: Optional[Dict] = None,
+                   graph: Optional[FriendshipGraph] = None):
+        """
+        Usa uma lista de usuários já carregada (ex.: a etapa de redução de
+        distributed_analysis.py), com o banco de jogos e o grafo de amizades
+        calculados aqui se omitidos.
+        """
+        self.users_data = users
+        logger.info(f"Carregados {len(self.users_data)} usuários")
+        self.recommendation_cache.invalidate()
+        self.game_database = game_database if game_database is not None else build_game_database(users)
+        self._build_ownership_index()
+        self.friendship_graph = graph or FriendshipGraph.from_users(users)
+    
+    def apply_changeset(self, changeset: Dict, workers: int = 1) -> int:
+        """
+        Aplica um changeset da recoleta incremental (delta_crawl.py).
         
-        for user in self.users_data:
-            games = user.get('owned_games', {}).get('games', [])
-            for game in games:
-                app_id = str(game.get('appid', ''))
-                if app_id and app_id not in self.game_database:
-                    self.game_database[app_id] = {
-                        'appid': app_id,
-                        'name': game.get('name', f'Game {app_id}'),
-                        'owners': [],
-                        'total_playtime': 0,
-                        'avg_playtime': 0
-                    }
-                
-                if app_id:
-                    self.game_database[app_id]['owners'].append(user['steam_id'])
-                    self.game_database[app_id]['total_playtime'] += game.get('playtime_forever', 0)
+        Os índices de jogos e o grafo de amizades são reconstruídos (lineares);
+        da matriz de similaridade, só as linhas e colunas dos usuários
+        atualizados são recalculadas. Usuários novos entram no cluster mais
+        similar e as características/recomendações dos clusters são refeitas.
+        O índice item-item (build_item_index), se ativo, é mantido como está
+        até ser recalculado.
+        
+        Args:
+            changeset: Changeset com os usuários atualizados em 'updated'
+            workers: Threads para processar os clusters (process_clusters)
+            
+        Returns:
+            Número de usuários atualizados
+        """
+        changed = [user['steam_id'] for user in changeset['updated']]
+        if not changed:
+            return 0
+        
+        known = {user['steam_id'] for user in self.users_data}
+        self.users_data = merge_changeset(self.users_data, changeset)
+        self.recommendation_cache.invalidate()
+        self._build_game_database()
+        self.friendship_graph = FriendshipGraph.from_users(self.users_data)
+        
+        if self.recommendation_model is not None:
+            for user in changeset['updated']:
+                self.recommendation_model.fold_in(user)
         
-        # Calcular tempo médio de jogo
-        for game in self.game_database.values():
-            if len(game['owners']) > 0:
-                game['avg_playtime'] = game['total_playtime'] / len(game['owners'])
+        if isinstance(self.user_similarity_matrix, SparseSimilarity):
+            # Matriz em blocos (em disco): recalculada com os mesmos parâmetros
+            self.create_similarity_matrix_blocked(**self.user_similarity_matrix.params)
+        elif isinstance(self.user_similarity_matrix, DenseSimilarity):
+            self.create_similarity_matrix(**self.user_similarity_matrix.params)
+        elif isinstance(self.user_similarity_matrix, LazySimilarity):
+            # Sob demanda: só os arrays de features (lineares) e caches vazios
+            self.create_similarity_matrix_lazy(**self.user_similarity_matrix.params)
+        elif self.user_similarity_matrix:
+            users_by_id = {user['steam_id']: user for user in self.users_data}
+            for steam_id in changed:
+                user = users_by_id[steam_id]
+                row = self.user_similarity_matrix.setdefault(steam_id, {})
+                for other in self.users_data:
+                    other_id = other['steam_id']
+                    if other_id == steam_id:
+                        row[other_id] = 1.0
+                        continue
+                    row[other_id] = self.calculate_user_similarity(user, other)
+                    self.user_similarity_matrix.setdefault(other_id, {})[steam_id] = (
+                        self.calculate_user_similarity(other, user))
+        
+        new_users = [steam_id for steam_id in changed if steam_id not in known]
+        if self.clusters and self.user_similarity_matrix:
+            self._assign_to_best_cluster(new_users)
+            self.process_clusters(workers)
+        
+        logger.info(f"Changeset aplicado: {len(changed)} usuários atualizados ({len(new_users)} novos)")
+        return len(changed)
+    
+    def _build_game_database(self):
+        """Constrói um banco de jogos únicos (e o índice de posse em arrays)."""
+        self.game_database = build_game_database(self.users_data)
+        self._build_ownership_index()
     
     def calculate_user_similarity(self, user1: Dict, user2: Dict) -> float:
         """
@@ -102,7 +194,8 @@ class SteamGraphAnalyzer:
             # Similaridade de tempo de jogo nos jogos em comum (peso: 20%)
             if common_games:
                 time_similarities = []
-                for game in common_games:
+                # Em ordem de appid: a soma não depende da ordem do set (similarity_kernels)
+                for game in sorted(common_games):
                     time1 = games1[game]
                     time2 = games2[game]
                     if time1 + time2 > 0:
@@ -125,12 +218,38 @@ class SteamGraphAnalyzer:
         
         return min(similarity, 1.0)
     
-    def create_similarity_matrix(self):
-        """Cria matriz de similaridade entre todos os usuários."""
+    def create_similarity_matrix(self, encoding: Optional[str] = None):
+        """
+        Cria matriz de similaridade entre todos os usuários.
+        
+        Args:
+            encoding: None para o dicionário de dicionários, ou a codificação
+                de uma matriz compacta (similarity_store.py): 'float64',
+                'float32' ou 'uint8' (quantizada, 1 byte por par)
+        """
         logger.info("Calculando matriz de similaridade...")
+        # Recomendações em cache vêm da matriz anterior (qualquer caminho abaixo)
+        self.recommendation_cache.invalidate()
+        
+        if encoding is not None:
+            features = UserFeatures(self.users_data, self.friendship_graph)
+            self.user_similarity_matrix = DenseSimilarity.build(features, encoding)
+            logger.info(f"Matriz {encoding}: {self.user_similarity_matrix.nbytes / 1e6:.1f} MB")
+            return
         
         self.user_similarity_matrix = {}
         
+        if similarity_kernels.ENABLED:
+            # Kernels compilados (Numba): mesmos valores, calculados em blocos de linhas
+            arrays = similarity_kernels.UserArrays(self.users_data).arrays()
+            steam_ids = [user['steam_id'] for user in self.users_data]
+            for start in range(0, len(steam_ids), 256):
+                stop = min(start + 256, len(steam_ids))
+                block = similarity_kernels.similarity_block(*arrays, start, stop)
+                for i in range(start, stop):
+                    self.user_similarity_matrix[steam_ids[i]] = dict(zip(steam_ids, block[i - start].tolist()))
+            return
+        
         for i, user1 in enumerate(self.users_data):
             self.user_similarity_matrix[user1['steam_id']] = {}
             
@@ -141,6 +260,51 @@ class SteamGraphAnalyzer:
                 else:
                     self.user_similarity_matrix[user1['steam_id']][user2['steam_id']] = 1.0
     
+    def create_similarity_matrix_blocked(self, memory_budget_mb: float = 512, top_k: Optional[int] = 50,
+                                         threshold: float = 0.0, output_dir: Optional[str] = None,
+                                         encoding: str = 'float32', progress=None) -> SparseSimilarity:
+        """
+        Calcula a matriz de similaridade em blocos de linhas com memória
+        limitada (blocked_similarity.py), guardando só os pares acima do
+        limiar e os top-k de cada usuário em disco. Pares podados valem 0 nas
+        consultas de clustering e recomendação.
+        
+        Args:
+            memory_budget_mb: Memória de trabalho por bloco
+            top_k: Pares mantidos por usuário (None = todos acima do limiar)
+            threshold: Similaridade mínima de um par mantido
+            output_dir: Diretório da matriz em disco (padrão: .similarity/
+                ao lado do arquivo de dados)
+            encoding: Codificação dos valores ('float32' ou 'uint8')
+            progress: Chamado após cada bloco com (usuários feitos, total, ETA)
+        """
+        output_dir = output_dir or os.path.join(os.path.dirname(os.path.abspath(self.data_file)), '.similarity')
+        logger.info(f"Calculando matriz de similaridade em blocos ({memory_budget_mb} MB, top {top_k})...")
+        
+        features = UserFeatures(self.users_data, self.friendship_graph)
+        compute_blocked(features, output_dir, memory_budget_mb, top_k, threshold, encoding, progress)
+        params = {'memory_budget_mb': memory_budget_mb, 'top_k': top_k, 'threshold': threshold,
+                  'output_dir': output_dir, 'encoding': encoding}
+        self.user_similarity_matrix = SparseSimilarity.open(output_dir, features.steam_ids, params)
+        self.recommendation_cache.invalidate()
+        return self.user_similarity_matrix
+    
+    def create_similarity_matrix_lazy(self, cache_pairs: int = 100_000, cache_rows: int = 256) -> LazySimilarity:
+        """
+        Similaridade sob demanda (lazy_similarity.py): nenhum par é calculado
+        aqui; cada par ou linha é calculado no primeiro acesso e memorizado
+        em caches LRU limitados. Para execuções que só exportam o grafo ou
+        só respondem consultas, sem o passo quadrático.
+        
+        Args:
+            cache_pairs: Pares memorizados
+            cache_rows: Linhas inteiras memorizadas (nearest_users)
+        """
+        features = UserFeatures(self.users_data, self.friendship_graph)
+        self.user_similarity_matrix = LazySimilarity(features, cache_pairs, cache_rows)
+        self.recommendation_cache.invalidate()
+        return self.user_similarity_matrix
+    
     def cluster_users(self, num_clusters: int = 5, similarity_threshold: float = 0.3):
         """
         Agrupa usuários em clusters baseado em similaridade.
@@ -151,6 +315,13 @@ class SteamGraphAnalyzer:
         # Inicializar clusters
         self.clusters = []
         unassigned_users = set(user['steam_id'] for user in self.users_data)
+        store = self.user_similarity_matrix if isinstance(self.user_similarity_matrix, SimilarityStore) else None
+        if store is None and similarity_kernels.ENABLED and len(self.user_similarity_matrix) > 1:
+            # Kernels compilados: o dicionário é copiado uma vez para uma matriz densa
+            steam_ids = list(self.user_similarity_matrix)
+            columns = itemgetter(*steam_ids)
+            store = DenseSimilarity(steam_ids, np.array([columns(self.user_similarity_matrix[steam_id])
+                                                         for steam_id in steam_ids], dtype=np.float64))
         
         # Para cada cluster desejado
         for cluster_id in range(num_clusters):
@@ -158,10 +329,13 @@ class SteamGraphAnalyzer:
                 break
                 
             # Escolher usuário seed (mais conectado entre os não assignados)
-            seed_user = max(unassigned_users, 
-                          key=lambda u: sum(1 for other in unassigned_users 
-                                          if other != u and 
-                                          self.user_similarity_matrix[u][other] > similarity_threshold))
+            if store is not None:
+                seed_user = self._densest_user(store, list(unassigned_users), similarity_threshold)
+            else:
+                seed_user = max(unassigned_users, 
+                              key=lambda u: sum(1 for other in unassigned_users 
+                                              if other != u and 
+                                              self.user_similarity_matrix[u][other] > similarity_threshold))
             
             # Criar cluster começando com o seed
             cluster = {
@@ -174,6 +348,11 @@ class SteamGraphAnalyzer:
             unassigned_users.remove(seed_user)
             
             # Adicionar usuários similares ao cluster
+            if store is not None:
+                self._grow_cluster(store, cluster, unassigned_users, similarity_threshold)
+                self.clusters.append(cluster)
+                continue
+            
             for user_id in list(unassigned_users):
                 # Calcular similaridade média com usuários já no cluster
                 avg_similarity = sum(self.user_similarity_matrix[user_id][cluster_user] 
@@ -186,97 +365,485 @@ class SteamGraphAnalyzer:
             self.clusters.append(cluster)
         
         # Adicionar usuários não assignados ao cluster mais similar
-        for user_id in unassigned_users:
-            best_cluster = max(self.clusters, 
-                             key=lambda c: max(self.user_similarity_matrix[user_id][cu] for cu in c['users']))
-            best_cluster['users'].append(user_id)
+        self._assign_to_best_cluster(unassigned_users)
+    
+    @staticmethod
+    def _use_kernels(store: SimilarityStore) -> bool:
+        """Se o clustering pode usar os kernels compilados (matriz densa em float64)."""
+        return (similarity_kernels.ENABLED and isinstance(store, DenseSimilarity)
+                and store.data.dtype == np.float64)
+    
+    @staticmethod
+    def _rows_per_block(store: SimilarityStore, columns: int) -> int:
+        """Linhas de cada store.block com `columns` colunas dentro do orçamento de memória."""
+        budget = store.params.get('memory_budget_mb', CLUSTER_BLOCK_MB) * 1024 * 1024
+        # float64 do bloco mais a máscara/temporários de cada célula
+        return max(1, int(budget // (max(columns, 1) * 16)))
+    
+    @staticmethod
+    def _densest_user(store: SimilarityStore, candidates: List[str], similarity_threshold: float) -> str:
+        """Candidato com mais similares acima do limiar entre os candidatos (o primeiro, em empates)."""
+        columns = [store.position[user_id] for user_id in candidates]
+        if SteamGraphAnalyzer._use_kernels(store):
+            counts = similarity_kernels.count_above(store.data, np.array(columns, dtype=np.int64),
+                                                    similarity_threshold)
+            return candidates[int(np.argmax(counts))]
+        counts = np.zeros(len(columns), dtype=np.int64)
+        step = SteamGraphAnalyzer._rows_per_block(store, len(columns))
+        for start in range(0, len(columns), step):
+            above = store.block(columns[start:start + step], columns) > similarity_threshold
+            above[np.arange(len(above)), np.arange(start, start + len(above))] = False
+            counts[start:start + len(above)] = above.sum(axis=1)
+        return candidates[int(np.argmax(counts))]
+    
+    @staticmethod
+    def _grow_cluster(store: SimilarityStore, cluster: Dict, unassigned_users: Set[str],
+                      similarity_threshold: float):
+        """
+        Adiciona ao cluster, na ordem de unassigned_users, quem tem
+        similaridade média acima do limiar com os membros (como em
+        cluster_users, com as somas mantidas em um vetor).
+        """
+        candidates = list(unassigned_users)
+        rows = [store.position[user_id] for user_id in candidates]
+        if SteamGraphAnalyzer._use_kernels(store):
+            members = np.array([store.position[member] for member in cluster['users']], dtype=np.int64)
+            added = similarity_kernels.grow_cluster(store.data, members, np.array(rows, dtype=np.int64),
+                                                    similarity_threshold)
+            for i in np.flatnonzero(added).tolist():
+                cluster['users'].append(candidates[i])
+                unassigned_users.remove(candidates[i])
+            return
+        rows = np.array(rows, dtype=np.int64)
+        sums = np.zeros(len(rows))
+        for member in cluster['users']:
+            sums += store.block(rows, [store.position[member]])[:, 0]
+        
+        for i, user_id in enumerate(candidates):
+            if sums[i] / len(cluster['users']) > similarity_threshold:
+                cluster['users'].append(user_id)
+                unassigned_users.remove(user_id)
+                sums += store.block(rows, [store.position[user_id]])[:, 0]
+    
+    def _assign_to_best_cluster(self, user_ids):
+        """Adiciona cada usuário ao cluster com o membro mais similar a ele."""
+        if not isinstance(self.user_similarity_matrix, SimilarityStore):
+            for user_id in user_ids:
+                best_cluster = max(self.clusters, 
+                                 key=lambda c: max(self.user_similarity_matrix[user_id][cu] for cu in c['users']))
+                best_cluster['users'].append(user_id)
+            return
+        
+        store = self.user_similarity_matrix
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        rows = np.array([store.position[user_id] for user_id in user_ids], dtype=np.int64)
+        best = np.empty((len(rows), len(self.clusters)))
+        for c, cluster in enumerate(self.clusters):
+            members = [store.position[member] for member in cluster['users']]
+            step = self._rows_per_block(store, len(members))
+            for start in range(0, len(rows), step):
+                best[start:start + step, c] = store.block(rows[start:start + step], members).max(axis=1)
+        
+        # Cada usuário adicionado também conta para os próximos
+        for i, user_id in enumerate(user_ids):
+            c = int(np.argmax(best[i]))
+            self.clusters[c]['users'].append(user_id)
+            np.maximum(best[:, c], store.block(rows, [store.position[user_id]])[:, 0], out=best[:, c])
+    
+    def cluster_users_louvain(self, num_clusters: int = 5, similarity_threshold: float = 0.3,
+                              resolution: float = 1.0, seed: int = 42):
+        """
+        Agrupa usuários com o Louvain nativo sobre o grafo de similaridade.
+        
+        Pares com similaridade acima do limiar viram arestas ponderadas pela
+        similaridade média dos dois sentidos. As `num_clusters` maiores
+        comunidades viram clusters; usuários das demais vão para o cluster
+        mais similar, como em cluster_users.
+        """
+        logger.info(f"Criando até {num_clusters} clusters de usuários (Louvain)...")
+        
+        steam_ids = [user['steam_id'] for user in self.users_data]
+        if isinstance(self.user_similarity_matrix, SimilarityStore):
+            sources, targets, weights = self.user_similarity_matrix.edges(similarity_threshold)
+        else:
+            sources, targets, weights = [], [], []
+            for i, user_id in enumerate(steam_ids):
+                row = self.user_similarity_matrix[user_id]
+                for j in range(i + 1, len(steam_ids)):
+                    other_id = steam_ids[j]
+                    weight = (row[other_id] + self.user_similarity_matrix[other_id][user_id]) / 2
+                    if weight > similarity_threshold:
+                        sources.append(i)
+                        targets.append(j)
+                        weights.append(weight)
+        
+        indptr, indices, values = csr_from_edges(len(steam_ids), sources, targets, weights)
+        labels = best_partition(indptr, indices, values, resolution=resolution, seed=seed)
+        
+        # Maiores comunidades primeiro (empate: menor rótulo)
+        sizes = Counter(labels.tolist())
+        ranked = sorted(sizes, key=lambda label: (-sizes[label], label))[:num_clusters]
+        cluster_of_label = {label: cluster_id for cluster_id, label in enumerate(ranked)}
+        
+        self.clusters = [{
+            'id': cluster_id,
+            'users': [],
+            'characteristics': {},
+            'recommended_games': []
+        } for cluster_id in range(len(ranked))]
+        
+        unassigned_users = []
+        for user_id, label in zip(steam_ids, labels.tolist()):
+            if label in cluster_of_label:
+                self.clusters[cluster_of_label[label]]['users'].append(user_id)
+            else:
+                unassigned_users.append(user_id)
+        
+        # Adicionar usuários de comunidades pequenas ao cluster mais similar
+        self._assign_to_best_cluster(unassigned_users)
     
     def analyze_cluster_characteristics(self):
         """Analisa características de cada cluster."""
         for cluster in self.clusters:
-            cluster_users = [user for user in self.users_data if user['steam_id'] in cluster['users']]
-            
-            # Jogos mais populares no cluster
-            game_popularity = Counter()
-            total_playtime_by_game = defaultdict(int)
-            
-            for user in cluster_users:
-                games = user.get('owned_games', {}).get('games', [])
-                for game in games:
-                    app_id = str(game.get('appid', ''))
-                    if app_id:
-                        game_popularity[app_id] += 1
-                        total_playtime_by_game[app_id] += game.get('playtime_forever', 0)
-            
-            # Características do cluster
-            characteristics = {
-                'size': len(cluster['users']),
-                'avg_games_per_user': sum(len(u.get('owned_games', {}).get('games', [])) for u in cluster_users) / len(cluster_users),
-                'most_popular_games': game_popularity.most_common(10),
-                'countries': Counter(u.get('profile_info', {}).get('loccountrycode', 'Unknown') for u in cluster_users),
-                'avg_playtime_per_user': sum(sum(g.get('playtime_forever', 0) for g in u.get('owned_games', {}).get('games', [])) for u in cluster_users) / len(cluster_users)
-            }
+            self._analyze_cluster(cluster)
+    
+    def _analyze_cluster(self, cluster: Dict):
+        """Calcula as características de um cluster."""
+        members = set(cluster['users'])
+        cluster_users = [user for user in self.users_data if user['steam_id'] in members]
+        
+        # Jogos mais populares no cluster
+        game_popularity = Counter()
+        total_playtime_by_game = defaultdict(int)
+        
+        for user in cluster_users:
+            games = user.get('owned_games', {}).get('games', [])
+            for game in games:
+                app_id = str(game.get('appid', ''))
+                if app_id:
+                    game_popularity[app_id] += 1
+                    total_playtime_by_game[app_id] += game.get('playtime_forever', 0)
+        
+        # Características do cluster
+        characteristics = {
+            'size': len(cluster['users']),
+            'avg_games_per_user': sum(len(u.get('owned_games', {}).get('games', [])) for u in cluster_users) / len(cluster_users),
+            'most_popular_games': game_popularity.most_common(10),
+            'countries': Counter(u.get('profile_info', {}).get('loccountrycode', 'Unknown') for u in cluster_users),
+            'avg_playtime_per_user': sum(sum(g.get('playtime_forever', 0) for g in u.get('owned_games', {}).get('games', [])) for u in cluster_users) / len(cluster_users)
+        }
+        
+        cluster['characteristics'] = characteristics
+    
+    def process_clusters(self, workers: int = 1):
+        """
+        Calcula características e recomendações de todos os clusters.
+        
+        Cada cluster é independente dos demais, então com workers > 1 os
+        clusters são processados em paralelo (threads; a pontuação de
+        recomendações roda em numpy).
+        
+        Args:
+            workers: Número de threads
+        """
+        def process(cluster: Dict):
+            self._analyze_cluster(cluster)
+            cluster['recommended_games'] = self.recommend_for_group(cluster['users'], top_n=10)
+        
+        if workers <= 1 or len(self.clusters) <= 1:
+            for cluster in self.clusters:
+                process(cluster)
+            return
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # list() propaga exceções das threads
+            list(executor.map(process, self.clusters))
+    
+    def _build_ownership_index(self):
+        """
+        Índice de posse em arrays: uma entrada (jogo, usuário) por posse,
+        na ordem de game_database, para pontuar jogos de forma vetorizada.
+        """
+        user_position = {user['steam_id']: i for i, user in enumerate(self.users_data)}
+        self.game_ids = list(self.game_database)
+        
+        entry_game = []
+        entry_user = []
+        for game_index, game_info in enumerate(self.game_database.values()):
+            for owner_id in game_info['owners']:
+                entry_game.append(game_index)
+                entry_user.append(user_position[owner_id])
+        
+        self.ownership_entry_game = np.array(entry_game, dtype=np.int64)
+        self.ownership_entry_user = np.array(entry_user, dtype=np.int64)
+        self.user_position = user_position
+        
+        num_games = len(self.game_ids)
+        self.game_owner_count = np.bincount(self.ownership_entry_game, minlength=num_games)
+        self.game_avg_playtime = np.array([g['avg_playtime'] for g in self.game_database.values()],
+                                          dtype=np.float64).reshape(num_games)
+    
+    def recommend_for_group(self, steam_ids: List[str], top_n: int = 10) -> List[Dict]:
+        """
+        Recomenda jogos que nenhum membro do grupo possui.
+        
+        Score baseado em:
+        1. Popularidade geral do jogo
+        2. Tempo médio de jogo (jogos mais envolventes)
+        3. Posse por usuários similares ao grupo
+        
+        Args:
+            steam_ids: SteamIDs do grupo (cluster ou grupo de amigos)
+            top_n: Número de recomendações
             
-            cluster['characteristics'] = characteristics
+        Returns:
+            Lista de recomendações ordenada por score
+        """
+        key = group_key(steam_ids, top_n=top_n)
+        cached = self.recommendation_cache.get(key)
+        if cached is None:
+            cached = self._score_group(steam_ids, top_n)
+            self.recommendation_cache.put(key, cached)
+        
+        return [dict(recommendation) for recommendation in cached]
+    
+    def train_recommendation_model(self, model_path: Optional[str] = None, **params) -> ALSModel:
+        """
+        Ativa o recomendador ALS (als_recommender.py) no lugar do score
+        heurístico de recommend_for_group.
+        
+        Args:
+            model_path: Arquivo .npz do modelo. Se existir e tiver sido treinado
+                sobre os mesmos usuários, jogos e tempos de jogo, é reaproveitado;
+                senão o modelo é treinado e salvo nele
+            **params: Hiperparâmetros de ALSModel.train
+        """
+        model = None
+        if model_path and os.path.exists(model_path):
+            model = ALSModel.load(model_path)
+            if not model.matches(self.users_data):
+                logger.info(f"Modelo {model_path} é de outro dataset; treinando de novo")
+                model = None
+        
+        if model is None:
+            model = ALSModel.train(self.users_data, **params)
+            if model_path:
+                model.save(model_path)
+        
+        self.recommendation_model = model
+        self.recommendation_cache.invalidate()
+        return model
+    
+    def build_item_index(self, index_path: Optional[str] = None, **params) -> ItemIndex:
+        """
+        Ativa as recomendações por vizinhos de co-posse (item_index.py) no
+        lugar do score heurístico de recommend_for_group.
+        
+        Args:
+            index_path: Arquivo .npz do índice. Se existir e tiver sido calculado
+                sobre os mesmos usuários, jogos e tempos de jogo, é reaproveitado;
+                senão o índice é calculado e salvo nele
+            **params: Parâmetros de ItemIndex.build
+        """
+        index = None
+        if index_path and os.path.exists(index_path):
+            index = ItemIndex.load(index_path)
+            if not index.matches(self.users_data):
+                logger.info(f"Índice {index_path} é de outro dataset; recalculando")
+                index = None
+        
+        if index is None:
+            index = ItemIndex.build(self.users_data, **params)
+            if index_path:
+                index.save(index_path)
+        
+        self.item_index = index
+        self.recommendation_cache.invalidate()
+        return index
+    
+    def _recommendation_entry(self, app_id: str, score: float) -> Dict:
+        """Recomendação de um modelo (ALS ou índice item-item) no formato de _score_group."""
+        game = self.game_database[app_id]
+        return {
+            'appid': app_id,
+            'name': game['name'],
+            'score': score,
+            'popularity': len(game['owners']) / len(self.users_data),
+            'engagement': min(game['avg_playtime'] / 1000, 1.0)
+        }
+    
+    def _score_group_items(self, steam_ids: List[str], top_n: int) -> List[Dict]:
+        """
+        Recomendações pelo índice item-item: junta as listas de vizinhos dos
+        jogos do grupo, cada jogo pesando pelo número de membros que o possuem.
+        """
+        group = [steam_id for steam_id in dict.fromkeys(steam_ids) if steam_id in self.user_position]
+        if not group:
+            return []
+        
+        weights = Counter()
+        for steam_id in group:
+            games = self.users_data[self.user_position[steam_id]].get('owned_games', {}).get('games', [])
+            weights.update({str(game.get('appid', '')) for game in games})
+        
+        return [self._recommendation_entry(app_id, score / len(group))
+                for app_id, score in self.item_index.related(weights, top_n)
+                if app_id in self.game_database]
+    
+    def _score_group_model(self, steam_ids: List[str], top_n: int) -> List[Dict]:
+        """
+        Recomendações do modelo ALS (produto escalar com o vetor do grupo),
+        sem os jogos que os membros possuem nos dados atuais (o modelo só
+        conhece as posses do treino e dos usuários incorporados).
+        """
+        owned = set()
+        for steam_id in steam_ids:
+            position = self.user_position.get(steam_id)
+            if position is not None:
+                owned.update(str(game.get('appid', ''))
+                             for game in self.users_data[position].get('owned_games', {}).get('games', []))
+        return [self._recommendation_entry(app_id, score)
+                for app_id, score in self.recommendation_model.recommend(steam_ids, top_n, exclude=owned)
+                if app_id in self.game_database]
+    
+    def _score_group(self, steam_ids: List[str], top_n: int) -> List[Dict]:
+        """Pontua o catálogo para um grupo (caminho sem cache de recommend_for_group)."""
+        if self.recommendation_model is not None:
+            return self._score_group_model(steam_ids, top_n)
+        if self.item_index is not None:
+            return self._score_group_items(steam_ids, top_n)
+        
+        group = [steam_id for steam_id in dict.fromkeys(steam_ids) if steam_id in self.user_position]
+        if not group or not self.game_ids:
+            return []
+        
+        num_users = len(self.users_data)
+        num_games = len(self.game_ids)
+        in_group = np.zeros(num_users, dtype=bool)
+        in_group[[self.user_position[steam_id] for steam_id in group]] = True
+        
+        # Similaridade média de cada usuário com o grupo
+        if isinstance(self.user_similarity_matrix, SimilarityStore):
+            group_similarity = self.user_similarity_matrix.group_similarity(group)
+        else:
+            group_similarity = np.array([
+                sum(self.user_similarity_matrix.get(user['steam_id'], {}).get(member, 0) for member in group)
+                for user in self.users_data
+            ]) / len(group)
+        
+        # Jogos do grupo não são candidatos
+        group_entries = in_group[self.ownership_entry_user]
+        owned_by_group = np.bincount(self.ownership_entry_game[group_entries], minlength=num_games) > 0
+        candidates = ~owned_by_group & (self.game_owner_count > 1)
+        
+        # Similaridade média dos donos (fora do grupo) com o grupo
+        outside = ~group_entries
+        similar_owners = np.bincount(self.ownership_entry_game[outside], minlength=num_games)
+        similarity_sum = np.bincount(self.ownership_entry_game[outside],
+                                     weights=group_similarity[self.ownership_entry_user[outside]],
+                                     minlength=num_games)
+        similarity_score = np.divide(similarity_sum, similar_owners,
+                                     out=np.zeros(num_games), where=similar_owners > 0)
+        
+        popularity_score = self.game_owner_count / num_users
+        engagement_score = np.minimum(self.game_avg_playtime / 1000, 1.0)  # Normalizar
+        total_score = (0.3 * popularity_score + 
+                       0.3 * engagement_score + 
+                       0.4 * similarity_score)
+        
+        # Ordenar por score (estável: empates na ordem do game_database)
+        candidate_index = np.flatnonzero(candidates)
+        ranked = candidate_index[np.argsort(-total_score[candidate_index], kind='stable')][:top_n]
+        
+        return [{
+            'appid': self.game_ids[i],
+            'name': self.game_database[self.game_ids[i]]['name'],
+            'score': float(total_score[i]),
+            'popularity': float(popularity_score[i]),
+            'engagement': float(engagement_score[i]),
+            'similarity': float(similarity_score[i])
+        } for i in ranked.tolist()]
+    
+    def nearest_users(self, steam_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Os k usuários mais similares a `steam_id` (pela matriz de similaridade)."""
+        row = self.user_similarity_matrix.get(steam_id, {})
+        return heapq.nlargest(k, ((other, sim) for other, sim in row.items() if other != steam_id),
+                              key=lambda item: item[1])
     
     def generate_game_recommendations(self):
         """Gera recomendações de jogos para cada cluster."""
         for cluster in self.clusters:
-            cluster_users = [user for user in self.users_data if user['steam_id'] in cluster['users']]
-            
-            # Jogos que o cluster possui
-            cluster_games = set()
-            for user in cluster_users:
-                user_games = {str(g['appid']) for g in user.get('owned_games', {}).get('games', [])}
-                cluster_games.update(user_games)
-            
-            # Calcular score de recomendação para cada jogo não possuído
-            recommendations = []
-            
-            for app_id, game_info in self.game_database.items():
-                if app_id not in cluster_games and len(game_info['owners']) > 1:
-                    # Score baseado em:
-                    # 1. Popularidade geral do jogo
-                    # 2. Tempo médio de jogo (jogos mais envolventes)
-                    # 3. Posse por usuários similares
-                    
-                    popularity_score = len(game_info['owners']) / len(self.users_data)
-                    engagement_score = min(game_info['avg_playtime'] / 1000, 1.0)  # Normalizar
-                    
-                    # Verificar se usuários similares possuem o jogo
-                    similarity_score = 0
-                    similar_owners = 0
-                    
-                    for owner_id in game_info['owners']:
-                        if owner_id not in cluster['users']:
-                            # Calcular similaridade média com o cluster
-                            avg_sim = sum(self.user_similarity_matrix.get(owner_id, {}).get(cluster_user, 0) 
-                                        for cluster_user in cluster['users']) / len(cluster['users'])
-                            similarity_score += avg_sim
-                            similar_owners += 1
-                    
-                    if similar_owners > 0:
-                        similarity_score /= similar_owners
-                    
-                    total_score = (0.3 * popularity_score + 
-                                 0.3 * engagement_score + 
-                                 0.4 * similarity_score)
-                    
-                    recommendations.append({
-                        'appid': app_id,
-                        'name': game_info['name'],
-                        'score': total_score,
-                        'popularity': popularity_score,
-                        'engagement': engagement_score,
-                        'similarity': similarity_score
-                    })
+            # Top 10 jogos não possuídos pelo cluster
+            cluster['recommended_games'] = self.recommend_for_group(cluster['users'], top_n=10)
+    
+    def _load_previous_layout(self, output_file: str) -> Dict[str, Tuple[float, float]]:
+        """Lê as coordenadas dos nós de um export anterior, se existir."""
+        try:
+            previous = json_codec.load(output_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        return {node['id']: (node['x'], node['y'])
+                for node in previous.get('nodes', [])
+                if 'x' in node and 'y' in node}
+    
+    def friendship_pairs(self) -> List[Tuple[str, str]]:
+        """
+        Amizades exportadas: cada par aparece uma vez, quando o usuário de
+        menor SteamID lista o outro como amigo.
+        """
+        pairs = []
+        steam_ids = self.friendship_graph.steam_ids
+        sources, targets, flags = self.friendship_graph.edges()
+        
+        for u, v, flag in zip(sources.tolist(), targets.tolist(), flags.tolist()):
+            if steam_ids[u] < steam_ids[v]:
+                user_id, friend_id, listed = steam_ids[u], steam_ids[v], flag & OUTGOING
+            else:
+                user_id, friend_id, listed = steam_ids[v], steam_ids[u], flag & INCOMING
             
-            # Ordenar por score e pegar top 10
-            recommendations.sort(key=lambda x: x['score'], reverse=True)
-            cluster['recommended_games'] = recommendations[:10]
+            if listed:
+                pairs.append((user_id, friend_id))
+        
+        return pairs
     
-    def export_for_visualization(self, output_file: str = "steam_graph_data.json"):
-        """Exporta dados processados para visualização."""
+    def layout_inputs(self, output_file: str = "steam_graph_data.json") -> Tuple[List[str], List[Tuple[str, str]], Dict]:
+        """
+        Argumentos de compute_layout para o export: nós, amizades e o layout
+        do export anterior. Dependem apenas do grafo de amizades, então o
+        layout pode ser calculado (em outro processo) enquanto a similaridade
+        e os clusters são calculados.
+        """
+        return ([user['steam_id'] for user in self.users_data],
+                self.friendship_pairs(),
+                self._load_previous_layout(output_file))
+    
+    def compute_export_layout(self, output_file: str = "steam_graph_data.json") -> Tuple[Dict, Dict]:
+        """
+        Calcula as coordenadas dos nós do export, reaproveitando o layout do
+        export anterior quando o grafo mudou pouco.
+        
+        Returns:
+            Tupla (posições {steam_id: (x, y)}, informações do layout)
+        """
+        positions, layout_info = compute_layout(*self.layout_inputs(output_file))
+        logger.info(f"Layout calculado ({'incremental' if layout_info['incremental'] else 'completo'})")
+        return positions, layout_info
+    
+    def export_for_visualization(self, output_file: str = "steam_graph_data.json",
+                                 with_layout: bool = True,
+                                 layout: Optional[Tuple[Dict, Dict]] = None):
+        """
+        Exporta dados processados para visualização.
+        
+        Args:
+            output_file: Arquivo JSON de saída
+            with_layout: Se True, calcula as coordenadas dos nós (reaproveitando
+                o layout do export anterior quando o grafo mudou pouco)
+            layout: Layout já calculado por compute_export_layout (opcional)
+        """
         
         # Preparar dados dos nós (usuários)
         nodes = []
@@ -297,22 +864,24 @@ class SteamGraphAnalyzer:
         
         # Preparar dados das arestas (amizades)
         edges = []
-        user_ids = {user['steam_id'] for user in self.users_data}
-        
-        for user in self.users_data:
-            user_id = user['steam_id']
-            friends = user.get('friends_list', {}).get('friends', [])
+        for user_id, friend_id in self.friendship_pairs():
+            similarity = self.user_similarity_matrix.get(user_id, {}).get(friend_id, 0)
             
-            for friend_id in friends:
-                if friend_id in user_ids and user_id < friend_id:  # Evitar duplicatas
-                    similarity = self.user_similarity_matrix.get(user_id, {}).get(friend_id, 0)
-                    
-                    edge = {
-                        'source': user_id,
-                        'target': friend_id,
-                        'similarity': similarity
-                    }
-                    edges.append(edge)
+            edge = {
+                'source': user_id,
+                'target': friend_id,
+                'similarity': similarity
+            }
+            edges.append(edge)
+        
+        # Layout pré-calculado: a visualização não precisa simular forças
+        if with_layout and layout is None:
+            layout = self.compute_export_layout(output_file)
+        layout_info = None
+        if layout is not None:
+            positions, layout_info = layout
+            for node in nodes:
+                node['x'], node['y'] = positions[node['id']]
         
         # Dados para exportação
         export_data = {
@@ -326,25 +895,67 @@ class SteamGraphAnalyzer:
                 'clusters_count': len(self.clusters)
             }
         }
+        if layout_info:
+            export_data['layout'] = layout_info
         
-        # Salvar arquivo
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+        # Salvar arquivo (troca atômica: servidores da visualização só veem o export completo)
+        json_codec.dump(export_data, output_file, atomic=True)
         
         logger.info(f"Dados exportados para {output_file}")
         return export_data
     
-    def analyze(self, num_clusters: int = 5):
-        """Executa análise completa dos dados."""
-        logger.info("Iniciando análise do grafo Steam...")
+    def prepare(self, num_clusters: int = 5, clustering_method: str = 'threshold',
+                workers: int = 1, recommender: str = 'heuristic',
+                model_path: Optional[str] = None, similarity: str = 'full') -> bool:
+        """
+        Carrega os dados e calcula similaridade, clusters e recomendações,
+        sem exportar (usado por analyze e pelo serviço de recomendações).
         
+        Args:
+            num_clusters: Número de clusters
+            clustering_method: 'threshold', 'louvain' ou 'none' (sem clusters)
+            workers: Threads para processar os clusters (process_clusters)
+            recommender: 'heuristic' (score ponderado), 'als'
+                (train_recommendation_model) ou 'item' (build_item_index)
+            model_path: Arquivo do modelo ALS ou do índice item-item
+                (reaproveitado se válido)
+            similarity: 'full' (create_similarity_matrix) ou 'lazy'
+                (create_similarity_matrix_lazy, calculada sob demanda)
+        """
         if not self.load_data():
             return False
         
-        self.create_similarity_matrix()
-        self.cluster_users(num_clusters)
-        self.analyze_cluster_characteristics()
-        self.generate_game_recommendations()
+        if recommender == 'als':
+            self.train_recommendation_model(model_path)
+        elif recommender == 'item':
+            self.build_item_index(model_path)
+        
+        if similarity == 'lazy':
+            self.create_similarity_matrix_lazy()
+        else:
+            self.create_similarity_matrix()
+        if clustering_method == 'louvain':
+            self.cluster_users_louvain(num_clusters)
+        elif clustering_method != 'none':
+            self.cluster_users(num_clusters)
+        self.process_clusters(workers)
+        return True
+    
+    def analyze(self, num_clusters: int = 5, clustering_method: str = 'threshold',
+                similarity: str = 'full'):
+        """
+        Executa análise completa dos dados.
+        
+        Args:
+            num_clusters: Número de clusters
+            clustering_method: 'threshold' (cluster_users), 'louvain'
+                (cluster_users_louvain) ou 'none' (só o grafo)
+            similarity: 'full' ou 'lazy' (pares calculados sob demanda)
+        """
+        logger.info("Iniciando análise do grafo Steam...")
+        
+        if not self.prepare(num_clusters, clustering_method, similarity=similarity):
+            return False
         
         # Exportar dados
         data = self.export_for_visualization()
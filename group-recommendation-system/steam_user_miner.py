@@ -4,6 +4,13 @@ Steam User Data Miner
 
 Este script coleta dados de usuários da Steam usando a Steam Web API.
 Utiliza travessia em grafo (BFS) para coletar dados de 1.000 usuários únicos.
+A travessia parte de um ou mais SteamIDs iniciais e usa uma fronteira
+deduplicada (crawl_frontier.py), que pode ser compartilhada entre processos
+na coleta paralela (parallel_crawl.py). No modo compacto (compact_records.py)
+cada usuário é gravado direto no arquivo de saída, sem acumular em memória.
+Falhas permanentes (perfil privado, 4xx) não são repetidas e os SteamIDs
+privados ou inexistentes ficam em um cache negativo persistente
+(negative_cache.py), descartados nas coletas seguintes.
 
 Autor: Sistema automatizado
 Data: 2025-06-28
@@ -11,14 +18,21 @@ Data: 2025-06-28
 
 import os
 import time
-import json
+import threading
 import requests
-from collections import deque
-from typing import Dict, List, Optional, Set, Tuple
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 from dotenv import load_dotenv
 from tqdm import tqdm
 import logging
 
+import json_codec
+from compact_records import CompactJsonlWriter, compact_user, slim_profile
+from crawl_frontier import Frontier, MemoryFrontier
+from frontier_policy import PUBLIC_VISIBILITY, FifoPolicy, FrontierPolicy
+from negative_cache import MISSING, PRIVATE, RETRYABLE, NegativeCache, classify_failure
+from result_cache import ResultCache
+
 # Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,29 +44,143 @@ logger = logging.getLogger(__name__)
 class SteamUserMiner:
     """Classe principal para mineração de dados de usuários da Steam."""
     
-    def __init__(self, api_key: str, initial_steam_id: str):
+    def __init__(self, api_key: str, initial_steam_id: Union[str, List[str]],
+                 frontier: Optional[Frontier] = None,
+                 sink: Optional[Callable[[Dict], None]] = None,
+                 worker_id: str = '',
+                 policy: Optional[FrontierPolicy] = None,
+                 compact: bool = False,
+                 negative_cache: Optional[NegativeCache] = None):
         """
         Inicializa o minerador com a chave da API e SteamID inicial.
         
         Args:
             api_key: Chave da Steam Web API
-            initial_steam_id: SteamID de 64 bits para começar a coleta
+            initial_steam_id: SteamID de 64 bits (ou lista de SteamIDs) para
+                começar a coleta
+            frontier: Fronteira de coleta (padrão: MemoryFrontier, BFS local)
+            sink: Se informado, recebe cada usuário coletado em vez de
+                acumulá-lo em users_data (ex.: shard JSONL da coleta paralela)
+            worker_id: Identificação do processo na fronteira compartilhada
+            policy: Política de expansão da fronteira (padrão: FifoPolicy, BFS)
+            compact: Gera registros compactos (compact_records.py) em vez dos
+                payloads completos da API; sem sink, grava-os em JSONL no
+                arquivo de saída à medida que são coletados
+            negative_cache: Cache de SteamIDs privados/inexistentes: é
+                atualizado a cada consulta de perfis e os SteamIDs nele não
+                entram na fronteira nem são processados
         """
         self.api_key = api_key
-        self.initial_steam_id = initial_steam_id
-        self.base_url = "https://api.steampowered.com"
+        self.seeds = [initial_steam_id] if isinstance(initial_steam_id, str) else list(initial_steam_id)
+        self.initial_steam_id = self.seeds[0] if self.seeds else ''
+        # STEAM_API_BASE_URL permite apontar para um mock local (mock_steam_api.py)
+        self.base_url = os.getenv('STEAM_API_BASE_URL', "https://api.steampowered.com")
         
         # Estruturas de dados para BFS
-        self.users_queue = deque([initial_steam_id])
+        self.frontier = frontier if frontier is not None else MemoryFrontier()
+        self.frontier.add(self.seeds)
+        self.sink = sink
+        self.worker_id = worker_id
+        self.policy = policy if policy is not None else FifoPolicy()
+        self.compact = compact
+        self.negative_cache = negative_cache
         self.visited_users: Set[str] = set()
         self.users_data: List[Dict] = []
         self.processed_count = 0
         
+        # Rendimento da coleta: usuários úteis (perfil público com jogos) por requisição
+        self.request_count = 0
+        self.useful_count = 0
+        # SteamIDs descartados pelo cache negativo e falhas permanentes por classe
+        self.skipped_users: Set[str] = set()
+        self.permanent_failures: Counter = Counter()
+        self._count_lock = threading.Lock()
+        
+        # Perfis já obtidos em lote (GetPlayerSummaries com 100 SteamIDs),
+        # reaproveitados ao processar o usuário
+        self.profile_cache = ResultCache(max_entries=100000, ttl=3600.0)
+        
         # Configurações
         self.target_users = 1000
         self.request_delay = 0.5
         self.max_retries = 3
+        self.retry_delay = 1.0
+        self.frontier_poll_interval = 2.0
+        self.show_progress = True
+        
+    def _api_get(self, url: str, params: Dict) -> requests.Response:
+        """Faz uma requisição à Steam Web API, contabilizando-a."""
+        with self._count_lock:
+            self.request_count += 1
+        return requests.get(url, params=params, timeout=10)
+    
+    def _permanent_failure(self, endpoint: str, steam_id: str, failure: str, error: Exception) -> None:
+        """Registra uma falha que não vale retentativa."""
+        with self._count_lock:
+            self.permanent_failures[failure] += 1
+        logger.info(f"{endpoint} {steam_id}: falha permanente ({failure}), sem retentativa: {error}")
+    
+    def _note_profiles(self, steam_ids: List[str], players: Dict[str, Dict]) -> None:
+        """
+        Atualiza o cache negativo com uma resposta de GetPlayerSummaries:
+        perfis privados e SteamIDs ausentes entram, perfis públicos saem.
+        """
+        if self.negative_cache is None:
+            return
+        public = {steam_id for steam_id, player in players.items()
+                  if player.get('communityvisibilitystate') == PUBLIC_VISIBILITY}
+        self.negative_cache.add([steam_id for steam_id in players if steam_id not in public], PRIVATE)
+        self.negative_cache.add([steam_id for steam_id in steam_ids if steam_id not in players], MISSING)
+        self.negative_cache.discard(public)
+    
+    def get_player_summaries(self, steam_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Obtém os perfis de vários usuários em lotes de 100 (limite da API).
         
+        Args:
+            steam_ids: SteamIDs de 64 bits
+            
+        Returns:
+            Dict {steam_id: perfil} com os perfis encontrados
+        """
+        url = f"{self.base_url}/ISteamUser/GetPlayerSummaries/v0002/"
+        summaries = {}
+        
+        for start in range(0, len(steam_ids), 100):
+            batch = steam_ids[start:start + 100]
+            params = {
+                'key': self.api_key,
+                'steamids': ','.join(batch)
+            }
+            
+            for attempt in range(self.max_retries):
+                try:
+                    response = self._api_get(url, params)
+                    response.raise_for_status()
+                    
+                    players = {}
+                    for player in response.json().get('response', {}).get('players', []):
+                        steam_id = player['steamid']
+                        if self.compact:
+                            player = slim_profile(player)
+                        players[steam_id] = player
+                        self.profile_cache.put(steam_id, player)
+                    summaries.update(players)
+                    self._note_profiles(batch, players)
+                    break
+                    
+                except requests.exceptions.RequestException as e:
+                    failure = classify_failure(e)
+                    if failure != RETRYABLE:
+                        self._permanent_failure('GetPlayerSummaries', f"({len(batch)} usuários)", failure, e)
+                        break
+                    logger.warning(f"Tentativa {attempt + 1}/{self.max_retries} falhou para GetPlayerSummaries "
+                                   f"({len(batch)} usuários): {e}")
+                    if attempt < self.max_retries - 1:
+                        time.sleep(self.retry_delay)
+        
+        return summaries
+    
     def get_player_summary(self, steam_id: str) -> Optional[Dict]:
         """
         Obtém informações do perfil do usuário.
@@ -71,12 +199,13 @@ class SteamUserMiner:
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.get(url, params=params, timeout=10)
+                response = self._api_get(url, params)
                 response.raise_for_status()
                 
                 data = response.json()
                 players = data.get('response', {}).get('players', [])
                 
+                self._note_profiles([steam_id], {player['steamid']: player for player in players})
                 if players:
                     return players[0]
                 else:
@@ -84,9 +213,13 @@ class SteamUserMiner:
                     return None
                     
             except requests.exceptions.RequestException as e:
+                failure = classify_failure(e)
+                if failure != RETRYABLE:
+                    self._permanent_failure('GetPlayerSummaries', steam_id, failure, e)
+                    return None
                 logger.warning(f"Tentativa {attempt + 1}/{self.max_retries} falhou para GetPlayerSummaries {steam_id}: {e}")
                 if attempt < self.max_retries - 1:
-                    time.sleep(1)
+                    time.sleep(self.retry_delay)
                 else:
                     logger.error(f"Falha ao obter perfil do usuário {steam_id} após {self.max_retries} tentativas")
                     return None
@@ -114,13 +247,16 @@ class SteamUserMiner:
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.get(url, params=params, timeout=10)
+                response = self._api_get(url, params)
                 response.raise_for_status()
                 
                 data = response.json()
                 games_data = data.get('response', {})
                 
                 if 'games' in games_data:
+                    if self.compact:
+                        return games_data
+                    
                     # Adiciona tempo de jogo em horas para cada jogo
                     for game in games_data['games']:
                         playtime_minutes = game.get('playtime_forever', 0)
@@ -132,9 +268,14 @@ class SteamUserMiner:
                     return {'game_count': 0, 'games': []}
                     
             except requests.exceptions.RequestException as e:
+                failure = classify_failure(e)
+                if failure != RETRYABLE:
+                    # Jogos não públicos: mesmo resultado de uma resposta vazia
+                    self._permanent_failure('GetOwnedGames', steam_id, failure, e)
+                    return {'game_count': 0, 'games': []} if failure == PRIVATE else None
                 logger.warning(f"Tentativa {attempt + 1}/{self.max_retries} falhou para GetOwnedGames {steam_id}: {e}")
                 if attempt < self.max_retries - 1:
-                    time.sleep(1)
+                    time.sleep(self.retry_delay)
                 else:
                     logger.error(f"Falha ao obter jogos do usuário {steam_id} após {self.max_retries} tentativas")
                     return None
@@ -160,7 +301,7 @@ class SteamUserMiner:
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.get(url, params=params, timeout=10)
+                response = self._api_get(url, params)
                 response.raise_for_status()
                 
                 data = response.json()
@@ -169,9 +310,14 @@ class SteamUserMiner:
                 return [friend['steamid'] for friend in friends_data]
                 
             except requests.exceptions.RequestException as e:
+                failure = classify_failure(e)
+                if failure != RETRYABLE:
+                    # 401 de lista de amigos privada: não muda com retentativas
+                    self._permanent_failure('GetFriendList', steam_id, failure, e)
+                    return []
                 logger.warning(f"Tentativa {attempt + 1}/{self.max_retries} falhou para GetFriendList {steam_id}: {e}")
                 if attempt < self.max_retries - 1:
-                    time.sleep(1)
+                    time.sleep(self.retry_delay)
                 else:
                     logger.warning(f"Não foi possível obter lista de amigos do usuário {steam_id}")
                     return []
@@ -190,35 +336,73 @@ class SteamUserMiner:
         """
         logger.info(f"Processando usuário {steam_id}...")
         
-        # Obter informações do perfil
-        profile_info = self.get_player_summary(steam_id)
+        # Obter informações do perfil (reaproveitando uma consulta em lote)
+        profile_info = self.profile_cache.get(steam_id) or self.get_player_summary(steam_id)
         if not profile_info:
             logger.warning(f"Não foi possível obter informações do perfil para {steam_id}")
             return False
         
-        # Delay para evitar rate limiting
-        time.sleep(self.request_delay)
-        
-        # Obter jogos possuídos
-        owned_games = self.get_owned_games(steam_id)
-        if owned_games is None:
-            logger.warning(f"Não foi possível obter jogos para {steam_id}")
-            return False
-        
-        # Delay para evitar rate limiting
-        time.sleep(self.request_delay)
+        if profile_info.get('communityvisibilitystate') == PUBLIC_VISIBILITY:
+            # Delay para evitar rate limiting
+            time.sleep(self.request_delay)
+            
+            # Obter jogos possuídos
+            owned_games = self.get_owned_games(steam_id)
+            if owned_games is None:
+                logger.warning(f"Não foi possível obter jogos para {steam_id}")
+                return False
+            
+            # Delay para evitar rate limiting
+            time.sleep(self.request_delay)
+            
+            # Obter lista de amigos para expandir o grafo
+            friends = self.get_friend_list(steam_id)
+        else:
+            # Perfil privado: a API não devolve jogos nem amigos (GetFriendList
+            # responde 401), então as duas requisições são evitadas
+            logger.info(f"Usuário {steam_id} tem perfil privado")
+            owned_games = {'game_count': 0, 'games': []}
+            friends = []
+        
+        # Adicionar amigos à fronteira (que descarta os já vistos), na ordem
+        # definida pela política de coleta, sem os SteamIDs do cache negativo
+        candidates = friends
+        if self.negative_cache is not None:
+            candidates = self.negative_cache.exclude(friends)
+            excluded = set(friends).difference(candidates)
+            if excluded:
+                # Conta só os que ainda não estavam na fronteira (já coletados não contam)
+                self.skipped_users.update(self.frontier.unseen(excluded))
+        self.policy.enqueue(self, steam_id, candidates)
+        
+        if profile_info.get('communityvisibilitystate') == PUBLIC_VISIBILITY and owned_games.get('games'):
+            self.useful_count += 1
+        
+        user_data = self.build_user_record(steam_id, profile_info, owned_games, friends)
+        
+        if self.sink is not None:
+            self.sink(user_data)
+        else:
+            self.users_data.append(user_data)
+        self.processed_count += 1
         
-        # Obter lista de amigos para expandir o grafo
-        friends = self.get_friend_list(steam_id)
+        logger.info(f"✓ Usuário {steam_id} processado com sucesso! ({self.processed_count}/{self.target_users})")
         
-        # Adicionar novos amigos à fila (que ainda não foram visitados)
-        for friend_id in friends:
-            if friend_id not in self.visited_users and friend_id not in self.users_queue:
-                self.users_queue.append(friend_id)
+        return True
+    
+    def build_user_record(self, steam_id: str, profile_info: Dict, owned_games: Dict,
+                          friends: List[str]) -> Dict:
+        """
+        Compila os dados de um usuário (compactos no modo compacto), com o
+        instante da coleta em crawled_at (usado pela recoleta incremental).
+        """
+        crawled_at = int(time.time())
+        if self.compact:
+            return compact_user(steam_id, profile_info, owned_games.get('games', []), friends, crawled_at)
         
-        # Compilar dados do usuário
-        user_data = {
+        return {
             'steam_id': steam_id,
+            'crawled_at': crawled_at,
             'profile_info': profile_info,
             'owned_games': owned_games,
             'friends_list': {
@@ -226,13 +410,18 @@ class SteamUserMiner:
                 'friends': friends
             }
         }
-        
-        self.users_data.append(user_data)
-        self.processed_count += 1
-        
-        logger.info(f"✓ Usuário {steam_id} processado com sucesso! ({self.processed_count}/{self.target_users})")
-        
-        return True
+    
+    def crawl_stats(self) -> Dict:
+        """Estatísticas de rendimento da coleta."""
+        return {
+            'policy': self.policy.name,
+            'requests': self.request_count,
+            'processed_users': self.processed_count,
+            'useful_users': self.useful_count,
+            'skipped_negative': len(self.skipped_users),
+            'permanent_failures': sum(self.permanent_failures.values()),
+            'useful_per_request': self.useful_count / self.request_count if self.request_count else 0.0
+        }
     
     def save_data(self, filename: str = "steam_user_data.json") -> None:
         """
@@ -242,59 +431,97 @@ class SteamUserMiner:
             filename: Nome do arquivo para salvar os dados
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.users_data, f, indent=2, ensure_ascii=False)
+            json_codec.dump(self.users_data, filename)
             logger.info(f"Dados salvos com sucesso em {filename}")
         except Exception as e:
             logger.error(f"Erro ao salvar dados: {e}")
     
-    def mine_users(self) -> None:
+    def mine_users(self, output_file: str = "steam_user_data.json") -> None:
         """
         Executa o processo de mineração de dados dos usuários.
         Utiliza BFS para coletar dados de usuários através do grafo de amizades.
+        
+        Args:
+            output_file: Arquivo JSON de saída (JSONL no modo compacto)
         """
+        writer = None
+        if self.compact and self.sink is None:
+            # Sem fronteira persistente a coleta recomeça das sementes:
+            # continuar o arquivo repetiria os mesmos usuários
+            writer = self.sink = CompactJsonlWriter(output_file, append=False)
+        try:
+            self._crawl()
+        finally:
+            if writer is not None:
+                writer.close()
+                self.sink = None
+        
+        # Salvar dados finais
+        if writer is not None:
+            logger.info(f"{writer.count} registros compactos salvos em {output_file}")
+        elif self.sink is None:
+            self.save_data(output_file)
+            logger.info(f"Dados salvos em {output_file}")
+    
+    def _crawl(self) -> None:
+        """Laço da coleta: processa usuários da fronteira até atingir a meta."""
         logger.info(f"Iniciando mineração de dados da Steam...")
         logger.info(f"Meta: {self.target_users} usuários únicos")
-        logger.info(f"SteamID inicial: {self.initial_steam_id}")
+        logger.info(f"SteamIDs iniciais: {', '.join(self.seeds)}")
         
         # Barra de progresso
-        with tqdm(total=self.target_users, desc="Coletando dados", unit="usuários") as pbar:
+        with tqdm(total=self.target_users, desc="Coletando dados", unit="usuários",
+                  disable=not self.show_progress) as pbar:
             
-            while self.processed_count < self.target_users and self.users_queue:
-                # Pegar próximo usuário da fila
-                current_user = self.users_queue.popleft()
+            while self.processed_count < self.target_users:
+                # Reservar próximo usuário da fronteira
+                claimed = self.frontier.claim(self.worker_id)
+                if not claimed:
+                    # Fronteira compartilhada: outros processos ainda podem
+                    # descobrir novos usuários
+                    if self.frontier.in_progress() > 0:
+                        time.sleep(self.frontier_poll_interval)
+                        continue
+                    break
                 
-                # Pular se já foi visitado
-                if current_user in self.visited_users:
+                current_user = claimed[0]
+                
+                # Privado ou inexistente segundo o cache negativo: descartado sem requisições
+                if self.negative_cache is not None and current_user in self.negative_cache:
+                    self.skipped_users.add(current_user)
+                    self.frontier.complete(current_user, False)
                     continue
                 
-                # Marcar como visitado
                 self.visited_users.add(current_user)
                 
                 # Processar usuário
                 success = self.process_user(current_user)
+                self.frontier.complete(current_user, success)
                 
                 if success:
                     pbar.update(1)
                     pbar.set_postfix({
                         'Atual': current_user[-6:],  # Últimos 6 dígitos do SteamID
-                        'Fila': len(self.users_queue)
+                        'Fila': self.frontier.stats()['pending']
                     })
                 
                 # Delay adicional entre usuários
                 time.sleep(self.request_delay)
                 
                 # Salvar progresso a cada 50 usuários
-                if self.processed_count % 50 == 0:
+                if self.sink is None and success and self.processed_count % 50 == 0:
                     self.save_data(f"steam_user_data_backup_{self.processed_count}.json")
         
-        # Salvar dados finais
-        self.save_data()
-        
         logger.info(f"Mineração concluída!")
         logger.info(f"Usuários processados: {self.processed_count}")
         logger.info(f"Usuários únicos visitados: {len(self.visited_users)}")
-        logger.info(f"Dados salvos em steam_user_data.json")
+        stats = self.crawl_stats()
+        logger.info(f"Política: {stats['policy']} | Requisições: {stats['requests']} | "
+                    f"Usuários úteis: {stats['useful_users']} | "
+                    f"Rendimento: {stats['useful_per_request']:.3f} usuários úteis/requisição")
+        if self.negative_cache is not None or self.permanent_failures:
+            logger.info(f"Descartados pelo cache negativo: {stats['skipped_negative']} | "
+                        f"Falhas permanentes: {dict(self.permanent_failures)}")
 
 
 def get_env_or_input(env_var: str, prompt: str, secret: bool = False) -> str:
@@ -340,21 +567,27 @@ def main():
         
         initial_steam_id = get_env_or_input(
             'INITIAL_STEAM_ID',
-            'Digite o SteamID inicial (64-bit): '
+            'Digite o SteamID inicial (64-bit, vários separados por vírgula): '
         )
+        seeds = [seed.strip() for seed in initial_steam_id.split(',') if seed.strip()]
         
         # Validar entradas
-        if not api_key or not initial_steam_id:
+        if not api_key or not seeds:
             logger.error("API Key e SteamID inicial são obrigatórios!")
             return
         
-        if not initial_steam_id.isdigit() or len(initial_steam_id) != 17:
+        if any(not seed.isdigit() or len(seed) != 17 for seed in seeds):
             logger.error("SteamID deve ser um número de 17 dígitos!")
             return
         
-        # Criar e executar minerador
-        miner = SteamUserMiner(api_key, initial_steam_id)
-        miner.mine_users()
+        # Criar e executar minerador (STEAM_COMPACT_RECORDS=1: registros
+        # compactos gravados direto em JSONL)
+        compact = os.getenv('STEAM_COMPACT_RECORDS', '') == '1'
+        # Cache negativo persistente (STEAM_NEGATIVE_CACHE vazio desativa)
+        negative_path = os.getenv('STEAM_NEGATIVE_CACHE', 'steam_negative_cache.db')
+        negative_cache = NegativeCache(negative_path) if negative_path else None
+        miner = SteamUserMiner(api_key, seeds, compact=compact, negative_cache=negative_cache)
+        miner.mine_users("steam_user_data.jsonl" if compact else "steam_user_data.json")
         
     except KeyboardInterrupt:
         logger.info("\nProcesso interrompido pelo usuário.")
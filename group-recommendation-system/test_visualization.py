@@ -7,12 +7,11 @@ Script para testar a visualização com dados de exemplo.
 
 import json
 import webbrowser
-import http.server
-import socketserver
-import threading
 import time
 import shutil
 
+from visualization_server import serve_in_thread
+
 def create_test_data():
     """Cria dados de teste mais robustos para a visualização."""
     
@@ -33,21 +32,14 @@ def start_server_and_open():
     """Inicia servidor local e abre a visualização."""
     
     PORT = 8000
-    Handler = http.server.SimpleHTTPRequestHandler
-    
-    def start_server():
-        try:
-            with socketserver.TCPServer(("", PORT), Handler) as httpd:
-                print(f"🌐 Servidor iniciado em http://localhost:{PORT}")
-                httpd.serve_forever()
-        except OSError:
-            print(f"❌ Porta {PORT} já está em uso. Tente uma porta diferente.")
     
     # Iniciar servidor em thread separada
-    server_thread = threading.Thread(target=start_server, daemon=True)
-    server_thread.start()
-    
-    time.sleep(2)  # Aguardar servidor iniciar
+    try:
+        serve_in_thread(port=PORT)
+    except OSError:
+        print(f"❌ Porta {PORT} já está em uso. Tente uma porta diferente.")
+        return
+    print(f"🌐 Servidor iniciado em http://localhost:{PORT}")
     
     # Abrir navegador
     url = f"http://localhost:{PORT}/steam_graph_visualization.html"
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Visualization Server
+
+Servidor HTTP (asyncio) da visualização interativa: serve
+steam_graph_visualization.html e o export steam_graph_data.json a partir da
+memória, para muitos navegadores ao mesmo tempo.
+
+- cada arquivo é lido uma vez e mantido em memória, já comprimido com gzip
+  (enviado para clientes com Accept-Encoding: gzip)
+- ETag/If-None-Match (e Last-Modified): recarregar a página sem mudanças
+  no export responde 304, sem reenviar o JSON
+- requisições Range (bytes=a-b, a-, -n) respondem 206 com a fatia pedida
+- HTTP/1.1 com keep-alive; HEAD e POST /reload
+- quando uma nova análise grava o export, o arquivo é relido (verificação
+  periódica da data de modificação) e trocado atomicamente; um export
+  incompleto ou inválido é ignorado e a versão anterior continua no ar
+
+Só os arquivos da visualização são servidos (o SimpleHTTPRequestHandler
+usado antes expunha o diretório inteiro, inclusive o .env).
+
+Uso:
+    python visualization_server.py --port 8000
+    python visualization_server.py --host 0.0.0.0 --port 8000 --watch-interval 2
+
+Autor: Sistema automatizado
+Data: 2025-06-28
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+import json_codec
+from http_request import BadRequest, read_request
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'steam_graph_visualization.html'
+DATA_FILE = 'steam_graph_data.json'
+DEFAULT_FILES = (INDEX_FILE, DATA_FILE)
+
+# Arquivos menores que isso não são comprimidos
+GZIP_MIN_BYTES = 1024
+
+
+class Asset:
+    """Um arquivo servido: conteúdo, versão gzip, ETag e data de modificação."""
+
+    __slots__ = ('name', 'body', 'gzipped', 'content_type', 'etag', 'gzip_etag',
+                 'last_modified', 'signature')
+
+    def __init__(self, name: str, body: bytes, mtime: float, signature: Tuple):
+        """
+        Args:
+            name: Nome do arquivo (caminho na URL)
+            body: Conteúdo
+            mtime: Data de modificação (epoch)
+            signature: Identificação da versão em disco (mtime_ns, tamanho, inode)
+        """
+        self.name = name
+        self.body = body
+        self.signature = signature
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        compressible = content_type.startswith('text/') or content_type.endswith(('json', 'javascript'))
+        self.content_type = content_type + ('; charset=utf-8' if compressible else '')
+        self.gzipped = gzip.compress(body, 6, mtime=0) if compressible and len(body) >= GZIP_MIN_BYTES else None
+
+        # A versão gzip é outra representação: ETag própria
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+        self.last_modified = formatdate(mtime, usegmt=True)
+
+
+def _signature(path: str) -> Tuple:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def load_asset(path: str, name: str) -> Asset:
+    """
+    Lê um arquivo para a memória (JSON é validado antes de ser servido).
+
+    Raises:
+        OSError: Arquivo inexistente ou ilegível
+        ValueError: JSON inválido (por exemplo, export ainda sendo gravado)
+    """
+    signature = _signature(path)
+    with open(path, 'rb') as f:
+        body = f.read()
+    if name.endswith('.json'):
+        json_codec.loads(body)
+    return Asset(name, body, signature[0] / 1e9, signature)
+
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta um cabeçalho Range de uma única faixa de bytes.
+
+    Returns:
+        (início, fim exclusivo); (0, 0) se a faixa não é satisfazível; None se
+        o cabeçalho não é suportado (várias faixas, outra unidade), caso em
+        que o arquivo inteiro é enviado
+    """
+    unit, _, spec = value.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash:
+        return None
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return 0, 0
+            return max(0, size - length), size
+        start = int(first)
+        stop = min(int(last) + 1, size) if last else size
+    except ValueError:
+        return None
+    if start >= size or stop <= start:
+        return 0, 0
+    return start, stop
+
+
+def _etags(value: str) -> List[str]:
+    """ETags de um If-None-Match/If-Range (comparação fraca: ignora W/)."""
+    return [tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip() for tag in value.split(',')]
+
+
+def _accepts_gzip(value: str) -> bool:
+    """Se um Accept-Encoding aceita gzip (sem q=0)."""
+    for coding in value.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            quality = params.partition('q=')[2].strip()
+            try:
+                return float(quality) > 0 if quality else True
+            except ValueError:
+                return True
+    return False
+
+
+class VisualizationServer:
+    """Servidor em memória dos arquivos da visualização."""
+
+    def __init__(self, root: str = '.', files: Sequence[str] = DEFAULT_FILES,
+                 watch_interval: float = 2.0):
+        """
+        Args:
+            root: Diretório dos arquivos
+            files: Arquivos servidos (o primeiro também responde em /)
+            watch_interval: Intervalo (s) da verificação de arquivos alterados
+                (0 = desativada; POST /reload continua disponível)
+        """
+        self.root = root
+        self.files = list(files)
+        self.watch_interval = watch_interval
+        self.assets: Dict[str, Asset] = {}
+        self.reloads = 0
+        self.requests = 0
+        self._rejected: Dict[str, Tuple] = {}
+        self._reload_lock = asyncio.Lock()
+
+    async def refresh(self, force: bool = False) -> List[str]:
+        """
+        Relê os arquivos que mudaram em disco (em uma thread) e troca as
+        versões em memória.
+
+        Args:
+            force: Relê todos os arquivos, mesmo sem mudança aparente
+
+        Returns:
+            Nomes dos arquivos recarregados
+        """
+        async with self._reload_lock:
+            loop = asyncio.get_running_loop()
+            changed = []
+            for name in self.files:
+                path = os.path.join(self.root, name)
+                try:
+                    signature = _signature(path)
+                except OSError:
+                    continue
+                current = self.assets.get(name)
+                if not force and ((current is not None and current.signature == signature)
+                                  or self._rejected.get(name) == signature):
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    asset = await loop.run_in_executor(None, load_asset, path, name)
+                except (OSError, ValueError) as e:
+                    self._rejected[name] = signature
+                    logger.warning(f"{name} não pôde ser carregado ({e}); mantendo a versão atual")
+                    continue
+
+                # Troca atômica: respostas em andamento mantêm a versão antiga
+                self.assets = {**self.assets, name: asset}
+                self._rejected.pop(name, None)
+                changed.append(name)
+                compressed = f", gzip {len(asset.gzipped) / 1024:.0f} KB" if asset.gzipped else ""
+                logger.info(f"{name} carregado: {len(asset.body) / 1024:.0f} KB{compressed} "
+                            f"em {time.perf_counter() - start:.2f}s")
+
+            if changed:
+                self.reloads += 1
+            return changed
+
+    async def watch(self):
+        """Recarrega os arquivos quando mudam em disco (por exemplo, após uma nova análise)."""
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            await self.refresh()
+
+    def respond(self, method: str, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Resolve uma requisição.
+
+        Returns:
+            Tupla (status HTTP, cabeçalhos, corpo); para HEAD, o corpo é o do GET
+            (quem escreve a resposta o omite)
+        """
+        if method == 'POST' and path == '/reload':
+            return 202, {'Content-Type': 'application/json'}, b'{"status":"reloading"}'
+        if method not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD', 'Content-Type': 'text/plain; charset=utf-8'}, \
+                'Método não suportado\n'.encode('utf-8')
+
+        name = unquote(path).lstrip('/') or (self.files[0] if self.files else '')
+        asset = self.assets.get(name)
+        if asset is None:
+            return 404, {'Content-Type': 'text/plain; charset=utf-8'}, 'Arquivo não encontrado\n'.encode('utf-8')
+
+        use_gzip = asset.gzipped is not None and _accepts_gzip(headers.get('accept-encoding', ''))
+        response_headers = {
+            'Content-Type': asset.content_type,
+            'ETag': asset.gzip_etag if use_gzip else asset.etag,
+            'Last-Modified': asset.last_modified,
+            'Cache-Control': 'no-cache',
+            'Accept-Ranges': 'bytes',
+        }
+        if asset.gzipped is not None:
+            response_headers['Vary'] = 'Accept-Encoding'
+
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = _etags(if_none_match)
+            if '*' in tags or asset.etag in tags or asset.gzip_etag in tags:
+                return 304, response_headers, b''
+        elif headers.get('if-modified-since') == asset.last_modified:
+            return 304, response_headers, b''
+
+        # Faixas de bytes sempre sobre o conteúdo sem compressão
+        range_header = headers.get('range')
+        if_range = headers.get('if-range')
+        if range_header and (if_range is None or if_range in (asset.etag, asset.last_modified)):
+            size = len(asset.body)
+            byte_range = parse_range(range_header, size)
+            if byte_range == (0, 0):
+                response_headers['ETag'] = asset.etag
+                response_headers['Content-Range'] = f'bytes */{size}'
+                return 416, response_headers, b''
+            if byte_range is not None:
+                start, stop = byte_range
+                response_headers['ETag'] = asset.etag
+                response_headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+                return 206, response_headers, memoryview(asset.body)[start:stop]
+
+        if use_gzip:
+            response_headers['Content-Encoding'] = 'gzip'
+            return 200, response_headers, asset.gzipped
+        return 200, response_headers, asset.body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende uma conexão HTTP/1.1 (com keep-alive)."""
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except BadRequest as e:
+                    logger.debug(f"Requisição malformada: {e}")
+                    request = None
+                    status, response_headers, body = 400, {'Content-Type': 'text/plain'}, b'Bad Request\n'
+                else:
+                    if request is None:
+                        break
+                    status, response_headers, body = self.respond(request.method, request.path, request.headers)
+                self.requests += 1
+
+                if status == 202:
+                    asyncio.get_running_loop().create_task(self.refresh(force=True))
+
+                # Requisição malformada: fecha a conexão
+                keep_alive = request is not None and request.keep_alive
+                if status != 304:
+                    response_headers['Content-Length'] = str(len(body))
+                response_headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+                writer.write((f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n" + ''.join(
+                    f"{name}: {value}\r\n" for name, value in response_headers.items()) + "\r\n").encode('latin-1'))
+                if (request is None or request.method != 'HEAD') and body:
+                    writer.write(body)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8000,
+                    started: Optional[threading.Event] = None):
+        """
+        Carrega os arquivos e atende requisições até ser interrompido.
+
+        Args:
+            started: Sinalizado quando o servidor está escutando e os arquivos
+                foram carregados
+        """
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        await self.refresh()
+        missing = [name for name in self.files if name not in self.assets]
+        if missing:
+            logger.warning(f"Arquivos ainda não disponíveis: {', '.join(missing)}")
+        logger.info(f"Visualização em http://{host or 'localhost'}:{port}/{self.files[0] if self.files else ''}")
+        if started is not None:
+            started.set()
+
+        if self.watch_interval > 0:
+            asyncio.get_running_loop().create_task(self.watch())
+
+        async with server:
+            await server.serve_forever()
+
+
+_REASONS = {200: 'OK', 202: 'Accepted', 206: 'Partial Content', 304: 'Not Modified', 400: 'Bad Request',
+            404: 'Not Found', 405: 'Method Not Allowed', 416: 'Range Not Satisfiable'}
+
+
+def serve_in_thread(root: str = '.', host: str = '', port: int = 8000,
+                    watch_interval: float = 2.0) -> VisualizationServer:
+    """
+    Inicia o servidor em uma thread daemon e espera ele começar a escutar.
+
+    Raises:
+        OSError: Porta em uso ou endereço inválido
+    """
+    server = VisualizationServer(root, watch_interval=watch_interval)
+    started = threading.Event()
+    errors = []
+
+    def run():
+        try:
+            asyncio.run(server.serve(host, port, started))
+        except OSError as e:
+            errors.append(e)
+            started.set()
+
+    threading.Thread(target=run, daemon=True, name='visualization-server').start()
+    started.wait()
+    if errors:
+        raise errors[0]
+    return server
+
+
+def main():
+    """Inicia o servidor da visualização."""
+    parser = argparse.ArgumentParser(description="Servidor da visualização do grafo Steam")
+    parser.add_argument('--root', default='.', help="Diretório da visualização e do export")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço de escuta (0.0.0.0 para a rede)")
+    parser.add_argument('--port', type=int, default=8000, help="Porta")
+    parser.add_argument('--watch-interval', type=float, default=2.0,
+                        help="Intervalo (s) para detectar um novo export (0 = desativado)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    server = VisualizationServer(args.root, watch_interval=args.watch_interval)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Servidor parado!")
+
+
+if __name__ == "__main__":
+    main()